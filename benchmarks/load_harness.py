@@ -0,0 +1,431 @@
+"""Offline load harness: many simulated calls in one process.
+
+Runs N ``HardwareStoreAgent`` sessions at once against the fake STT, LLM and
+TTS from ``fake_providers`` and an in-process inventory stand-in, and reports
+how CPU, memory, event-loop lag and turn latency change as N grows. Nothing
+leaves the machine, so results depend only on the replica's hardware.
+
+Each simulated caller streams 16 kHz audio in real time, 20 ms at a time,
+for the whole call: synthetic speech while it talks, low room noise while
+it listens. The audio goes through WebRTC noise suppression and the Silero
+VAD, as it would in a live session. The production path uses Krisp BVC,
+which needs a LiveKit Cloud connection; WebRTC noise suppression stands in
+for its per-frame cost.
+
+A turn runs from the end of the caller's speech, through VAD end-of-speech
+detection, the fake STT and the agent's LLM turn (including real tool calls
+against the inventory cache and catalog), to the first byte of fake TTS
+audio. The caller then listens for as long as the reply would play, and
+speaks again.
+
+    uv run python benchmarks/load_harness.py --concurrency 1,2,4,8 --turns 4
+
+The synthetic speech is vowel-like rather than real speech; if the VAD misses
+many turns (see ``vad misses``), pass a 16 kHz mono recording with
+``--speech-wav``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psutil
+from aiohttp import web
+from aiohttp.test_utils import unused_port
+from livekit import rtc
+from livekit.agents import AgentSession, vad
+from livekit.plugins import silero
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from agent import HardwareStoreAgent
+from catalog import load_catalog
+from fake_providers import FakeLLM, FakeSTT, FakeTTS, ScriptedTurn
+from inventory import InventoryClient
+from inventory_cache import InventoryCache
+from inventory_server import create_app
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = SAMPLE_RATE // 50  # 20 ms
+APM_SAMPLES = SAMPLE_RATE // 100  # noise suppression works on 10 ms frames
+SECONDS_PER_WORD = 0.35
+
+# How long to wait for the VAD to report end of speech before counting a miss
+EOS_TIMEOUT = 2.0
+LAG_INTERVAL = 0.05
+
+# What the caller says, and how the fake LLM answers each line
+CONVERSATION = [
+    (
+        "Hi, I'm calling about the Oakville store.",
+        ScriptedTurn(
+            trigger="oakville store",
+            reply="Great, Oakville it is. What can I help you find today?",
+        ),
+    ),
+    (
+        "Do you have the DeWalt cordless drill driver kit in stock?",
+        ScriptedTurn(
+            trigger="dewalt",
+            tool="inventory_check",
+            arguments={
+                "item_name": "DeWalt 20V MAX Cordless Drill Driver Kit",
+                "store_location": "Oakville",
+            },
+            reply="Let me see. We have that drill kit in Power Tools, aisle four.",
+        ),
+    ),
+    (
+        "Could you check the other stores as well?",
+        ScriptedTurn(
+            trigger="other stores",
+            tool="check_other_locations",
+            arguments={"item_name": "DeWalt 20V MAX Cordless Drill Driver Kit"},
+            reply="Burnaby and Halifax both have it in stock too.",
+        ),
+    ),
+    (
+        "What time do you close on Sunday?",
+        ScriptedTurn(
+            trigger="sunday",
+            tool="get_store_hours",
+            arguments={"store_location": "Oakville"},
+            reply="On Sundays Oakville is open from ten to six.",
+        ),
+    ),
+]
+
+VOWEL_FORMANTS = np.array(
+    [(730, 1090), (530, 1840), (270, 2290), (570, 840), (300, 870), (660, 1720)]
+)
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> np.ndarray:
+    """Vowel-like int16 audio: a wandering pitch shaped by changing formants."""
+    rng = np.random.default_rng(seed)
+    syllable_rate = 4.0
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 120 + 15 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+
+    syllable = (t * syllable_rate).astype(int)
+    vowels = rng.integers(len(VOWEL_FORMANTS), size=syllable[-1] + 1)
+    f1, f2 = VOWEL_FORMANTS[vowels[syllable]].T
+
+    signal = np.zeros_like(t)
+    for k in range(1, 40):
+        freq = k * f0
+        gain = (
+            np.exp(-(((freq - f1) / 120) ** 2))
+            + 0.7 * np.exp(-(((freq - f2) / 180) ** 2))
+            + 0.05
+        )
+        signal += gain / np.sqrt(k) * np.sin(k * phase)
+    signal *= np.abs(np.sin(np.pi * t * syllable_rate)) ** 0.6
+    signal += 0.01 * rng.standard_normal(len(t))
+    signal *= 0.3 / np.abs(signal).max()
+    return (signal * 32767).astype(np.int16)
+
+
+def read_wav(path: Path) -> np.ndarray:
+    with wave.open(str(path), "rb") as f:
+        if (f.getframerate(), f.getnchannels(), f.getsampwidth()) != (
+            SAMPLE_RATE,
+            1,
+            2,
+        ):
+            raise SystemExit(f"{path} must be 16 kHz mono 16-bit PCM")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+
+class CallerAudio:
+    """One caller's microphone, streamed in real time through NS and the VAD.
+
+    Args:
+        vad_model: Shared Silero VAD; each caller gets its own stream
+        speech: Audio played (from the start) each time the caller speaks
+        seed: Varies the room noise between callers
+    """
+
+    def __init__(self, vad_model: vad.VAD, speech: np.ndarray, seed: int) -> None:
+        self._vad = vad_model.stream()
+        self._apm = rtc.AudioProcessingModule(
+            noise_suppression=True, high_pass_filter=True
+        )
+        self._speech = speech
+        rng = np.random.default_rng(seed)
+        self._noise = (rng.standard_normal(SAMPLE_RATE * 5) * 100).astype(np.int16)
+        self._noise_pos = 0
+        self._pending: deque[np.ndarray] = deque()
+        self._speech_done: asyncio.Future[float] | None = None
+        self._eos: asyncio.Queue[tuple[float, list[rtc.AudioFrame]]] = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._pump()),
+            asyncio.create_task(self._read_events()),
+        ]
+
+    async def speak(self, seconds: float) -> tuple[float, float | None, list[Any]]:
+        """Say ``seconds`` of speech and wait for the VAD's end of speech.
+
+        Returns when the speech actually stopped, when the VAD reported it
+        (None on a miss), and the speech frames the VAD collected.
+        """
+        while not self._eos.empty():
+            self._eos.get_nowait()
+        count = max(1, int(seconds * SAMPLE_RATE) // FRAME_SAMPLES)
+        speech = self._speech[: count * FRAME_SAMPLES]
+        self._pending.extend(speech.reshape(-1, FRAME_SAMPLES))
+        self._speech_done = asyncio.get_running_loop().create_future()
+        stopped = await self._speech_done
+        try:
+            detected, frames = await asyncio.wait_for(self._eos.get(), EOS_TIMEOUT)
+        except asyncio.TimeoutError:
+            return stopped, None, []
+        return stopped, detected, frames
+
+    async def _pump(self) -> None:
+        next_tick = time.perf_counter()
+        while True:
+            if self._pending:
+                chunk = self._pending.popleft()
+            else:
+                start = self._noise_pos
+                self._noise_pos = (start + FRAME_SAMPLES) % (
+                    len(self._noise) - FRAME_SAMPLES
+                )
+                chunk = self._noise[start : start + FRAME_SAMPLES]
+
+            for i in range(0, FRAME_SAMPLES, APM_SAMPLES):
+                frame = rtc.AudioFrame(
+                    data=chunk[i : i + APM_SAMPLES].tobytes(),
+                    sample_rate=SAMPLE_RATE,
+                    num_channels=1,
+                    samples_per_channel=APM_SAMPLES,
+                )
+                self._apm.process_stream(frame)
+                self._vad.push_frame(frame)
+
+            if not self._pending and self._speech_done and not self._speech_done.done():
+                self._speech_done.set_result(time.perf_counter())
+
+            next_tick += FRAME_SAMPLES / SAMPLE_RATE
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    async def _read_events(self) -> None:
+        async for event in self._vad:
+            if event.type == vad.VADEventType.END_OF_SPEECH:
+                self._eos.put_nowait((time.perf_counter(), event.frames))
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._vad.aclose()
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    turns: int = 0
+    vad_misses: int = 0
+    turn_latency: list[float] = field(default_factory=list)
+    stages: dict[str, list[float]] = field(default_factory=dict)
+    loop_lag: list[float] = field(default_factory=list)
+    cpu_percent: float = 0.0
+    peak_rss_mb: float = 0.0
+
+    def record(self, stage: str, value: float) -> None:
+        self.stages.setdefault(stage, []).append(value)
+
+    def summary(self) -> dict[str, Any]:
+        def pct(values: list[float], q: float) -> float:
+            return float(np.percentile(values, q)) if values else float("nan")
+
+        return {
+            "concurrency": self.concurrency,
+            "turns": self.turns,
+            "vad_misses": self.vad_misses,
+            "turn_p50": pct(self.turn_latency, 50),
+            "turn_p95": pct(self.turn_latency, 95),
+            "stages_p50": {k: pct(v, 50) for k, v in self.stages.items()},
+            "loop_lag_p99": pct(self.loop_lag, 99),
+            "loop_lag_max": max(self.loop_lag, default=float("nan")),
+            "cpu_percent": self.cpu_percent,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+@dataclass
+class Harness:
+    vad_model: vad.VAD
+    inventory: InventoryCache
+    catalog: Any
+    speech: np.ndarray
+    args: argparse.Namespace
+
+    async def run_call(self, call: int, result: LevelResult) -> None:
+        args = self.args
+        stt = FakeSTT([text for text, _ in CONVERSATION], latency=args.stt_latency)
+        llm = FakeLLM([turn for _, turn in CONVERSATION], ttft=args.llm_ttft)
+        tts = FakeTTS(ttfb=args.tts_ttfb)
+        caller = CallerAudio(self.vad_model, self.speech, seed=call)
+        session = AgentSession(llm=llm)
+        try:
+            await session.start(
+                HardwareStoreAgent(inventory=self.inventory, catalog=self.catalog)
+            )
+            for turn in range(args.turns):
+                text, _ = CONVERSATION[turn % len(CONVERSATION)]
+                stopped, detected, frames = await caller.speak(
+                    len(text.split()) * SECONDS_PER_WORD
+                )
+                if detected is None:
+                    result.vad_misses += 1
+                    detected = time.perf_counter()
+                result.record("end_of_speech", detected - stopped)
+
+                start = time.perf_counter()
+                await stt.recognize(frames or [])
+                result.record("stt", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                run = await session.run(user_input=text)
+                result.record("llm_and_tools", time.perf_counter() - start)
+                reply = next(
+                    (
+                        ev.item.text_content or ""
+                        for ev in reversed(run.events)
+                        if ev.type == "message"
+                    ),
+                    "",
+                )
+
+                start = time.perf_counter()
+                async with tts.synthesize(reply) as stream:
+                    async for _ in stream:
+                        break
+                first_audio = time.perf_counter()
+                result.record("tts_ttfb", first_audio - start)
+                result.turn_latency.append(first_audio - stopped)
+                result.turns += 1
+
+                # The caller listens to the reply before speaking again
+                await asyncio.sleep(len(reply.split()) * tts.seconds_per_word)
+        finally:
+            await session.aclose()
+            await caller.aclose()
+
+    async def run_level(self, concurrency: int) -> LevelResult:
+        result = LevelResult(concurrency)
+        process = psutil.Process()
+        stop = asyncio.Event()
+
+        async def monitor() -> None:
+            while not stop.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(LAG_INTERVAL)
+                result.loop_lag.append(time.perf_counter() - start - LAG_INTERVAL)
+                rss = process.memory_info().rss / 2**20
+                result.peak_rss_mb = max(result.peak_rss_mb, rss)
+
+        async def staggered(call: int) -> None:
+            # Spread call starts over the ramp so turns don't run in lockstep
+            await asyncio.sleep(call * self.args.ramp / concurrency)
+            await self.run_call(call, result)
+
+        cpu_before = process.cpu_times()
+        wall_before = time.perf_counter()
+        monitor_task = asyncio.create_task(monitor())
+        await asyncio.gather(*(staggered(call) for call in range(concurrency)))
+        stop.set()
+        await monitor_task
+        cpu_after = process.cpu_times()
+        cpu = (cpu_after.user - cpu_before.user) + (
+            cpu_after.system - cpu_before.system
+        )
+        result.cpu_percent = 100 * cpu / (time.perf_counter() - wall_before)
+        return result
+
+
+def print_table(results: list[dict[str, Any]]) -> None:
+    print(
+        f"{'calls':>5} {'turns':>5} {'turn p50':>9} {'turn p95':>9} "
+        f"{'lag p99':>8} {'lag max':>8} {'cpu %':>6} {'rss MB':>7} {'vad misses':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['turns']:>5} "
+            f"{r['turn_p50'] * 1000:>7.0f}ms {r['turn_p95'] * 1000:>7.0f}ms "
+            f"{r['loop_lag_p99'] * 1000:>6.1f}ms {r['loop_lag_max'] * 1000:>6.1f}ms "
+            f"{r['cpu_percent']:>6.1f} {r['peak_rss_mb']:>7.0f} {r['vad_misses']:>10}"
+        )
+    print("\nMedian per stage (ms):")
+    for r in results:
+        stages = ", ".join(f"{k} {v * 1000:.0f}" for k, v in r["stages_p50"].items())
+        print(f"{r['concurrency']:>5} calls: {stages}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    runner = web.AppRunner(create_app(latency=args.inventory_latency))
+    await runner.setup()
+    port = unused_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    client = InventoryClient(f"http://127.0.0.1:{port}")
+    speech = read_wav(args.speech_wav) if args.speech_wav else synthetic_speech(12.0)
+    harness = Harness(
+        vad_model=silero.VAD.load(),
+        inventory=InventoryCache(client),
+        catalog=load_catalog(),
+        speech=speech,
+        args=args,
+    )
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            print(f"Running {concurrency} concurrent calls...", file=sys.stderr)
+            results.append((await harness.run_level(concurrency)).summary())
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1, 2, 4, 8],
+        help="Comma-separated numbers of concurrent calls to run, one level at a time",
+    )
+    parser.add_argument("--turns", type=int, default=4, help="Turns per call")
+    parser.add_argument(
+        "--ramp", type=float, default=2.0, help="Seconds over which calls start"
+    )
+    parser.add_argument("--stt-latency", type=float, default=0.1)
+    parser.add_argument("--llm-ttft", type=float, default=0.35)
+    parser.add_argument("--tts-ttfb", type=float, default=0.15)
+    parser.add_argument("--inventory-latency", type=float, default=0.05)
+    parser.add_argument(
+        "--speech-wav", type=Path, help="16 kHz mono WAV to use as caller speech"
+    )
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
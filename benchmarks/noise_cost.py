@@ -0,0 +1,168 @@
+"""Audio-processing CPU against transcript accuracy on recorded calls.
+
+Each clip is a 16 kHz mono WAV of a caller with its reference transcript
+next to it (``clip.wav`` and ``clip.txt``). Every clip goes through each
+caller audio stage in 50 ms frames, as room input delivers them:
+
+- ``off``: no processing
+- ``suppress``: WebRTC noise suppression on every frame
+- ``adaptive``: ``AdaptiveNoiseFilter``, suppression only while the SNR is
+  below ``--snr-db``
+
+The report shows each stage's CPU time per second of audio and, unless
+``--no-stt``, the word error rate of the configured STT provider
+(``STT_PROVIDER``, which needs its API key) on the processed audio:
+
+    uv run python benchmarks/noise_cost.py clips/ --snr-db 10 15 20
+
+Krisp BVC, the production default, needs a LiveKit Cloud connection and
+can't run here; compare against ``suppress``, which processes every frame.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import numpy as np
+from livekit import rtc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from load_harness import SAMPLE_RATE, read_wav
+
+import providers
+from noise_filter import AdaptiveNoiseFilter
+
+FRAME_SAMPLES = SAMPLE_RATE // 20  # 50 ms
+
+_WORDS = re.compile(r"[a-z0-9']+")
+
+
+def word_errors(reference: str, hypothesis: str) -> tuple[int, int]:
+    """Word-level edit distance, and the number of reference words."""
+    ref = _WORDS.findall(reference.lower())
+    hyp = _WORDS.findall(hypothesis.lower())
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        diagonal, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            diagonal, row[j] = (
+                row[j],
+                min(row[j] + 1, row[j - 1] + 1, diagonal + (r != h)),
+            )
+    return row[-1], len(ref)
+
+
+@dataclass
+class StageResult:
+    name: str
+    audio_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    suppressed_frames: int = 0
+    frames: int = 0
+    errors: int = 0
+    words: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "stage": self.name,
+            "cpu_ms_per_audio_second": 1000 * self.cpu_seconds / self.audio_seconds,
+            "suppressed_ratio": self.suppressed_frames / self.frames,
+            "wer": self.errors / self.words if self.words else None,
+        }
+
+
+def frames_of(audio: np.ndarray) -> list[rtc.AudioFrame]:
+    return [
+        rtc.AudioFrame(
+            data=audio[i : i + FRAME_SAMPLES].tobytes(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=FRAME_SAMPLES,
+        )
+        for i in range(0, len(audio) - FRAME_SAMPLES + 1, FRAME_SAMPLES)
+    ]
+
+
+def run_stage(
+    snr_db: float | None, frames: list[rtc.AudioFrame], result: StageResult
+) -> list[rtc.AudioFrame]:
+    """Process ``frames`` with a fresh filter (None: no processing)."""
+    result.frames += len(frames)
+    result.audio_seconds += len(frames) * FRAME_SAMPLES / SAMPLE_RATE
+    if snr_db is None:
+        return frames
+    noise_filter = AdaptiveNoiseFilter(snr_db=snr_db)
+    start = time.thread_time()
+    out = [noise_filter._process(frame) for frame in frames]
+    result.cpu_seconds += time.thread_time() - start
+    result.suppressed_frames += noise_filter.stats.suppressed_frames
+    return out
+
+
+async def main(args: argparse.Namespace) -> None:
+    # None: no processing; infinity: suppression on every frame
+    stages: dict[str, float | None] = {"off": None, "suppress": math.inf}
+    for snr_db in args.snr_db:
+        stages[f"adaptive {snr_db:g} dB"] = snr_db
+    results = {name: StageResult(name) for name in stages}
+
+    async with aiohttp.ClientSession() as http_session:
+        stt = None if args.no_stt else providers.build("stt", http_session=http_session)
+        for wav in sorted(args.clips.glob("*.wav")):
+            frames = frames_of(read_wav(wav))
+            reference = wav.with_suffix(".txt").read_text()
+            for name, snr_db in stages.items():
+                processed = run_stage(snr_db, frames, results[name])
+                if stt is None:
+                    continue
+                event = await stt.recognize(processed)
+                text = event.alternatives[0].text if event.alternatives else ""
+                errors, words = word_errors(reference, text)
+                results[name].errors += errors
+                results[name].words += words
+            print(f"{wav.name} done", file=sys.stderr)
+
+    summaries = [r.summary() for r in results.values() if r.frames]
+    print(f"{'stage':<20} {'cpu ms/s':>9} {'suppressed':>11} {'WER':>7}")
+    for s in summaries:
+        wer = f"{s['wer']:.1%}" if s["wer"] is not None else "-"
+        print(
+            f"{s['stage']:<20} {s['cpu_ms_per_audio_second']:>9.2f} "
+            f"{s['suppressed_ratio']:>11.0%} {wer:>7}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(summaries, indent=2))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "clips", type=Path, help="Directory of WAV clips and reference transcripts"
+    )
+    parser.add_argument(
+        "--snr-db",
+        type=float,
+        nargs="+",
+        default=[15.0],
+        help="Adaptive thresholds to compare (NOISE_SNR_DB)",
+    )
+    parser.add_argument(
+        "--no-stt", action="store_true", help="Only measure CPU, skip transcription"
+    )
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,247 @@
+"""Replay recorded calls through the agent offline.
+
+Reads call recordings written by ``call_recorder`` (``CALL_RECORDINGS_DIR``)
+and replays each one through ``HardwareStoreAgent``: every caller turn is
+sent as text, and ``ReplayLLM`` makes the tool calls the production LLM made
+and gives its reply. The tools run for real, against the catalog and the
+local inventory stand-in, so the replay shows what the current code does
+with the same requests.
+
+For each recording it reports the replayed turn time (the caller's words to
+the agent's reply, tools included) next to the production LLM and TTS
+timings from the recording, each tool's duration, and the tool outputs that
+no longer match: a different item or store resolved, or a success that
+became an error. Inventory figures aren't compared, since the stand-in's
+stock differs from production. Calls are replayed up to a transfer to a
+human, which needs a live room.
+
+    uv run python benchmarks/replay.py /tmp/call-recordings --llm-ttft 0
+
+The exit status is 1 if any tool output changed, so the replay can run as a
+regression check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from aiohttp import web
+from aiohttp.test_utils import unused_port
+from livekit.agents import AgentSession
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from agent import HardwareStoreAgent
+from call_recorder import RecordedToolCall, read_events, recorded_turns
+from catalog import load_catalog
+from fake_providers import ReplayLLM
+from inventory import InventoryClient
+from inventory_cache import InventoryCache
+from inventory_server import create_app
+
+# Tool output fields that should be the same in production and the replay
+COMPARED_FIELDS = ("success", "item_name", "sku", "store_name", "store_id")
+# Tools that need a live room; a call is replayed up to the first of them
+LIVE_TOOLS = {"transfer_to_human"}
+
+
+def find_recordings(paths: list[Path]) -> list[Path]:
+    found = []
+    for path in paths:
+        found.extend(sorted(path.glob("*.jsonl.gz")) if path.is_dir() else [path])
+    return found
+
+
+def parse_output(output: str) -> dict[str, Any] | None:
+    """A tool output as a dict; tools return dicts, which LiveKit sends as text."""
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(output)
+        except (ValueError, SyntaxError):
+            continue
+        return value if isinstance(value, dict) else None
+    return None
+
+
+def output_changes(recorded: RecordedToolCall, output: str, is_error: bool) -> str:
+    """How the replayed output differs from the recorded one, or ""."""
+    if is_error != recorded.is_error:
+        return f"error {recorded.is_error} -> {is_error}"
+    before, after = parse_output(recorded.output), parse_output(output)
+    if before is None or after is None:
+        return "" if recorded.output == output else "output changed"
+    changes = [
+        f"{key} {before.get(key)!r} -> {after.get(key)!r}"
+        for key in COMPARED_FIELDS
+        if before.get(key) != after.get(key)
+    ]
+    return ", ".join(changes)
+
+
+def recorded_timings(events: list[dict[str, Any]]) -> dict[str, list[float]]:
+    """Production LLM time to first token and TTS time to first byte."""
+    timings: dict[str, list[float]] = {"llm_ttft": [], "tts_ttfb": []}
+    for event in events:
+        if event["event"] != "metrics":
+            continue
+        if event.get("type") == "llm_metrics" and event.get("ttft", -1) >= 0:
+            timings["llm_ttft"].append(event["ttft"])
+        elif event.get("type") == "tts_metrics" and event.get("ttfb", -1) >= 0:
+            timings["tts_ttfb"].append(event["ttfb"])
+    return timings
+
+
+def pct(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+async def replay(
+    path: Path, inventory: InventoryCache, catalog: Any, args: argparse.Namespace
+) -> dict[str, Any]:
+    events = read_events(path)
+    turns = list(recorded_turns(events))
+    for i, turn in enumerate(turns):
+        if any(call.name in LIVE_TOOLS for call in turn.tool_calls):
+            turns = turns[:i]
+            break
+
+    turn_times: list[float] = []
+    tool_times: dict[str, list[float]] = {}
+    recorded_tool_times: dict[str, list[float]] = {}
+    changes: list[str] = []
+    session = AgentSession(
+        llm=ReplayLLM(
+            turns, ttft=args.llm_ttft, tokens_per_second=args.tokens_per_second
+        )
+    )
+    try:
+        await session.start(HardwareStoreAgent(inventory=inventory, catalog=catalog))
+        for number, turn in enumerate(turns, 1):
+            start = time.perf_counter()
+            run = await session.run(user_input=turn.user_text)
+            turn_times.append(time.perf_counter() - start)
+
+            calls = {
+                ev.item.call_id: ev.item
+                for ev in run.events
+                if ev.type == "function_call"
+            }
+            outputs = [
+                ev.item for ev in run.events if ev.type == "function_call_output"
+            ]
+            for recorded, output in zip(turn.tool_calls, outputs, strict=False):
+                call = calls.get(output.call_id)
+                if call is not None:
+                    tool_times.setdefault(output.name, []).append(
+                        output.created_at - call.created_at
+                    )
+                if recorded.duration is not None:
+                    recorded_tool_times.setdefault(recorded.name, []).append(
+                        recorded.duration
+                    )
+                change = output_changes(recorded, output.output, output.is_error)
+                if change:
+                    changes.append(f"turn {number} {recorded.name}: {change}")
+            if len(outputs) != len(turn.tool_calls):
+                changes.append(
+                    f"turn {number}: {len(turn.tool_calls)} tool calls recorded, "
+                    f"{len(outputs)} replayed"
+                )
+    finally:
+        await session.aclose()
+
+    production = recorded_timings(events)
+    return {
+        "recording": path.name,
+        "turns": len(turns),
+        "turn_p50": pct(turn_times, 50),
+        "turn_p95": pct(turn_times, 95),
+        "recorded_llm_ttft_p50": pct(production["llm_ttft"], 50),
+        "recorded_tts_ttfb_p50": pct(production["tts_ttfb"], 50),
+        "tools_p50": {name: pct(times, 50) for name, times in tool_times.items()},
+        "recorded_tools_p50": {
+            name: pct(times, 50) for name, times in recorded_tool_times.items()
+        },
+        "changes": changes,
+    }
+
+
+def print_table(results: list[dict[str, Any]]) -> None:
+    print(
+        f"{'recording':<40} {'turns':>5} {'turn p50':>9} {'turn p95':>9} "
+        f"{'prod llm':>9} {'prod tts':>9} {'changed':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['recording'][:40]:<40} {r['turns']:>5} "
+            f"{r['turn_p50'] * 1000:>7.0f}ms {r['turn_p95'] * 1000:>7.0f}ms "
+            f"{r['recorded_llm_ttft_p50'] * 1000:>7.0f}ms "
+            f"{r['recorded_tts_ttfb_p50'] * 1000:>7.0f}ms {len(r['changes']):>7}"
+        )
+    print("\nMedian tool time, replayed / recorded (ms):")
+    for r in results:
+        tools = ", ".join(
+            f"{name} {value * 1000:.0f} / "
+            f"{r['recorded_tools_p50'].get(name, float('nan')) * 1000:.0f}"
+            for name, value in r["tools_p50"].items()
+        )
+        print(f"{r['recording'][:40]:<40} {tools or '-'}")
+    for r in results:
+        for change in r["changes"]:
+            print(f"CHANGED {r['recording']} {change}")
+
+
+async def main(args: argparse.Namespace) -> int:
+    recordings = find_recordings(args.recordings)
+    if not recordings:
+        print("No recordings found", file=sys.stderr)
+        return 2
+
+    runner = web.AppRunner(create_app(latency=args.inventory_latency))
+    await runner.setup()
+    port = unused_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    client = InventoryClient(f"http://127.0.0.1:{port}")
+    catalog = load_catalog()
+    results = []
+    try:
+        for path in recordings:
+            print(f"Replaying {path.name}...", file=sys.stderr)
+            inventory = InventoryCache(client)
+            results.append(await replay(path, inventory, catalog, args))
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 1 if any(r["changes"] for r in results) else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "recordings",
+        type=Path,
+        nargs="+",
+        help="Recordings (.jsonl.gz), or directories of them",
+    )
+    parser.add_argument("--llm-ttft", type=float, default=0.35)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--inventory-latency", type=float, default=0.05)
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
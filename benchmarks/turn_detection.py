@@ -0,0 +1,225 @@
+"""End-of-turn delay on recorded caller turns, VAD alone vs the turn detector.
+
+Each recording is one caller turn, a 16 kHz mono WAV with a transcript next
+to it (``turn.wav`` and ``turn.txt``). ``|`` in the transcript marks where
+the caller pauses mid-turn, so the text up to each mark is what the turn
+detector sees at that pause:
+
+    I'm looking for | the DeWalt drill | at the Oakville store.
+
+The recordings go through the Silero VAD offline. At every end of speech the
+VAD reports, each mode decides when the turn would end, the way the agent
+session does: VAD alone after ``--vad-delay`` of silence, the turn detector
+after ``--min-delay`` when it predicts the caller is done and ``--max-delay``
+otherwise (plus its inference time). The report shows, per mode, the delay
+from the end of the caller's last word to the end of the turn, and how many
+mid-turn pauses would have cut the caller off.
+
+    uv run python benchmarks/turn_detection.py recordings/ --vad-delay 0.5 0.8
+
+The turn detector needs its model downloaded (``download-files``); without it
+only the VAD rows are reported.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import vad
+from livekit.plugins import silero
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from load_harness import FRAME_SAMPLES, SAMPLE_RATE, read_wav
+
+import turn_detection
+from agent import GREETING
+
+# Silence appended to each recording so the VAD reports the final end of speech
+TRAILING_SILENCE = 2.0
+
+
+@dataclass
+class Pause:
+    """One end of speech the VAD reported."""
+
+    speech_end: float
+    detected: float
+    resumed: float | None
+    text: str
+
+
+@dataclass
+class ModeResult:
+    name: str
+    delays: list[float] = field(default_factory=list)
+    cut_offs: int = 0
+    pauses: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        delays = sorted(self.delays)
+        return {
+            "mode": self.name,
+            "turns": len(delays),
+            "delay_p50": statistics.median(delays) if delays else None,
+            "delay_p90": delays[int(0.9 * (len(delays) - 1))] if delays else None,
+            "cut_offs": self.cut_offs,
+            "pauses": self.pauses,
+        }
+
+
+async def vad_pauses(
+    vad_model: vad.VAD, audio: np.ndarray
+) -> list[tuple[float, float, float | None]]:
+    """(speech end, end of speech reported, speech resumed) for every pause."""
+    audio = np.concatenate(
+        [audio, np.zeros(int(TRAILING_SILENCE * SAMPLE_RATE), np.int16)]
+    )
+    stream = vad_model.stream()
+    for start in range(0, len(audio) - FRAME_SAMPLES + 1, FRAME_SAMPLES):
+        stream.push_frame(
+            rtc.AudioFrame(
+                data=audio[start : start + FRAME_SAMPLES].tobytes(),
+                sample_rate=SAMPLE_RATE,
+                num_channels=1,
+                samples_per_channel=FRAME_SAMPLES,
+            )
+        )
+    stream.end_input()
+
+    pauses: list[tuple[float, float, float | None]] = []
+    async for event in stream:
+        if event.type == vad.VADEventType.END_OF_SPEECH:
+            speech_end = event.timestamp - event.silence_duration
+            pauses.append((speech_end, event.timestamp, None))
+        elif event.type == vad.VADEventType.START_OF_SPEECH and pauses:
+            end, detected, _ = pauses[-1]
+            pauses[-1] = (end, detected, event.timestamp - event.speech_duration)
+    await stream.aclose()
+    return pauses
+
+
+class TurnDetector:
+    """The turn detector's inference runner, in this process."""
+
+    def __init__(self) -> None:
+        from huggingface_hub import try_to_load_from_cache
+        from livekit.plugins.turn_detector.models import HG_MODEL, MODEL_REVISIONS
+        from livekit.plugins.turn_detector.multilingual import _EUORunnerMultilingual
+
+        self._runner = _EUORunnerMultilingual()
+        self._runner.initialize()
+        languages = try_to_load_from_cache(
+            HG_MODEL,
+            "languages.json",
+            revision=MODEL_REVISIONS[turn_detection.MODEL_TYPE],
+        )
+        self.threshold = json.loads(Path(languages).read_text())["en"]["threshold"]
+
+    def predict(self, text: str) -> tuple[float, float]:
+        """End-of-turn probability after ``text``, and the inference time."""
+        request = {
+            "chat_ctx": [
+                {"role": "assistant", "content": GREETING},
+                {"role": "user", "content": text},
+            ]
+        }
+        start = time.perf_counter()
+        result = json.loads(self._runner.run(json.dumps(request).encode()))
+        return result["eou_probability"], time.perf_counter() - start
+
+
+def score(result: ModeResult, pauses: list[Pause], delays: list[float]) -> None:
+    """Count where the turn ends given each pause's endpointing delay."""
+    for i, (pause, delay) in enumerate(zip(pauses, delays)):
+        turn_end = max(pause.detected, pause.speech_end + delay)
+        if i == len(pauses) - 1:
+            result.delays.append(turn_end - pause.speech_end)
+        else:
+            result.pauses += 1
+            if pause.resumed is None or turn_end < pause.resumed:
+                result.cut_offs += 1
+
+
+async def main(args: argparse.Namespace) -> None:
+    vad_model = silero.VAD.load()
+    detector = TurnDetector() if all(turn_detection.model_files().values()) else None
+    if detector is None:
+        print("Turn detector model not downloaded, VAD only", file=sys.stderr)
+
+    results = [ModeResult(f"vad {delay:.2f}s") for delay in args.vad_delay]
+    detector_result = ModeResult(
+        f"turn detector {args.min_delay:.2f}-{args.max_delay:.2f}s"
+    )
+    for wav in sorted(args.recordings.glob("*.wav")):
+        segments = [s.strip() for s in wav.with_suffix(".txt").read_text().split("|")]
+        raw = await vad_pauses(vad_model, read_wav(wav))
+        if len(raw) != len(segments):
+            print(
+                f"Skipping {wav.name}: {len(raw)} pauses detected, "
+                f"{len(segments)} in the transcript",
+                file=sys.stderr,
+            )
+            continue
+        pauses = [
+            Pause(end, detected, resumed, " ".join(segments[: i + 1]))
+            for i, (end, detected, resumed) in enumerate(raw)
+        ]
+
+        for result, delay in zip(results, args.vad_delay):
+            score(result, pauses, [delay] * len(pauses))
+        if detector is not None:
+            delays = []
+            for pause in pauses:
+                probability, inference = detector.predict(pause.text)
+                likely_done = probability >= detector.threshold
+                delays.append(
+                    (args.min_delay if likely_done else args.max_delay) + inference
+                )
+            score(detector_result, pauses, delays)
+
+    if detector is not None:
+        results.append(detector_result)
+    summaries = [r.summary() for r in results]
+    print(f"{'mode':<28} {'turns':>5} {'p50 ms':>7} {'p90 ms':>7} {'cut off':>9}")
+    for s in summaries:
+        p50 = f"{s['delay_p50'] * 1000:.0f}" if s["delay_p50"] is not None else "-"
+        p90 = f"{s['delay_p90'] * 1000:.0f}" if s["delay_p90"] is not None else "-"
+        print(
+            f"{s['mode']:<28} {s['turns']:>5} {p50:>7} {p90:>7} "
+            f"{s['cut_offs']:>4}/{s['pauses']:<4}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(summaries, indent=2))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "recordings", type=Path, help="Directory of WAV recordings and transcripts"
+    )
+    parser.add_argument(
+        "--vad-delay",
+        type=float,
+        nargs="+",
+        default=[0.5],
+        help="Silence (seconds) that ends a turn with VAD alone; several to compare",
+    )
+    parser.add_argument("--min-delay", type=float, default=0.5)
+    parser.add_argument("--max-delay", type=float, default=3.0)
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
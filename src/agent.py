@@ -1,91 +1,110 @@
+import asyncio
+import functools
 import logging
 import os
+import sys
+import threading
+from collections.abc import AsyncIterable
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 
+import aiohttp
 from dotenv import load_dotenv
 from livekit import rtc
 from livekit.agents import (
     Agent,
     AgentSession,
+    AudioConfig,
+    BackgroundAudioPlayer,
+    BuiltinAudioClip,
+    ConversationItemAddedEvent,
+    FunctionToolsExecutedEvent,
     JobContext,
+    JobExecutorType,
     JobProcess,
+    MetricsCollectedEvent,
+    ModelSettings,
     RunContext,
+    UserInputTranscribedEvent,
     WorkerOptions,
     WorkerType,
     cli,
     function_tool,
+    get_job_context,
+    llm,
     room_io,
 )
 from livekit.agents.llm import ToolError
-from livekit.plugins import cartesia, deepgram, google, noise_cancellation, silero
+
+import failover
+import noise_filter
+import providers
+import turn_detection
+import worker_load
+from call_recorder import CallRecorder
+from caller_memory import CallerMemory, CallerProfile, CallerSession
+from catalog import CatalogIndex
+from chat_summary import ChatSummarizer, split_context
+from failover import provider_stats
+from fast_path import FastPath
+from inventory import InventoryBackend, InventoryClient, InventoryError, lookup_many
+from inventory_cache import CacheStats, InventoryCache
+from noise_filter import AdaptiveNoiseFilter, NoiseFilterStats
+from phrase_audio import PhraseAudioCache
+from prefetch import PrefetchStats, SpeculativePrefetcher
+from prompt_cache import GeminiCacheBackend, PromptCache, PromptCacheStats
+from shared_models import job_executor, shared_catalog, shared_vad
+from spoken_numbers import is_english, spoken_stream
+from startup_profile import StartupProfile, profile_startup
+from stores import load_stores
+from telemetry import (
+    Registry,
+    TurnTimer,
+    job_memory,
+    registry,
+    serve_on_worker_http_server,
+    timed_tool,
+)
+from transfer import (
+    LiveKitSipDialer,
+    NoSupervisorAnsweredError,
+    SupervisorPool,
+    warm_transfer,
+)
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
-# Store location data - single source of truth for all locations
-STORE_LOCATIONS = {
-    "oakville": {
-        "id": "8c5dc6ab-a958-4b1d-be32-5b38bdb21b80",
-        "name": "Oakville",
-        "hours": {
-            "Monday - Saturday": "8:00 AM to 9:00 PM",
-            "Sunday": "10:00 AM to 6:00 PM",
-        },
-        "departments": ["Sales", "Customer Service", "Tool Rental", "Contractor Desk"],
-    },
-    "burnaby": {
-        "id": "d8e8f8f8-3d3d-4c4c-8c8c-8c8c8c8c8c8c",
-        "name": "Burnaby",
-        "hours": {
-            "Monday - Friday": "7:30 AM to 9:00 PM",
-            "Saturday": "8:00 AM to 8:00 PM",
-            "Sunday": "10:00 AM to 5:00 PM",
-        },
-        "departments": ["Sales", "Customer Service", "Pro Desk"],
-    },
-    "halifax": {
-        "id": "123e4567-e89b-12d3-a456-426614174000",
-        "name": "Halifax",
-        "hours": {
-            "Monday - Saturday": "8:00 AM to 10:00 PM",
-            "Sunday": "9:00 AM to 7:00 PM",
-        },
-        "departments": ["Sales", "Customer Service", "Tool Rental", "Garden Center"],
-    },
-}
-
-LOCATION_NAMES = "Oakville, Burnaby, or Halifax"
-
-HARDWARE_STORE_INSTRUCTIONS = """You are a friendly and efficient virtual receptionist for Builder's Hub Hardware. Your primary role is to answer incoming calls, determine the caller's needs, and provide assistance using the tools and information available to you.
+# Store locations, loaded from src/data/stores.json (or STORES_PATH)
+STORE_LOCATIONS = load_stores()
+
+LOCATION_NAMES = STORE_LOCATIONS.names()
+
+# Per-store deadline (seconds) when checking several locations at once
+STORE_DEADLINE = float(os.getenv("INVENTORY_STORE_DEADLINE", "1.5"))
+# Most stores check_other_locations checks without the caller naming them
+MAX_STORES_PER_CHECK = 10
+
+HARDWARE_STORE_INSTRUCTIONS = f"""You are a friendly and efficient virtual receptionist for Builder's Hub Hardware. Your primary role is to answer incoming calls, determine the caller's needs, and provide assistance using the tools and information available to you.
 
 Since this phone number serves multiple store locations, your absolute first step is to always clarify which location the caller is interested in before proceeding. Your main tasks are to check product inventory and provide store information when necessary.
 
 ## Rules & Constraints
 
 - **Respond in the caller's language.** If the caller speaks to you in a language other than English, respond in that same language. You are a multilingual assistant and should match the caller's preferred language throughout the conversation.
-- **Always identify the location first.** Before any other action, you must determine the caller's desired store location. Ask: "Which of our locations can I help you with today: Oakville, Burnaby, or Halifax?"
+- **Always identify the location first.** Before any other action, you must determine the caller's desired store location. Ask: "{STORE_LOCATIONS.location_question()}"
+- **Returning callers.** If the greeting asked a returning caller to confirm their usual store and they agree, that store is their location; don't ask again.
 - **Use the inventory_check tool correctly.** If a caller asks about product availability for a specific item, you MUST use this tool. You must first get the item name and the caller's chosen store location.
-- **Be precise with tool results.** When the tool returns inventory status, relay that information clearly. If an item is out of stock at the selected location, offer to check other locations.
+- **Be precise with tool results.** When the tool returns inventory status, relay that information clearly. If an item is out of stock at the selected location, offer to check other locations, and use the check_other_locations tool to check them all at once.
 - **Do not guess or hallucinate.** If you do not have the information or a tool to find it, state that you are unable to help with that specific request.
 - **Maintain a conversational flow.** Keep your responses concise. Wait for the caller to finish speaking before you respond.
-- **Format for Natural Speech.** When relaying information like prices or quantities from the inventory tool, format it to be spoken naturally. For example, a price of "$6.50" should be stated as "six dollars and fifty cents," and a quantity of "1200" should be read as "twelve hundred."
+- **Numbers.** In English, give prices, quantities, aisle numbers and times exactly as the tools return them (for example "$6.50", "1200", "Aisle 12", "8:00 AM"); they are read out as words for you. In any other language, write them out as words in that language, the way they should be spoken.
 
 ## Store Locations
 
-Here are our store locations and their details:
-
-### Oakville
-- Hours: Monday - Saturday: 8:00 AM to 9:00 PM, Sunday: 10:00 AM to 6:00 PM
-- Departments: Sales, Customer Service, Tool Rental, Contractor Desk
-
-### Burnaby
-- Hours: Monday - Friday: 7:30 AM to 9:00 PM, Saturday: 8:00 AM to 8:00 PM, Sunday: 10:00 AM to 5:00 PM
-- Departments: Sales, Customer Service, Pro Desk
-
-### Halifax
-- Hours: Monday - Saturday: 8:00 AM to 10:00 PM, Sunday: 9:00 AM to 7:00 PM
-- Departments: Sales, Customer Service, Tool Rental, Garden Center
+{STORE_LOCATIONS.prompt_section()} Use the get_store_hours and get_store_departments tools when the caller asks about a location's hours or departments.
 
 ## Personality & Tone
 
@@ -93,25 +112,155 @@ Your persona should be professional, patient, and consistently helpful. Use a cl
 """
 
 
+# Fixed utterances, played from pre-rendered audio when available
+GREETING = "Welcome to Builder's Hub Hardware, how can I help you today?"
+HOLD_MESSAGE = "Please hold while I connect you to a team member."
+CONNECTED_MESSAGE = (
+    "You are now connected with one of our team members. "
+    "I'll leave you with them. Have a great day!"
+)
+RETURNING_GREETING = (
+    "Welcome back to Builder's Hub Hardware. "
+    "Are you calling about our {store} store again?"
+)
+FIXED_PHRASES = [
+    GREETING,
+    HOLD_MESSAGE,
+    CONNECTED_MESSAGE,
+    *(RETURNING_GREETING.format(store=store["name"]) for store in STORE_LOCATIONS),
+]
+
+# Seconds the greeting waits for a returning caller's profile
+CALLER_LOOKUP_TIMEOUT = 1.0
+
+# Seconds the call summary in a supervisor's briefing may take to write
+BRIEFING_SUMMARY_TIMEOUT = 4.0
+
+
 def get_store_by_name(location_name: str) -> dict[str, Any] | None:
-    """Look up a store by name (case-insensitive)."""
-    return STORE_LOCATIONS.get(location_name.lower())
+    """Look up a store by name or alias, tolerating filler words and misspellings."""
+    return STORE_LOCATIONS.get(location_name)
 
 
 class HardwareStoreAgent(Agent):
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        inventory: InventoryBackend | None = None,
+        catalog: CatalogIndex | None = None,
+        phrases: PhraseAudioCache | None = None,
+        summarizer: ChatSummarizer | None = None,
+        prompt_cache: PromptCache | None = None,
+        fast_path: FastPath | None = None,
+        caller: CallerSession | None = None,
+    ) -> None:
         super().__init__(
             instructions=HARDWARE_STORE_INSTRUCTIONS,
         )
+        self._inventory = (
+            inventory if inventory is not None else InventoryClient.from_env()
+        )
+        self._catalog = catalog
+        self._phrases = phrases
+        self._summarizer = summarizer
+        self._prompt_cache = prompt_cache
+        self._fast_path = fast_path
+        self._caller = caller
+        self._caller_speaks_english = True
+
+    async def _say_fixed(self, text: str, *, allow_interruptions: bool) -> None:
+        """Speak one of the FIXED_PHRASES, from pre-rendered audio if possible."""
+        if self._phrases is None:
+            await self.session.say(text, allow_interruptions=allow_interruptions)
+        else:
+            await self._phrases.say(
+                self.session, text, allow_interruptions=allow_interruptions
+            )
 
     async def on_enter(self) -> None:
-        """Called when the agent first enters the session. Greet the caller."""
-        await self.session.say(
-            "Welcome to Builder's Hub Hardware, how can I help you today?",
-            allow_interruptions=True,
+        """Called when the agent first enters the session. Greet the caller.
+
+        A returning caller is asked to confirm their usual store instead.
+        """
+        greeting = GREETING
+        if self._caller is not None:
+            profile = await self._caller.wait_profile(CALLER_LOOKUP_TIMEOUT)
+            store = (
+                STORE_LOCATIONS.by_id(profile.store_id)
+                if profile is not None and profile.store_id
+                else None
+            )
+            if store is not None:
+                await self._note_returning_caller(profile, store)
+                greeting = RETURNING_GREETING.format(store=store["name"])
+        await self._say_fixed(greeting, allow_interruptions=True)
+
+    async def _note_returning_caller(
+        self, profile: CallerProfile, store: dict[str, Any]
+    ) -> None:
+        """Tell the LLM what we remember, next to the instructions."""
+        note = (
+            f"This is a returning caller, usually calling about the {store['name']} "
+            "store. The greeting asks them to confirm it."
         )
+        if profile.recent_items:
+            items = ", ".join(profile.recent_items)
+            note += f" Items they asked about recently: {items}."
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.add_message(role="system", content=note)
+        await self.update_chat_ctx(chat_ctx)
+
+    async def on_user_turn_completed(
+        self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage
+    ) -> None:
+        """Keep the chat context bounded on long calls, off the response path.
+
+        Also notes whether the caller speaks English, for ``tts_node``; turns
+        too short to tell ("Oui", "Oakville") keep the last answer.
+        """
+        english = is_english(new_message.text_content or "")
+        if english is not None:
+            self._caller_speaks_english = english
+        if self._summarizer is not None:
+            self._summarizer.schedule(self)
+
+    async def llm_node(
+        self,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.FunctionTool | llm.RawFunctionTool],
+        model_settings: ModelSettings,
+    ) -> AsyncIterable[llm.ChatChunk | str]:
+        """Answer simple store questions directly, otherwise call the LLM.
+
+        The instructions and tools are sent as a cached context when enabled.
+        """
+        if self._fast_path is not None:
+            answer = self._fast_path.answer(chat_ctx)
+            if answer is not None:
+                yield answer
+                return
+
+        if self._prompt_cache is None:
+            nodes = Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+        else:
+            nodes = self._prompt_cache.llm_node(self, chat_ctx, tools, model_settings)
+        async for chunk in nodes:
+            yield chunk
+
+    async def tts_node(
+        self, text: AsyncIterable[str], model_settings: ModelSettings
+    ) -> AsyncIterable[rtc.AudioFrame]:
+        """Speak prices, quantities and times as words, as the reply streams in.
+
+        Only English replies are rewritten; in other languages the LLM writes
+        numbers as words itself.
+        """
+        if self._caller_speaks_english:
+            text = spoken_stream(text)
+        async for frame in Agent.default.tts_node(self, text, model_settings):
+            yield frame
 
     @function_tool()
+    @timed_tool
     async def transfer_to_human(
         self,
         context: RunContext,
@@ -123,19 +272,17 @@ class HardwareStoreAgent(Agent):
         Args:
             reason: Brief explanation of why the transfer is needed
         """
-        from livekit.agents.beta.workflows import WarmTransferTask
-
         logger.info(f"Initiating warm transfer: {reason}")
 
         # Get transfer configuration from environment
-        supervisor_phone = os.getenv("SUPERVISOR_PHONE_NUMBER")
+        pool = SupervisorPool.from_env()
         sip_trunk_id = os.getenv("LIVEKIT_SIP_OUTBOUND_TRUNK") or os.getenv(
             "SIP_OUTBOUND_TRUNK_ID"
         )
 
-        if not supervisor_phone:
+        if pool is None:
             logger.error(
-                "Cannot initiate warm transfer: SUPERVISOR_PHONE_NUMBER not configured"
+                "Cannot initiate warm transfer: SUPERVISOR_PHONE_NUMBERS not configured"
             )
             raise ToolError(
                 "I'm sorry, I'm unable to connect you with a team member right now. "
@@ -152,34 +299,37 @@ class HardwareStoreAgent(Agent):
                 "Please call back or visit us in store."
             )
 
-        await self.session.say(
-            "Please hold while I connect you to a team member.",
-            allow_interruptions=False,
+        job_ctx = get_job_context()
+        dialer = LiveKitSipDialer(
+            job_ctx.api,
+            caller_room=job_ctx.room.name,
+            sip_trunk_id=sip_trunk_id,
+            tts=self.session.tts,
         )
 
         try:
-            result = await WarmTransferTask(
-                target_phone_number=supervisor_phone,
-                sip_trunk_id=sip_trunk_id,
-                chat_ctx=self.chat_ctx,
-                extra_instructions=(
-                    f"Transfer reason: {reason}\n\n"
-                    "Please assist this customer with extra care and patience. "
-                    "The customer may need human support."
-                ),
+            # Supervisors' phones ring while the caller hears the hold message
+            number, identity = await warm_transfer(
+                pool,
+                dialer,
+                hold=self._say_fixed(HOLD_MESSAGE, allow_interruptions=False),
+                briefing=self._transfer_briefing(reason),
+                hold_music=self._play_hold_music,
             )
             logger.info(
                 "Warm transfer completed successfully",
-                extra={"supervisor_identity": result.human_agent_identity},
+                extra={"supervisor_identity": identity, "supervisor_number": number},
             )
 
-            await self.session.say(
-                "You are now connected with one of our team members. "
-                "I'll leave you with them. Have a great day!",
-                allow_interruptions=False,
-            )
+            await self._say_fixed(CONNECTED_MESSAGE, allow_interruptions=False)
             self.session.shutdown()
 
+        except NoSupervisorAnsweredError as e:
+            logger.error(f"Warm transfer failed: {e}")
+            raise ToolError(
+                "I'm sorry, no team member is available right now. "
+                "Please call back or visit us in store."
+            ) from e
         except ToolError as e:
             logger.error(f"Warm transfer failed with tool error: {e}")
             raise e
@@ -190,7 +340,65 @@ class HardwareStoreAgent(Agent):
                 "Please call back in a few minutes or visit us in store."
             ) from e
 
+    async def _play_hold_music(self) -> None:
+        """Loop hold music in the caller's room until cancelled."""
+        player = BackgroundAudioPlayer()
+        await player.start(room=get_job_context().room, agent_session=self.session)
+        try:
+            await player.play(
+                AudioConfig(BuiltinAudioClip.HOLD_MUSIC, volume=0.8), loop=True
+            )
+        finally:
+            await player.aclose()
+
+    async def _transfer_briefing(self, reason: str) -> str:
+        """What the supervisor hears before joining: the reason and a call summary."""
+        briefing = f"Transfer reason: {reason}."
+        if self._summarizer is None:
+            return briefing
+        summary, items = split_context(self.chat_ctx, keep_turns=0)
+        if items:
+            try:
+                summary = await asyncio.wait_for(
+                    self._summarizer.summarize(summary, items),
+                    BRIEFING_SUMMARY_TIMEOUT,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Could not summarize the call for the supervisor: {e!r}"
+                )
+        return f"{briefing} {summary}" if summary else briefing
+
+    def _resolve_item(
+        self, item_name: str
+    ) -> tuple[str, str | None, dict[str, Any] | None]:
+        """Resolve what the caller said to a catalog product.
+
+        Returns the product name and SKU to look up, or a clarification result
+        listing candidates when the item is ambiguous. Items the catalog does
+        not know are passed through unchanged.
+        """
+        if self._catalog is None:
+            return item_name, None, None
+        resolution = self._catalog.resolve(item_name)
+        if resolution.match is not None:
+            return resolution.match.name, resolution.match.sku, None
+        if resolution.candidates:
+            return (
+                item_name,
+                None,
+                {
+                    "success": False,
+                    "needs_clarification": True,
+                    "candidates": [c.name for c in resolution.candidates],
+                    "message": "Ask the caller which of these products they mean, "
+                    "then check again using that exact product name.",
+                },
+            )
+        return item_name, None, None
+
     @function_tool()
+    @timed_tool
     async def inventory_check(
         self,
         context: RunContext,
@@ -201,7 +409,7 @@ class HardwareStoreAgent(Agent):
 
         Args:
             item_name: The name of the product the user is asking about (e.g., "pressure-treated 2x4s", "DeWalt 20V MAX cordless drill")
-            store_location: The store location name (Oakville, Burnaby, or Halifax)
+            store_location: The store location name, as the caller said it
         """
         logger.info(f"Checking inventory for '{item_name}' at {store_location}")
 
@@ -212,21 +420,114 @@ class HardwareStoreAgent(Agent):
                 "error": f"Unknown store location: {store_location}. Valid locations are: {LOCATION_NAMES}",
             }
 
-        # TODO: Replace with actual inventory API call
-        # For now, return mock data
-        # In production, this would call an external inventory service
+        item_name, sku, clarification = self._resolve_item(item_name)
+        if clarification:
+            return clarification
+
+        if self._caller is not None:
+            self._caller.note_store(store["id"])
+            self._caller.note_item(item_name)
+
+        try:
+            record = await self._inventory.lookup(store["id"], item_name)
+        except InventoryError as e:
+            logger.warning(f"Inventory lookup failed for '{item_name}': {e}")
+            return {
+                "success": False,
+                "error": "The inventory system is not responding right now. "
+                "Offer to transfer the caller or suggest they try again shortly.",
+            }
+
         return {
             "success": True,
             "item_name": item_name,
+            "sku": sku,
             "store_name": store["name"],
             "store_id": store["id"],
-            "in_stock": True,
-            "quantity": 150,
-            "price": "$4.97",
-            "aisle": "Building Materials, Aisle 12",
+            "in_stock": record["in_stock"],
+            "quantity": record["quantity"],
+            "price": record["price"],
+            "aisle": record["aisle"],
         }
 
     @function_tool()
+    @timed_tool
+    async def check_other_locations(
+        self,
+        context: RunContext,
+        item_name: str,
+        store_locations: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Check if an item is in stock at several store locations at once. Use this
+        when an item is out of stock at the caller's store, or when the caller asks
+        where else they can get it.
+
+        Args:
+            item_name: The name of the product the user is asking about
+            store_locations: The store location names to check. Leave empty to check every location.
+        """
+        logger.info(f"Checking inventory for '{item_name}' at other locations")
+
+        if store_locations:
+            stores = [get_store_by_name(name) for name in store_locations]
+            unknown = [
+                name
+                for name, store in zip(store_locations, stores, strict=True)
+                if store is None
+            ]
+            if unknown:
+                return {
+                    "success": False,
+                    "error": f"Unknown store location: {', '.join(unknown)}. Valid locations are: {LOCATION_NAMES}",
+                }
+        elif len(STORE_LOCATIONS) > MAX_STORES_PER_CHECK:
+            return {
+                "success": False,
+                "error": "There are too many locations to check them all. "
+                "Ask the caller which nearby locations to check.",
+            }
+        else:
+            stores = list(STORE_LOCATIONS)
+
+        item_name, sku, clarification = self._resolve_item(item_name)
+        if clarification:
+            return clarification
+
+        if self._caller is not None:
+            self._caller.note_item(item_name)
+
+        stores_by_id = {store["id"]: store for store in stores if store}
+        records, unavailable = await lookup_many(
+            self._inventory, list(stores_by_id), item_name, deadline=STORE_DEADLINE
+        )
+        if not records:
+            return {
+                "success": False,
+                "error": "The inventory system is not responding right now. "
+                "Offer to transfer the caller or suggest they try again shortly.",
+            }
+
+        return {
+            "success": True,
+            "item_name": item_name,
+            "sku": sku,
+            "locations": [
+                {
+                    "store_name": stores_by_id[store_id]["name"],
+                    "in_stock": record["in_stock"],
+                    "quantity": record["quantity"],
+                    "price": record["price"],
+                    "aisle": record["aisle"],
+                }
+                for store_id, record in records.items()
+            ],
+            "unavailable_locations": [
+                stores_by_id[store_id]["name"] for store_id in unavailable
+            ],
+        }
+
+    @function_tool()
+    @timed_tool
     async def get_store_hours(
         self,
         context: RunContext,
@@ -235,7 +536,7 @@ class HardwareStoreAgent(Agent):
         """Get the operating hours for a specific store location.
 
         Args:
-            store_location: The store location name (Oakville, Burnaby, or Halifax)
+            store_location: The store location name, as the caller said it
         """
         logger.info(f"Getting hours for {store_location}")
 
@@ -246,6 +547,9 @@ class HardwareStoreAgent(Agent):
                 "error": f"Unknown store location: {store_location}. Valid locations are: {LOCATION_NAMES}",
             }
 
+        if self._caller is not None:
+            self._caller.note_store(store["id"])
+
         return {
             "success": True,
             "store_name": store["name"],
@@ -253,6 +557,7 @@ class HardwareStoreAgent(Agent):
         }
 
     @function_tool()
+    @timed_tool
     async def get_store_departments(
         self,
         context: RunContext,
@@ -261,7 +566,7 @@ class HardwareStoreAgent(Agent):
         """Get the available departments at a specific store location.
 
         Args:
-            store_location: The store location name (Oakville, Burnaby, or Halifax)
+            store_location: The store location name, as the caller said it
         """
         logger.info(f"Getting departments for {store_location}")
 
@@ -272,6 +577,9 @@ class HardwareStoreAgent(Agent):
                 "error": f"Unknown store location: {store_location}. Valid locations are: {LOCATION_NAMES}",
             }
 
+        if self._caller is not None:
+            self._caller.note_store(store["id"])
+
         return {
             "success": True,
             "store_name": store["name"],
@@ -279,17 +587,154 @@ class HardwareStoreAgent(Agent):
         }
 
 
+@dataclass
+class ProcessStats:
+    """Counters of every call in this process, exported to ``/metrics`` once.
+
+    With ``JOB_EXECUTOR=thread`` ``prewarm`` runs once per job executor, and
+    each executor's inventory and prompt caches add to the same counters.
+    """
+
+    inventory_cache: CacheStats = field(default_factory=CacheStats)
+    prefetch: PrefetchStats = field(default_factory=PrefetchStats)
+    noise_filter: NoiseFilterStats = field(default_factory=NoiseFilterStats)
+    prompt_cache: PromptCacheStats = field(default_factory=PromptCacheStats)
+
+    def collect(self, metrics: Registry) -> None:
+        for prefix, stats in vars(self).items():
+            for name, value in vars(stats).items():
+                metrics.set_counter(f"agent_{prefix}_{name}_total", value)
+
+
+_stats_lock = threading.Lock()
+_process_stats: ProcessStats | None = None
+
+
+def process_stats() -> ProcessStats:
+    global _process_stats
+    with _stats_lock:
+        if _process_stats is None:
+            _process_stats = ProcessStats()
+            registry.add_collector(_process_stats.collect)
+            # Latency and health of each provider, for ordering fallbacks
+            registry.add_collector(provider_stats.collect)
+        return _process_stats
+
+
 def prewarm(proc: JobProcess):
     """Prewarm function - loads models when worker starts."""
-    # Load VAD model
-    proc.userdata["vad"] = silero.VAD.load()
+    # Timed per run: with the thread executor prewarm runs once per executor
+    startup = StartupProfile()
+    proc.userdata["startup_profile"] = startup
+    stats = process_stats()
+
+    # Import the VAD, noise cancellation and configured STT/LLM/TTS plugins
+    with startup.stage("prewarm.imports"):
+        providers.import_configured()
+
+    # Load VAD model, once per process even when jobs run as threads
+    with startup.stage("prewarm.vad"):
+        proc.userdata["vad"] = shared_vad()
     logger.info("[Prewarm] VAD model loaded")
 
+    # The turn detector's weights live in the worker's inference process;
+    # each job only checks they were downloaded
+    with startup.stage("prewarm.turn_detector"):
+        use_turn_detector = turn_detection.enabled()
+        if use_turn_detector:
+            turn_detection.import_plugin()
+    proc.userdata["turn_detector"] = use_turn_detector
+    logger.info(
+        f"[Prewarm] Turns end on {'the turn detector' if use_turn_detector else 'VAD silence'}"
+    )
+
+    # LiveKit runs each job process for a single call, so the client and the
+    # cache's in-memory entries last one call; the cache's SQLite tier keeps
+    # popular items across the worker's calls
+    with startup.stage("prewarm.inventory"):
+        inventory_client = InventoryClient.from_env()
+        inventory = InventoryCache.from_env(
+            inventory_client, stats=stats.inventory_cache
+        )
+    proc.userdata["inventory_client"] = inventory_client
+    proc.userdata["inventory"] = inventory
+    logger.info("[Prewarm] Inventory client and cache created")
+
+    # Hit and waste counts of every call's speculative inventory lookups
+    proc.userdata["prefetch_stats"] = stats.prefetch
+
+    # Audio-processing CPU of every call's adaptive noise filter
+    proc.userdata["noise_filter_stats"] = stats.noise_filter
+
+    # Gemini cached context for the instructions and tool schemas, shared by
+    # every call of this worker through a state file
+    if prompt_caching_enabled():
+        proc.userdata["prompt_cache"] = PromptCache.from_env(
+            GeminiCacheBackend.from_env(), stats=stats.prompt_cache
+        )
+        logger.info("[Prewarm] Prompt cache enabled")
+
+    # Returning callers' usual store and recent items, in a SQLite file shared
+    # by the worker's processes
+    if os.getenv("CALLER_MEMORY", "1") != "0":
+        proc.userdata["caller_memory"] = CallerMemory.from_env()
+
+    # Product catalog index for resolving spoken item names
+    with startup.stage("prewarm.catalog"):
+        proc.userdata["catalog"] = shared_catalog()
+    logger.info("[Prewarm] Catalog index loaded")
+
+    # Map pre-rendered greeting and transfer audio so the first call can use it
+    with startup.stage("prewarm.phrases"):
+        phrases = PhraseAudioCache(providers.voice_id())
+        rendered = sum(phrases.get(text) is not None for text in FIXED_PHRASES)
+    proc.userdata["phrases"] = phrases
+    logger.info(f"[Prewarm] {rendered}/{len(FIXED_PHRASES)} fixed phrases pre-rendered")
+
+    logger.info(
+        f"[Prewarm] Done in {startup.total('prewarm.'):.2f}s "
+        f"({startup.summary('prewarm.')})"
+    )
+
+
+def prompt_caching_enabled() -> bool:
+    """Prompt caching is on for Gemini unless ``PROMPT_CACHE=0``.
+
+    Requests naming a Gemini cache can't be hedged to another provider, so
+    it is off when an LLM fallback is configured.
+    """
+    return (
+        os.getenv("PROMPT_CACHE", "1") != "0"
+        and providers.candidates("llm") == ["google"]
+        and providers.has_api_key("llm")
+    )
+
+
+async def render_fixed_phrases() -> None:
+    """Render FIXED_PHRASES ahead of time, as part of ``download-files``."""
+    if not providers.has_api_key("tts"):
+        logger.info("No TTS API key set, fixed phrases will be rendered on first use")
+        return
+    async with aiohttp.ClientSession() as http_session:
+        engine = providers.build("tts", http_session=http_session)
+        await PhraseAudioCache(providers.voice_id()).render_all(engine, FIXED_PHRASES)
+
 
 # Use hardware-store-dev for local testing, hardware-store for production
 AGENT_NAME = os.getenv("AGENT_NAME", "hardware-store")
 
 
+@functools.cache
+def noise_cancellation_filters() -> tuple[Any, Any]:
+    """Telephony and default noise cancellation settings, created once.
+
+    The filters themselves run inside the LiveKit FFI.
+    """
+    from livekit.plugins import noise_cancellation
+
+    return noise_cancellation.BVCTelephony(), noise_cancellation.BVC()
+
+
 async def entrypoint(ctx: JobContext):
     """Main entrypoint for the agent worker."""
     # Logging setup
@@ -297,24 +742,177 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
-    # Set up a voice AI pipeline for the hardware store agent
+    # Open the inventory connection now so the first lookup doesn't pay for it
+    inventory_client: InventoryClient = ctx.proc.userdata["inventory_client"]
+    inventory: InventoryCache = ctx.proc.userdata["inventory"]
+    warmup_task = asyncio.create_task(inventory_client.warmup())
+
+    async def close_inventory_cache() -> None:
+        await inventory.aclose()
+        logger.info(
+            "Inventory cache stats",
+            extra={"entries": len(inventory), **inventory.stats.as_dict()},
+        )
+
+    ctx.add_shutdown_callback(close_inventory_cache)
+
+    # Per-turn latency histograms, exported on the worker's /metrics endpoint
+    registry.start_flushing()
+
+    async def flush_metrics() -> None:
+        registry.flush()
+
+    ctx.add_shutdown_callback(flush_metrics)
+
+    # Memory per job; several jobs share a process with the thread executor
+    job_memory.job_started()
+
+    async def log_job_memory() -> None:
+        logger.info("Job memory", extra=job_memory.sample())
+        job_memory.job_finished()
+
+    ctx.add_shutdown_callback(log_job_memory)
+
+    # Order fallback providers by the latency other calls have seen
+    provider_stats.load()
+
+    async def save_provider_stats() -> None:
+        provider_stats.save()
+
+    ctx.add_shutdown_callback(save_provider_stats)
+
+    # Set up a voice AI pipeline for the hardware store agent. Stages with a
+    # *_FALLBACK_PROVIDER fail over (STT) or hedge (LLM, TTS) to it
     session = AgentSession(
-        # Speech-to-text (STT) using Deepgram Nova-3 for reliable English transcription
-        stt=deepgram.STT(model="nova-3", language="en"),
-        # Large Language Model (LLM) for processing user input and generating responses
-        llm=google.LLM(model="gemini-2.5-flash"),
-        # Text-to-speech (TTS) using Cartesia plugin directly
-        tts=cartesia.TTS(model="sonic-3", voice="9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"),
-        # Using VAD-only turn detection since MultilingualModel files don't persist
-        # in Cerebrium's runtime filesystem (Cerebrium overwrites the Docker image at runtime)
-        turn_detection="vad",
+        # Speech-to-text (STT), Deepgram Nova-3 by default (STT_PROVIDER)
+        stt=failover.build("stt", vad=ctx.proc.userdata["vad"]),
+        # Large Language Model (LLM), Gemini 2.5 Flash by default (LLM_PROVIDER)
+        llm=failover.build("llm"),
+        # Text-to-speech (TTS), Cartesia Sonic 3 by default (TTS_PROVIDER)
+        tts=failover.build("tts"),
+        # Multilingual turn detector from /opt/models, or VAD silence without it
+        turn_detection=turn_detection.build()
+        if ctx.proc.userdata["turn_detector"]
+        else "vad",
         vad=ctx.proc.userdata["vad"],
         # Allow preemptive generation for faster responses
         preemptive_generation=True,
     )
 
+    turn_timer = TurnTimer()
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent) -> None:
+        turn_timer.on_metrics(ev.metrics)
+
+    # Transcripts, tool calls and stage timings of the call, written to disk
+    # by a background thread for benchmarks/replay.py
+    if os.getenv("CALL_RECORDING", "1") != "0":
+        recorder = CallRecorder.for_room(ctx.room.name)
+        recorder.record("call_started", room=ctx.room.name, agent=AGENT_NAME)
+
+        @session.on("user_input_transcribed")
+        def _record_transcript(ev: UserInputTranscribedEvent) -> None:
+            recorder.on_transcript(ev.transcript, is_final=ev.is_final)
+
+        @session.on("conversation_item_added")
+        def _record_item(ev: ConversationItemAddedEvent) -> None:
+            recorder.on_conversation_item(ev.item)
+
+        @session.on("function_tools_executed")
+        def _record_tools(ev: FunctionToolsExecutedEvent) -> None:
+            recorder.on_tools_executed(ev.function_calls, ev.function_call_outputs)
+
+        @session.on("metrics_collected")
+        def _record_metrics(ev: MetricsCollectedEvent) -> None:
+            recorder.on_metrics(ev.metrics)
+
+        async def close_recorder() -> None:
+            recorder.record("call_ended")
+            await asyncio.to_thread(recorder.close)
+            logger.info(
+                "Call recorded",
+                extra={"path": str(recorder.path), "events": recorder.events},
+            )
+
+        ctx.add_shutdown_callback(close_recorder)
+
+    # Start inventory lookups from interim transcripts, before the LLM asks
+    agent_inventory: InventoryBackend = inventory
+    if os.getenv("PREFETCH", "1") != "0":
+        prefetcher = SpeculativePrefetcher.from_env(
+            inventory,
+            ctx.proc.userdata["catalog"],
+            STORE_LOCATIONS,
+            ctx.proc.userdata["prefetch_stats"],
+        )
+        agent_inventory = prefetcher
+
+        @session.on("user_input_transcribed")
+        def _on_user_input_transcribed(ev: UserInputTranscribedEvent) -> None:
+            prefetcher.on_transcript(ev.transcript)
+
+        async def close_prefetcher() -> None:
+            prefetcher.close()
+            logger.info("Prefetch stats", extra=prefetcher.stats.as_dict())
+
+        ctx.add_shutdown_callback(close_prefetcher)
+
+    # Older turns are folded into a summary by a separate LLM instance, so
+    # requests stay the same size however long the call runs
+    summarizer = ChatSummarizer.from_env(providers.build("llm"))
+
+    async def close_summarizer() -> None:
+        await summarizer.aclose()
+
+    ctx.add_shutdown_callback(close_summarizer)
+
+    # Hours and department questions about a known store are answered from
+    # templates without an LLM round trip
+    fast_path = (
+        FastPath(STORE_LOCATIONS) if os.getenv("FAST_PATH", "1") != "0" else None
+    )
+
+    # Recognize returning callers; what this call adds is written when it ends
+    caller_memory: CallerMemory | None = ctx.proc.userdata.get("caller_memory")
+    caller = CallerSession(caller_memory) if caller_memory is not None else None
+    if caller is not None:
+
+        async def save_caller() -> None:
+            try:
+                await caller.save()
+            except Exception:
+                logger.exception("Could not save the caller profile")
+
+        ctx.add_shutdown_callback(save_caller)
+
     # Create the hardware store agent
-    agent = HardwareStoreAgent()
+    agent = HardwareStoreAgent(
+        inventory=agent_inventory,
+        catalog=ctx.proc.userdata["catalog"],
+        phrases=ctx.proc.userdata["phrases"],
+        summarizer=summarizer,
+        prompt_cache=ctx.proc.userdata.get("prompt_cache"),
+        fast_path=fast_path,
+        caller=caller,
+    )
+
+    # Krisp BVC on every caller by default; with NOISE_CANCELLATION=adaptive,
+    # noise suppression only runs while the caller's line is noisy
+    nc_mode = noise_filter.mode()
+    if nc_mode == "bvc":
+        nc_telephony, nc_default = noise_cancellation_filters()
+    elif nc_mode == "adaptive":
+        nc_telephony = nc_default = AdaptiveNoiseFilter.from_env()
+        call_stats = nc_default.stats
+
+        async def log_noise_filter_stats() -> None:
+            ctx.proc.userdata["noise_filter_stats"].add(call_stats)
+            logger.info("Audio processing", extra=call_stats.as_dict())
+
+        ctx.add_shutdown_callback(log_noise_filter_stats)
+    else:
+        nc_telephony = nc_default = None
 
     # Start the session with the hardware store agent
     await session.start(
@@ -323,24 +921,66 @@ async def entrypoint(ctx: JobContext):
         room_options=room_io.RoomOptions(
             audio_input=room_io.AudioInputOptions(
                 # Use telephony-optimized noise cancellation for SIP calls
-                noise_cancellation=lambda params: noise_cancellation.BVCTelephony()
+                noise_cancellation=lambda params: nc_telephony
                 if params.participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP
-                else noise_cancellation.BVC(),
+                else nc_default,
             ),
         ),
     )
 
     # Join the room and connect to the caller
     await ctx.connect()
+    if caller is not None:
+        participant = await ctx.wait_for_participant()
+        await caller.identify(
+            participant.identity
+            if participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP
+            else None
+        )
+    await warmup_task
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["profile-startup"]:
+        import argparse
+
+        parser = argparse.ArgumentParser(prog="agent.py profile-startup")
+        parser.add_argument("--json", type=Path, help="Also write the profile here")
+        profile_startup(prewarm, parser.parse_args(sys.argv[2:]).json)
+        sys.exit(0)
+
+    # Plugins must be imported on the main thread: here for download-files,
+    # and for the thread executor, whose jobs don't run on the main thread.
+    # Job processes import them in prewarm instead.
+    if sys.argv[1:2] == ["download-files"] or job_executor() == "thread":
+        providers.import_configured()
+    # The worker starts its inference process only if the plugin is imported
+    if sys.argv[1:2] == ["download-files"] or turn_detection.enabled():
+        turn_detection.import_plugin()
+
+    if sys.argv[1:2] == ["download-files"]:
+        asyncio.run(render_fixed_phrases())
+
+    # Expose /metrics next to /health on the worker's HTTP port
+    serve_on_worker_http_server()
+
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
             agent_name=AGENT_NAME,
             worker_type=WorkerType.ROOM,
+            # "thread" runs calls as threads of one process sharing the models
+            job_executor_type=JobExecutorType.THREAD
+            if job_executor() == "thread"
+            else JobExecutorType.PROCESS,
+            # Warn when a job process grows past this (process executor only)
+            job_memory_warn_mb=float(os.getenv("JOB_MEMORY_WARN_MB", "500")),
+            # Full at WORKER_LOAD_THRESHOLD CPU or MAX_CALLS_PER_WORKER calls
+            load_fnc=worker_load.load_fnc,
+            load_threshold=worker_load.load_threshold(),
+            # On SIGTERM, take no new calls and let active ones finish
+            drain_timeout=worker_load.drain_timeout(),
             # Port for Cerebrium deployment
             port=int(os.getenv("PORT", "8600")),
         )
@@ -0,0 +1,197 @@
+"""A record of each call's events, for replaying calls offline.
+
+``CallRecorder`` appends one JSON object per event to a gzip-compressed
+JSONL file per call: the caller's final transcripts, the conversation items,
+every tool call with its arguments, output and duration, and the per-stage
+metrics of each turn. ``record`` only puts the event on a queue; a writer
+thread serializes and compresses them in batches, so the call's event loop
+never waits on the disk.
+
+Recordings go to ``CALL_RECORDINGS_DIR`` (by default in the temp directory).
+They contain what callers said, so keep them as private as the call logs.
+``benchmarks/replay.py`` replays them through ``HardwareStoreAgent``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from livekit.agents import llm
+from livekit.agents.metrics import AgentMetrics
+
+logger = logging.getLogger("agent.call_recorder")
+
+# Seconds the writer collects events before writing them out
+FLUSH_INTERVAL = 1.0
+
+_CLOSE = object()
+
+
+def recordings_dir() -> Path:
+    return Path(
+        os.getenv("CALL_RECORDINGS_DIR")
+        or Path(tempfile.gettempdir()) / "call-recordings"
+    )
+
+
+class CallRecorder:
+    """Append-only event log of one call, written by a background thread.
+
+    Args:
+        path: The ``.jsonl.gz`` file to write
+        flush_interval: Seconds between writes
+    """
+
+    def __init__(self, path: Path, *, flush_interval: float = FLUSH_INTERVAL) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.events = 0
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._start = time.time()
+        self._writer = threading.Thread(
+            target=self._write, daemon=True, name="call_recorder"
+        )
+        self._writer.start()
+
+    @classmethod
+    def for_room(cls, room: str) -> CallRecorder:
+        """A recorder writing ``<room>-<start time>.jsonl.gz`` in ``recordings_dir``."""
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        return cls(recordings_dir() / f"{room}-{stamp}.jsonl.gz")
+
+    def record(self, event: str, **data: Any) -> None:
+        """Add an event; ``data`` must be JSON-serializable."""
+        self.events += 1
+        self._queue.put({"event": event, "t": time.time() - self._start, **data})
+
+    def on_transcript(self, transcript: str, *, is_final: bool) -> None:
+        if is_final:
+            self.record("transcript", text=transcript)
+
+    def on_conversation_item(self, item: llm.ChatItem) -> None:
+        if item.type == "message":
+            self.record(
+                "conversation_item",
+                role=item.role,
+                text=item.text_content or "",
+                interrupted=item.interrupted,
+            )
+
+    def on_tools_executed(
+        self,
+        calls: list[llm.FunctionCall],
+        outputs: list[llm.FunctionCallOutput | None],
+    ) -> None:
+        for call, output in zip(calls, outputs, strict=True):
+            try:
+                arguments = json.loads(call.arguments or "{}")
+            except json.JSONDecodeError:
+                arguments = {"_raw": call.arguments}
+            self.record(
+                "tool_call",
+                name=call.name,
+                arguments=arguments,
+                output=output.output if output is not None else "",
+                is_error=output.is_error if output is not None else False,
+                duration=(
+                    output.created_at - call.created_at if output is not None else None
+                ),
+            )
+
+    def on_metrics(self, metrics: AgentMetrics) -> None:
+        self.record("metrics", **metrics.model_dump(mode="json", exclude={"metadata"}))
+
+    def close(self) -> None:
+        """Write what is left and stop the writer. Blocks; call in a thread."""
+        self._queue.put(_CLOSE)
+        self._writer.join()
+
+    def _write(self) -> None:
+        try:
+            self._write_batches()
+        except OSError:
+            logger.exception(f"Could not write the call recording {self.path}")
+
+    def _write_batches(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            closed = False
+            while not closed:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not _CLOSE and (
+                    (remaining := deadline - time.monotonic()) > 0
+                ):
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                if batch[-1] is _CLOSE:
+                    batch.pop()
+                    closed = True
+                for event in batch:
+                    try:
+                        f.write(json.dumps(event, default=str) + "\n")
+                    except (TypeError, ValueError):
+                        logger.exception(f"Could not record {event.get('event')!r}")
+                f.flush()
+
+
+def read_events(path: Path) -> list[dict[str, Any]]:
+    """The events of one recording, in order."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@dataclass
+class RecordedToolCall:
+    name: str
+    arguments: dict[str, Any]
+    output: str
+    is_error: bool = False
+    duration: float | None = None
+
+
+@dataclass
+class RecordedTurn:
+    """One caller turn: what they said, the tools called, and the reply."""
+
+    user_text: str
+    tool_calls: list[RecordedToolCall] = field(default_factory=list)
+    reply: str = ""
+
+
+def recorded_turns(events: list[dict[str, Any]]) -> Iterator[RecordedTurn]:
+    """The caller turns of a recording, from its conversation and tool events."""
+    turn: RecordedTurn | None = None
+    for event in events:
+        if event["event"] == "conversation_item":
+            if event["role"] == "user":
+                if turn is not None:
+                    yield turn
+                turn = RecordedTurn(event["text"])
+            elif event["role"] == "assistant" and turn is not None:
+                turn.reply = " ".join(filter(None, [turn.reply, event["text"]]))
+        elif event["event"] == "tool_call" and turn is not None:
+            turn.tool_calls.append(
+                RecordedToolCall(
+                    name=event["name"],
+                    arguments=event["arguments"],
+                    output=event["output"],
+                    is_error=event["is_error"],
+                    duration=event.get("duration"),
+                )
+            )
+    if turn is not None:
+        yield turn
@@ -0,0 +1,198 @@
+"""What the agent remembers about callers from one call to the next.
+
+Most calls start with "Which of our locations can I help you with?", a full
+turn even for contractors who call about the same store every time. Callers
+are recognized by their SIP participant identity (the number they call
+from), and ``CallerMemory`` keeps each one's usual store and the items they
+asked about recently, so the greeting can confirm the store instead.
+
+Profiles live in a SQLite file (``CALLER_DB_PATH``, by default in the temp
+directory; point it at persistent storage to keep them across deploys),
+with an in-memory LRU in front. Reads and writes run in a worker thread, and
+a call's changes are written once, when it ends, so the audio loop never
+waits on the disk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+logger = logging.getLogger("agent.caller_memory")
+
+# Items kept per caller, most recent first
+MAX_RECENT_ITEMS = 5
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS callers (
+    caller_id TEXT PRIMARY KEY,
+    store_id TEXT,
+    recent_items TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    last_call REAL NOT NULL
+)"""
+
+
+def default_db_path() -> Path:
+    return Path(
+        os.getenv("CALLER_DB_PATH")
+        or Path(tempfile.gettempdir()) / "agent-callers.sqlite3"
+    )
+
+
+@dataclass(frozen=True)
+class CallerProfile:
+    caller_id: str
+    store_id: str | None = None
+    recent_items: tuple[str, ...] = ()
+    calls: int = 0
+    last_call: float = 0.0
+
+
+class CallerMemory:
+    """Caller profiles in SQLite behind an LRU; one per worker process.
+
+    Args:
+        path: The SQLite file, shared by every process of the worker
+        cache_size: Most profiles kept in memory
+    """
+
+    def __init__(self, path: Path | None = None, *, cache_size: int = 1024) -> None:
+        self.path = path or default_db_path()
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, CallerProfile | None] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> CallerMemory:
+        """Memory sized by ``CALLER_CACHE_SIZE``."""
+        return cls(cache_size=int(os.getenv("CALLER_CACHE_SIZE", "1024")))
+
+    def _remember(self, caller_id: str, profile: CallerProfile | None) -> None:
+        self._cache[caller_id] = profile
+        self._cache.move_to_end(caller_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def get(self, caller_id: str) -> CallerProfile | None:
+        """The caller's profile, or None for a first-time caller."""
+        if caller_id in self._cache:
+            self._cache.move_to_end(caller_id)
+            return self._cache[caller_id]
+        profile = await asyncio.to_thread(self._read, caller_id)
+        self._remember(caller_id, profile)
+        return profile
+
+    async def save(self, profiles: list[CallerProfile]) -> None:
+        """Write ``profiles`` in one transaction."""
+        for profile in profiles:
+            self._remember(profile.caller_id, profile)
+        await asyncio.to_thread(self._write, profiles)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=5.0)
+        db.execute(_SCHEMA)
+        return db
+
+    def _read(self, caller_id: str) -> CallerProfile | None:
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT store_id, recent_items, calls, last_call FROM callers "
+                "WHERE caller_id = ?",
+                (caller_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        store_id, items, calls, last_call = row
+        return CallerProfile(
+            caller_id, store_id, tuple(json.loads(items)), calls, last_call
+        )
+
+    def _write(self, profiles: list[CallerProfile]) -> None:
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                "INSERT OR REPLACE INTO callers VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        p.caller_id,
+                        p.store_id,
+                        json.dumps(list(p.recent_items)),
+                        p.calls,
+                        p.last_call,
+                    )
+                    for p in profiles
+                ],
+            )
+
+
+class CallerSession:
+    """The caller of one call: their profile, and what this call adds to it.
+
+    The caller is only known once they have joined the room, so the agent
+    waits for ``identify`` (with a timeout) before it greets them.
+
+    Args:
+        memory: The process's caller memory
+    """
+
+    def __init__(self, memory: CallerMemory) -> None:
+        self._memory = memory
+        self.caller_id: str | None = None
+        self.profile: CallerProfile | None = None
+        self._store_id: str | None = None
+        self._items: list[str] = []
+        self._identified = asyncio.Event()
+
+    async def identify(self, caller_id: str | None) -> None:
+        """Load the profile of ``caller_id`` (None: a caller we can't recognize)."""
+        try:
+            if caller_id is not None:
+                self.caller_id = caller_id
+                self.profile = await self._memory.get(caller_id)
+        except Exception:
+            logger.exception("Could not read the caller profile")
+        finally:
+            self._identified.set()
+
+    async def wait_profile(self, timeout: float) -> CallerProfile | None:
+        """The caller's profile, or None if unknown or not loaded in time."""
+        try:
+            await asyncio.wait_for(self._identified.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.info("Caller profile not loaded in time, greeting as usual")
+            return None
+        return self.profile
+
+    def note_store(self, store_id: str) -> None:
+        self._store_id = store_id
+
+    def note_item(self, item_name: str) -> None:
+        if item_name in self._items:
+            self._items.remove(item_name)
+        self._items.insert(0, item_name)
+
+    async def save(self) -> None:
+        """Write this call's store and items to the caller's profile."""
+        if self.caller_id is None:
+            return
+        profile = self.profile or CallerProfile(self.caller_id)
+        items = [
+            *self._items,
+            *(i for i in profile.recent_items if i not in self._items),
+        ]
+        updated = replace(
+            profile,
+            store_id=self._store_id or profile.store_id,
+            recent_items=tuple(items[:MAX_RECENT_ITEMS]),
+            calls=profile.calls + 1,
+            last_call=time.time(),
+        )
+        await self._memory.save([updated])
@@ -0,0 +1,343 @@
+"""Product catalog index for resolving spoken item names to SKUs.
+
+Callers (and ASR) rarely say a product's catalog name: "pressure treated two by
+fours", "dewalt drill", "2x4 PT". ``CatalogIndex`` scores every product against
+the spoken text with BM25 over character trigrams, which tolerates typos,
+plurals and word-order changes, and returns the top candidates.
+
+The index is array-backed so it stays compact and fast for catalogs of 100k+
+products: product names live in one UTF-8 blob with an offsets array, and the
+inverted index is stored CSR-style (``indptr`` / ``postings`` / ``weights``)
+with the BM25 term weight of every posting precomputed at build time. A query
+gathers the postings of its trigrams and sums them per product with a single
+``np.bincount``.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger("agent.catalog")
+
+DEFAULT_CATALOG_PATH = Path(__file__).parent / "data" / "catalog.csv"
+
+# BM25 parameters; short product names favour a low length normalization
+BM25_K1 = 1.2
+BM25_B = 0.3
+
+# Resolution thresholds: the best match must cover most of the query's trigram
+# weight and clearly beat the runner-up to be used without asking the caller.
+MIN_COVERAGE = 0.6
+MIN_MARGIN = 1.15
+# Candidates must contain most of the query's words; a word counts when at
+# least half of its trigrams are in the product name, so misspellings and
+# plurals still count. Below that the product only shares some letters
+# ("toilet paper" vs "Toilet Wax Ring") and the item is not in the catalog.
+MIN_WORD_COVERAGE = 0.6
+MIN_WORD_OVERLAP = 0.5
+
+# Query-time limits: postings scanned to pick candidates, and candidates that
+# are then scored exactly. Together they bound search cost regardless of how
+# common the query's trigrams are in the catalog.
+POSTING_BUDGET = 10_000
+CANDIDATES = 200
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> list[str]:
+    """Character trigrams of each word, padded so short words still match."""
+    grams: list[str] = []
+    for word in _normalize(text).split():
+        padded = f" {word} "
+        grams.extend(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_coverage(query: str, name: str) -> float:
+    """Fraction of the words of ``query`` found, allowing typos, in ``name``."""
+    words = _normalize(query).split()
+    if not words:
+        return 0.0
+    name_grams = set(trigrams(name))
+    found = 0
+    for word in words:
+        grams = trigrams(word)
+        if sum(g in name_grams for g in grams) >= MIN_WORD_OVERLAP * len(grams):
+            found += 1
+    return found / len(words)
+
+
+@dataclass(frozen=True)
+class CatalogMatch:
+    sku: str
+    name: str
+    score: float
+    coverage: float
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """Outcome of resolving a spoken item name against the catalog.
+
+    ``match`` is set when one product is a confident match; otherwise
+    ``candidates`` lists the products the caller should choose between.
+    """
+
+    match: CatalogMatch | None
+    candidates: list[CatalogMatch]
+
+
+class CatalogIndex:
+    """Trigram BM25 index over a product catalog.
+
+    Arrays, all plain NumPy so the index can be saved and loaded as ``.npz``:
+
+    - ``skus``, ``name_blob``, ``name_offsets``: the product table
+    - ``indptr``, ``postings``, ``weights``: trigram -> products (inverted),
+      with postings sorted by product within each trigram
+    - ``doc_indptr``, ``doc_terms``, ``doc_weights``: product -> trigrams
+      (forward), used to score candidates exactly
+    - ``idf``: BM25 IDF of each trigram
+    """
+
+    ARRAYS = (
+        "skus",
+        "name_blob",
+        "name_offsets",
+        "indptr",
+        "postings",
+        "weights",
+        "doc_indptr",
+        "doc_terms",
+        "doc_weights",
+        "idf",
+    )
+
+    def __init__(self, vocab: dict[str, int], **arrays: np.ndarray) -> None:
+        self._vocab = vocab
+        self._skus = arrays["skus"]
+        self._name_blob = arrays["name_blob"]
+        self._name_offsets = arrays["name_offsets"]
+        self._indptr = arrays["indptr"]
+        self._postings = arrays["postings"]
+        self._weights = arrays["weights"]
+        self._doc_indptr = arrays["doc_indptr"]
+        self._doc_terms = arrays["doc_terms"]
+        self._doc_weights = arrays["doc_weights"]
+        self._idf = arrays["idf"]
+
+    def __len__(self) -> int:
+        return len(self._skus)
+
+    @classmethod
+    def build(cls, products: Iterable[tuple[str, str]]) -> CatalogIndex:
+        """Build an index from ``(sku, name)`` pairs."""
+        skus: list[str] = []
+        names: list[bytes] = []
+        vocab: dict[str, int] = {}
+        term_ids: list[int] = []
+        tfs: list[int] = []
+        doc_terms: list[int] = []
+        doc_lens: list[int] = []
+
+        for sku, name in products:
+            skus.append(sku)
+            names.append(name.encode())
+            counts = Counter(trigrams(name))
+            doc_terms.append(len(counts))
+            doc_lens.append(sum(counts.values()))
+            for gram, tf in counts.items():
+                term_ids.append(vocab.setdefault(gram, len(vocab)))
+                tfs.append(tf)
+
+        n_docs = len(skus)
+        doc_indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(doc_terms, out=doc_indptr[1:])
+        # Entries are in product order here: this is the forward index
+        terms = np.asarray(term_ids, dtype=np.int32)
+        docs = np.repeat(np.arange(n_docs, dtype=np.int32), doc_terms)
+        tf = np.asarray(tfs, dtype=np.float32)
+        doc_len = np.asarray(doc_lens, dtype=np.float32)
+
+        counts = np.bincount(terms, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        df = counts.astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_len.mean()) if n_docs else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[docs] / avg_len)
+        weights = (idf[terms] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        # A stable sort by trigram keeps products ascending within each trigram
+        order = np.argsort(terms, kind="stable")
+
+        name_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum([len(n) for n in names], out=name_offsets[1:])
+
+        return cls(
+            vocab,
+            skus=np.asarray(skus),
+            name_blob=np.frombuffer(b"".join(names), dtype=np.uint8),
+            name_offsets=name_offsets,
+            indptr=indptr,
+            postings=docs[order],
+            weights=weights[order],
+            doc_indptr=doc_indptr,
+            doc_terms=terms,
+            doc_weights=weights,
+            idf=idf,
+        )
+
+    @classmethod
+    def from_csv(cls, path: str | Path = DEFAULT_CATALOG_PATH) -> CatalogIndex:
+        """Build an index from a CSV file with ``sku`` and ``name`` columns."""
+        with open(path, newline="", encoding="utf-8") as f:
+            index = cls.build((row["sku"], row["name"]) for row in csv.DictReader(f))
+        logger.info(f"Catalog index built with {len(index)} products from {path}")
+        return index
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to an ``.npz`` file that ``load`` can read back."""
+        vocab = np.asarray(sorted(self._vocab, key=self._vocab.__getitem__))
+        arrays = {name: getattr(self, f"_{name}") for name in self.ARRAYS}
+        np.savez(path, vocab=vocab, **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> CatalogIndex:
+        """Load an index written by ``save`` without re-tokenizing the catalog."""
+        with np.load(path) as data:
+            vocab = {gram: i for i, gram in enumerate(data["vocab"].tolist())}
+            return cls(vocab, **{name: data[name] for name in cls.ARRAYS})
+
+    def name(self, doc_id: int) -> str:
+        start, end = self._name_offsets[doc_id], self._name_offsets[doc_id + 1]
+        return self._name_blob[start:end].tobytes().decode()
+
+    def search(self, query: str, k: int = 5) -> list[CatalogMatch]:
+        """Return up to ``k`` products best matching ``query``, best first."""
+        grams = set(trigrams(query))
+        term_ids = np.asarray(
+            sorted(self._vocab[gram] for gram in grams if gram in self._vocab),
+            dtype=np.int32,
+        )
+        if not len(term_ids):
+            return []
+
+        # Phase 1: pick candidates using the rarest trigrams only, up to a
+        # budget of postings, so common trigrams don't dominate query time.
+        starts = self._indptr[term_ids]
+        ends = self._indptr[term_ids + 1]
+        order = np.argsort(ends - starts, kind="stable")
+        n_selective = max(
+            1,
+            int(
+                np.searchsorted(
+                    np.cumsum((ends - starts)[order]), POSTING_BUDGET, "right"
+                )
+            ),
+        )
+        spans = [(starts[i], ends[i]) for i in order[:n_selective]]
+        docs = np.concatenate([self._postings[s:e] for s, e in spans])
+        weights = np.concatenate([self._weights[s:e] for s, e in spans])
+        partial = np.bincount(docs, weights=weights, minlength=len(self))
+        # Rank postings rather than the whole catalog: a product appears once
+        # per matched trigram, so this picks the best-scoring distinct products.
+        if len(docs) > CANDIDATES:
+            best = np.argpartition(partial[docs], -CANDIDATES)[-CANDIDATES:]
+            docs = docs[best]
+        matched = np.unique(docs)
+
+        # Phase 2: exact BM25 score and coverage of each candidate over all
+        # query trigrams, read from the forward index.
+        lo = self._doc_indptr[matched]
+        lens = self._doc_indptr[matched + 1] - lo
+        owner = np.repeat(np.arange(len(matched)), lens)
+        entries = np.arange(lens.sum()) + np.repeat(lo - (np.cumsum(lens) - lens), lens)
+        terms = self._doc_terms[entries]
+        pos = np.minimum(np.searchsorted(term_ids, terms), len(term_ids) - 1)
+        hit = term_ids[pos] == terms
+        owner, entries, terms = owner[hit], entries[hit], terms[hit]
+        scores = np.bincount(
+            owner, weights=self._doc_weights[entries], minlength=len(matched)
+        )
+        covered = np.bincount(owner, weights=self._idf[terms], minlength=len(matched))
+
+        # Trigrams missing from the catalog count with the maximum IDF
+        unknown_idf = np.log1p((len(self) + 0.5) / 0.5)
+        total_idf = float(
+            self._idf[term_ids].sum() + (len(grams) - len(term_ids)) * unknown_idf
+        )
+
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [
+            CatalogMatch(
+                sku=str(self._skus[matched[i]]),
+                name=self.name(int(matched[i])),
+                score=float(scores[i]),
+                coverage=float(covered[i]) / total_idf,
+            )
+            for i in top
+        ]
+
+    def resolve(self, query: str, k: int = 3) -> Resolution:
+        """Resolve a spoken item name to one product or a short candidate list.
+
+        An exact (normalized) product name always resolves, so repeating one of
+        the offered candidates back to the index settles the clarification.
+        Products that contain too few of the query's words are dropped, so an
+        item the catalog doesn't carry gets no candidates.
+        """
+        candidates = [
+            c
+            for c in self.search(query, k=k)
+            if word_coverage(query, c.name) >= MIN_WORD_COVERAGE
+        ]
+        if not candidates:
+            return Resolution(match=None, candidates=[])
+        best = candidates[0]
+        if _normalize(best.name) == _normalize(query):
+            return Resolution(match=best, candidates=candidates)
+        clear_winner = (
+            len(candidates) == 1 or best.score >= MIN_MARGIN * candidates[1].score
+        )
+        if best.coverage >= MIN_COVERAGE and clear_winner:
+            return Resolution(match=best, candidates=candidates)
+        return Resolution(match=None, candidates=candidates)
+
+
+def load_catalog(path: str | Path | None = None) -> CatalogIndex:
+    """Load the catalog at ``path`` (default: ``CATALOG_PATH`` or the bundled CSV).
+
+    Prebuilt ``.npz`` indexes load without re-tokenizing, which keeps large
+    catalogs from slowing down ``prewarm``.
+    """
+    path = Path(path or os.getenv("CATALOG_PATH") or DEFAULT_CATALOG_PATH)
+    if path.suffix == ".npz":
+        return CatalogIndex.load(path)
+    return CatalogIndex.from_csv(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Prebuild a catalog index from a CSV of sku,name rows"
+    )
+    parser.add_argument("csv", type=Path)
+    parser.add_argument("output", type=Path)
+    args = parser.parse_args()
+    CatalogIndex.from_csv(args.csv).save(args.output)
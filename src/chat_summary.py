@@ -0,0 +1,207 @@
+"""Bounded chat context for long calls.
+
+Every LLM request carries the whole chat context, so on a long call each
+response gets slower than the last: every inventory lookup adds a tool call
+and its JSON output. ``ChatSummarizer`` keeps the last ``keep_turns`` caller
+turns word for word and folds everything older, tool calls and outputs
+included, into a short running summary, kept as a system message after the
+agent's instructions.
+
+Summaries are written by a separate LLM instance in a background task started
+after a caller turn, so they never delay a response. The context is compacted
+in batches (once ``batch_turns`` more turns have built up), which keeps
+summarization calls rare while the context stays roughly constant in size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from typing import TYPE_CHECKING
+
+from livekit.agents import llm
+
+if TYPE_CHECKING:
+    from livekit.agents import Agent
+
+logger = logging.getLogger("agent.chat_summary")
+
+SUMMARY_ID_PREFIX = "summary_"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+# Tool outputs are cut to this many characters in the summarizer's input
+MAX_TOOL_OUTPUT_CHARS = 400
+
+SUMMARIZER_INSTRUCTIONS = """You summarize phone calls to a hardware store's voice receptionist. \
+Write a short factual summary that lets the receptionist continue the call: \
+the store location the caller chose, the products they asked about with the stock, \
+price and aisle found, anything promised to the caller, and open questions. \
+Use at most {max_words} words, plain text, no lists."""
+
+
+def is_summary(item: llm.ChatItem) -> bool:
+    return item.id.startswith(SUMMARY_ID_PREFIX)
+
+
+def split_context(
+    chat_ctx: llm.ChatContext, keep_turns: int
+) -> tuple[str | None, list[llm.ChatItem]]:
+    """Return the current summary and the items older than the last turns.
+
+    A turn starts at a caller message, so a tool call and its output are
+    always summarized (or kept) together. System messages other than the
+    summary (the agent's instructions) are never summarized.
+    """
+    summary = None
+    conversation: list[llm.ChatItem] = []
+    for item in chat_ctx.items:
+        if is_summary(item):
+            text = item.text_content or ""  # type: ignore[union-attr]
+            summary = text.removeprefix(SUMMARY_HEADER).strip()
+        elif not (item.type == "message" and item.role in ("system", "developer")):
+            conversation.append(item)
+
+    user_turns = [
+        i
+        for i, item in enumerate(conversation)
+        if item.type == "message" and item.role == "user"
+    ]
+    if len(user_turns) <= keep_turns:
+        return summary, []
+    if keep_turns == 0:
+        return summary, conversation
+    return summary, conversation[: user_turns[-keep_turns]]
+
+
+def render_transcript(items: list[llm.ChatItem]) -> str:
+    lines = []
+    for item in items:
+        if item.type == "message":
+            speaker = "Caller" if item.role == "user" else "Receptionist"
+            lines.append(f"{speaker}: {item.text_content}")
+        elif item.type == "function_call":
+            lines.append(f"Tool call {item.name}({item.arguments})")
+        elif item.type == "function_call_output":
+            output = item.output
+            if len(output) > MAX_TOOL_OUTPUT_CHARS:
+                output = output[:MAX_TOOL_OUTPUT_CHARS] + "..."
+            lines.append(f"Tool result {item.name}: {output}")
+    return "\n".join(lines)
+
+
+def compact(
+    chat_ctx: llm.ChatContext, summary: str, summarized_ids: set[str]
+) -> llm.ChatContext:
+    """Replace the summarized items and any previous summary with ``summary``."""
+    items = [
+        item
+        for item in chat_ctx.items
+        if item.id not in summarized_ids and not is_summary(item)
+    ]
+    # After the agent's instructions, before the remaining conversation
+    position = 0
+    while (
+        position < len(items)
+        and items[position].type == "message"
+        and items[position].role in ("system", "developer")
+    ):
+        position += 1
+    items.insert(
+        position,
+        llm.ChatMessage(
+            id=f"{SUMMARY_ID_PREFIX}{uuid.uuid4().hex[:12]}",
+            role="system",
+            content=[f"{SUMMARY_HEADER} {summary}"],
+        ),
+    )
+    return llm.ChatContext(items)
+
+
+class ChatSummarizer:
+    """Keeps an agent's chat context to its recent turns plus a summary.
+
+    Args:
+        summarizer_llm: Writes the summaries; use an instance that isn't the
+            session's LLM so summaries don't show up in its latency metrics
+        keep_turns: Caller turns kept word for word
+        batch_turns: Extra turns allowed to build up before compacting
+        max_summary_words: Length limit given to the summarizer
+    """
+
+    def __init__(
+        self,
+        summarizer_llm: llm.LLM,
+        *,
+        keep_turns: int = 6,
+        batch_turns: int = 4,
+        max_summary_words: int = 150,
+    ) -> None:
+        if keep_turns < 1:
+            raise ValueError("keep_turns must be at least 1")
+        self._llm = summarizer_llm
+        self.keep_turns = keep_turns
+        self.batch_turns = batch_turns
+        self.max_summary_words = max_summary_words
+        self._task: asyncio.Task[None] | None = None
+
+    @classmethod
+    def from_env(cls, summarizer_llm: llm.LLM) -> ChatSummarizer:
+        return cls(
+            summarizer_llm,
+            keep_turns=int(os.getenv("CHAT_KEEP_TURNS", "6")),
+            batch_turns=int(os.getenv("CHAT_SUMMARY_BATCH_TURNS", "4")),
+        )
+
+    def schedule(self, agent: Agent) -> None:
+        """Compact ``agent``'s context in the background if it has grown enough."""
+        if self._task is not None and not self._task.done():
+            return
+        summary, old = split_context(agent.chat_ctx, self.keep_turns)
+        old_turns = sum(
+            1 for item in old if item.type == "message" and item.role == "user"
+        )
+        if old_turns < self.batch_turns:
+            return
+        self._task = asyncio.create_task(self._compact(agent, summary, old))
+
+    async def _compact(
+        self, agent: Agent, summary: str | None, old: list[llm.ChatItem]
+    ) -> None:
+        try:
+            new_summary = await self.summarize(summary, old)
+        except Exception:
+            logger.exception("Failed to summarize the chat context, keeping it")
+            return
+        # The context has moved on while summarizing; only the summarized
+        # items are replaced
+        chat_ctx = compact(agent.chat_ctx, new_summary, {item.id for item in old})
+        await agent.update_chat_ctx(chat_ctx)
+        logger.info(f"Summarized {len(old)} chat items, {len(chat_ctx.items)} remain")
+
+    async def summarize(self, summary: str | None, items: list[llm.ChatItem]) -> str:
+        transcript = render_transcript(items)
+        if summary:
+            transcript = f"Summary so far: {summary}\n\n{transcript}"
+        request = llm.ChatContext.empty()
+        request.add_message(
+            role="system",
+            content=SUMMARIZER_INSTRUCTIONS.format(max_words=self.max_summary_words),
+        )
+        request.add_message(role="user", content=transcript)
+
+        parts: list[str] = []
+        async with self._llm.chat(chat_ctx=request) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        text = "".join(parts).strip()
+        if not text:
+            raise RuntimeError("Summarizer returned an empty summary")
+        return text
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
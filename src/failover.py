@@ -0,0 +1,502 @@
+"""Hedged requests and latency-aware ordering across providers.
+
+With fallback providers configured (``LLM_FALLBACK_PROVIDER``,
+``TTS_FALLBACK_PROVIDER``, ``STT_FALLBACK_PROVIDER``), each call's STT, LLM
+and TTS are wrappers over every candidate provider:
+
+- ``HedgedLLM`` and ``HedgedTTS`` send each request to the first provider. If
+  it hasn't produced a first token (or audio frame) within the hedge
+  deadline, the request is also sent to the next one, and whichever answers
+  first is used; the other request is cancelled. A provider that fails
+  before answering hands over to the next one at once.
+- STT is a continuous stream that can't be raced per request, so it uses
+  LiveKit's ``stt.FallbackAdapter``, which switches providers on errors.
+
+``ProviderStats`` keeps each provider's recent time to first token and
+errors. New calls put the fastest healthy provider first, so a vendor having
+a latency spike stops being the primary until it recovers. The stats are
+saved to ``PROVIDER_STATS_FILE`` when a call ends and loaded when the next
+one starts, so every job process of a worker routes on the same data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import Any, Protocol, TypeVar
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    APIConnectionError,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    tts,
+)
+
+import providers
+
+logger = logging.getLogger("agent.failover")
+
+T = TypeVar("T")
+
+# Samples kept per provider, and how long they count
+WINDOW = 50
+MAX_SAMPLE_AGE = 900.0
+# A provider is unhealthy when more than this share of its last
+# HEALTH_WINDOW requests failed
+HEALTH_WINDOW = 10
+MAX_ERROR_RATE = 0.3
+
+
+def default_stats_path() -> Path:
+    return Path(
+        os.getenv("PROVIDER_STATS_FILE")
+        or Path(tempfile.gettempdir()) / "hardware-store-agent-provider-stats.json"
+    )
+
+
+class ProviderStats:
+    """Rolling time-to-first-token samples and errors per provider.
+
+    Providers are keyed ``"<kind>/<name>"``, e.g. ``"llm/google"``. A sample
+    is ``[time, seconds]``, with ``seconds`` None for a failed request.
+    """
+
+    def __init__(
+        self, path: Path | None = None, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.path = path or default_stats_path()
+        self._clock = clock
+        self._samples: dict[str, list[list[Any]]] = {}
+        self.hedges: Counter[str] = Counter()
+
+    def record(self, key: str, seconds: float | None) -> None:
+        samples = self._samples.setdefault(key, [])
+        samples.append([self._clock(), seconds])
+        del samples[:-WINDOW]
+
+    def _recent(self, key: str) -> list[float | None]:
+        cutoff = self._clock() - MAX_SAMPLE_AGE
+        return [s for at, s in self._samples.get(key, []) if at >= cutoff]
+
+    def latency(self, key: str) -> float | None:
+        """Median time to first token of recent successful requests."""
+        successes = [s for s in self._recent(key) if s is not None]
+        return statistics.median(successes) if successes else None
+
+    def healthy(self, key: str) -> bool:
+        recent = self._recent(key)[-HEALTH_WINDOW:]
+        if not recent:
+            return True
+        return sum(s is None for s in recent) / len(recent) <= MAX_ERROR_RATE
+
+    def rank(self, kind: str, names: list[str]) -> list[str]:
+        """``names`` ordered healthy first, then by latency.
+
+        Providers without recent samples go after measured ones, in their
+        configured order; they get measured whenever a request is hedged.
+        """
+
+        def order(item: tuple[int, str]) -> tuple[bool, float, int]:
+            position, name = item
+            key = f"{kind}/{name}"
+            latency = self.latency(key)
+            return (
+                not self.healthy(key),
+                float("inf") if latency is None else latency,
+                position,
+            )
+
+        return [name for _, name in sorted(enumerate(names), key=order)]
+
+    def load(self) -> None:
+        """Merge in the samples other processes saved."""
+        try:
+            saved = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        for key, samples in saved.items():
+            merged = {tuple(s) for s in self._samples.get(key, [])}
+            merged.update(tuple(s) for s in samples)
+            # By time alone: failed samples' None doesn't compare with floats
+            merged_samples = sorted(merged, key=lambda s: s[0])
+            self._samples[key] = [list(s) for s in merged_samples][-WINDOW:]
+
+    def save(self) -> None:
+        self.load()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self._samples))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save provider stats: {e}")
+
+    def collect(self, metrics: Any) -> None:
+        """Registry collector exporting latency, health and hedge counts."""
+        for key in self._samples:
+            kind, name = key.split("/", 1)
+            latency = self.latency(key)
+            if latency is not None:
+                metrics.set_gauge(
+                    "agent_provider_ttft_seconds", latency, kind=kind, provider=name
+                )
+            metrics.set_gauge(
+                "agent_provider_healthy",
+                float(self.healthy(key)),
+                kind=kind,
+                provider=name,
+            )
+        for kind, count in self.hedges.items():
+            metrics.set_counter("agent_hedged_requests_total", count, kind=kind)
+
+
+provider_stats = ProviderStats()
+
+
+class _Stream(Protocol[T]):
+    def __aiter__(self) -> AsyncIterator[T]: ...
+
+    async def __anext__(self) -> T: ...
+
+    async def aclose(self) -> None: ...
+
+
+async def hedge(
+    kind: str,
+    attempts: list[tuple[str, Callable[[], _Stream[T]]]],
+    *,
+    deadline: float,
+    stats: ProviderStats,
+) -> AsyncIterator[T]:
+    """Yield the items of whichever attempt produces its first item first.
+
+    Attempts start in order: the first right away, the next when no attempt
+    has produced an item ``deadline`` seconds after the last one started, or
+    as soon as every started attempt has failed.
+    """
+    pending: dict[asyncio.Task[T], tuple[str, _Stream[T], float]] = {}
+    remaining = list(attempts)
+    error: BaseException | None = None
+
+    def start_next() -> None:
+        name, open_stream = remaining.pop(0)
+        stream = open_stream()
+        task = asyncio.ensure_future(stream.__anext__())
+        pending[task] = (name, stream, time.perf_counter())
+
+    async def close(task: asyncio.Task[T], stream: _Stream[T]) -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await stream.aclose()
+
+    start_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=deadline if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                stats.hedges[kind] += 1
+                logger.info(
+                    f"No {kind.upper()} response after {deadline:.2f}s, "
+                    f"also trying {remaining[0][0]}"
+                )
+                start_next()
+                continue
+
+            winner = None
+            for task in done:
+                name, stream, started = pending.pop(task)
+                elapsed = time.perf_counter() - started
+                exc = task.exception()
+                if exc is None or isinstance(exc, StopAsyncIteration):
+                    if winner is None:
+                        winner = (task, name, stream, elapsed)
+                        continue
+                else:
+                    error = exc
+                    stats.record(f"{kind}/{name}", None)
+                    logger.warning(f"{kind.upper()} provider {name} failed: {error}")
+                await stream.aclose()
+
+            if winner is None:
+                if not pending and remaining:
+                    start_next()
+                continue
+
+            task, name, stream, elapsed = winner
+            stats.record(f"{kind}/{name}", elapsed)
+            for other, (other_name, other_stream, started) in list(pending.items()):
+                # Cancelled requests took at least this long; only count them
+                # when that already shows the provider was slower
+                waited = time.perf_counter() - started
+                if waited > elapsed:
+                    stats.record(f"{kind}/{other_name}", waited)
+                del pending[other]
+                await close(other, other_stream)
+
+            try:
+                if task.exception() is None:
+                    yield task.result()
+                    async for item in stream:
+                        yield item
+            finally:
+                await stream.aclose()
+            return
+    finally:
+        for task, (_, stream, _) in pending.items():
+            await close(task, stream)
+
+    raise APIConnectionError(
+        f"Every {kind.upper()} provider failed: {error}", retryable=False
+    )
+
+
+class HedgedLLM(llm.LLM):
+    """LLM racing the next provider when one misses the hedge deadline.
+
+    ``extra_kwargs`` are provider-specific, so ``chat`` refuses them rather
+    than send one provider's settings to another.
+
+    Args:
+        llms: ``(name, LLM)`` pairs, in the order they are tried
+        deadline: Seconds to wait for a first token before hedging
+        stats: Where time to first token and errors are recorded
+    """
+
+    def __init__(
+        self,
+        llms: list[tuple[str, llm.LLM]],
+        *,
+        deadline: float,
+        stats: ProviderStats = provider_stats,
+    ) -> None:
+        super().__init__()
+        self.llms = llms
+        self.deadline = deadline
+        self.stats = stats
+
+    @property
+    def model(self) -> str:
+        return self.llms[0][1].model
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[Any] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> HedgedLLMStream:
+        if extra_kwargs:
+            raise ValueError(
+                f"HedgedLLM can't send provider-specific extra_kwargs: {extra_kwargs}"
+            )
+        return HedgedLLMStream(
+            self,
+            chat_ctx=chat_ctx,
+            tools=tools or [],
+            conn_options=conn_options,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=tool_choice,
+        )
+
+    async def aclose(self) -> None:
+        for _, inner in self.llms:
+            await inner.aclose()
+
+
+class HedgedLLMStream(llm.LLMStream):
+    def __init__(
+        self,
+        hedged_llm: HedgedLLM,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[Any],
+        conn_options: APIConnectOptions,
+        parallel_tool_calls: NotGivenOr[bool],
+        tool_choice: NotGivenOr[llm.ToolChoice],
+    ) -> None:
+        super().__init__(
+            hedged_llm, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options
+        )
+        self._hedged_llm = hedged_llm
+        self._parallel_tool_calls = parallel_tool_calls
+        self._tool_choice = tool_choice
+
+    async def _run(self) -> None:
+        # Falling over to the next provider replaces retrying the same one
+        inner_options = APIConnectOptions(
+            max_retry=0, timeout=self._conn_options.timeout
+        )
+
+        def attempt(inner: llm.LLM) -> Callable[[], llm.LLMStream]:
+            return lambda: inner.chat(
+                chat_ctx=self._chat_ctx,
+                tools=self._tools,
+                conn_options=inner_options,
+                parallel_tool_calls=self._parallel_tool_calls,
+                tool_choice=self._tool_choice,
+            )
+
+        hedged = self._hedged_llm
+        async for chunk in hedge(
+            "llm",
+            [(name, attempt(inner)) for name, inner in hedged.llms],
+            deadline=hedged.deadline,
+            stats=hedged.stats,
+        ):
+            self._event_ch.send_nowait(chunk)
+
+
+def _is_end_marker(audio: tts.SynthesizedAudio) -> bool:
+    """The 10 ms of silence LiveKit's emitter appends to end a flushed segment."""
+    frame = audio.frame
+    return (
+        audio.is_final
+        and frame.samples_per_channel == frame.sample_rate // 100
+        and not any(frame.data)
+    )
+
+
+class HedgedTTS(tts.TTS):
+    """TTS racing the next provider when one misses the hedge deadline.
+
+    Sentences are synthesized one request at a time (the session streams
+    text through LiveKit's ``StreamAdapter``), so each can be raced. Audio
+    is resampled to the first provider's sample rate.
+
+    Args:
+        ttss: ``(name, TTS)`` pairs, in the order they are tried
+        deadline: Seconds to wait for the first audio before hedging
+        stats: Where time to first byte and errors are recorded
+    """
+
+    def __init__(
+        self,
+        ttss: list[tuple[str, tts.TTS]],
+        *,
+        deadline: float,
+        stats: ProviderStats = provider_stats,
+    ) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=ttss[0][1].sample_rate,
+            num_channels=1,
+        )
+        self.ttss = ttss
+        self.deadline = deadline
+        self.stats = stats
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> HedgedChunkedStream:
+        return HedgedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    async def aclose(self) -> None:
+        for _, inner in self.ttss:
+            await inner.aclose()
+
+
+class HedgedChunkedStream(tts.ChunkedStream):
+    def __init__(
+        self, *, tts: HedgedTTS, input_text: str, conn_options: APIConnectOptions
+    ) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._hedged_tts = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        hedged = self._hedged_tts
+        inner_options = APIConnectOptions(
+            max_retry=0, timeout=self._conn_options.timeout
+        )
+
+        def attempt(inner: tts.TTS) -> Callable[[], tts.ChunkedStream]:
+            return lambda: inner.synthesize(self.input_text, conn_options=inner_options)
+
+        output_emitter.initialize(
+            request_id=f"hedged_{uuid.uuid4().hex[:12]}",
+            sample_rate=hedged.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        resampler: rtc.AudioResampler | None = None
+        async for audio in hedge(
+            "tts",
+            [(name, attempt(inner)) for name, inner in hedged.ttss],
+            deadline=hedged.deadline,
+            stats=hedged.stats,
+        ):
+            if _is_end_marker(audio):
+                # output_emitter ends the segment with its own marker
+                continue
+            frames = [audio.frame]
+            if audio.frame.sample_rate != hedged.sample_rate:
+                if resampler is None:
+                    resampler = rtc.AudioResampler(
+                        audio.frame.sample_rate, hedged.sample_rate
+                    )
+                frames = resampler.push(audio.frame)
+            for frame in frames:
+                output_emitter.push(frame.data.tobytes())
+        if resampler is not None:
+            for frame in resampler.flush():
+                output_emitter.push(frame.data.tobytes())
+        output_emitter.flush()
+
+
+def build(kind: str, *, stats: ProviderStats = provider_stats, **kwargs: Any) -> Any:
+    """Instantiate ``kind``'s configured provider, with its fallbacks if any.
+
+    Fallbacks without an API key are left out. LLM and TTS candidates are
+    ordered by ``stats``; ``vad`` is only used for STT fallbacks.
+    """
+    vad = kwargs.pop("vad", None)
+    names = [
+        name
+        for i, name in enumerate(providers.candidates(kind))
+        if i == 0 or providers.has_api_key(kind, name)
+    ]
+    if len(names) == 1:
+        return providers.build(kind, **kwargs)
+
+    if kind == "stt":
+        from livekit.agents import stt
+
+        logger.info(f"STT providers in order: {', '.join(names)}")
+        return stt.FallbackAdapter(
+            [providers.build(kind, name, **kwargs) for name in names], vad=vad
+        )
+
+    names = stats.rank(kind, names)
+    logger.info(f"{kind.upper()} providers in order: {', '.join(names)}")
+    instances = [(name, providers.build(kind, name, **kwargs)) for name in names]
+    if kind == "llm":
+        return HedgedLLM(
+            instances,
+            deadline=float(os.getenv("LLM_HEDGE_DEADLINE", "1.5")),
+            stats=stats,
+        )
+    return HedgedTTS(
+        instances, deadline=float(os.getenv("TTS_HEDGE_DEADLINE", "1.0")), stats=stats
+    )
@@ -0,0 +1,378 @@
+"""Deterministic stand-in STT, LLM and TTS providers.
+
+These implement the LiveKit provider interfaces without any network access,
+with configurable latency, so benchmarks and tests can drive
+``HardwareStoreAgent`` offline:
+
+- ``FakeSTT`` returns scripted transcripts after a fixed recognition delay
+- ``FakeLLM`` answers from a script keyed on the user's words, including tool
+  calls, after a time-to-first-token delay and at a fixed token rate
+- ``ReplayLLM`` answers like a recorded call did (see ``call_recorder``)
+- ``FakeTTS`` produces a tone whose length follows the text, after a
+  time-to-first-byte delay
+- ``FakeCacheBackend`` creates prompt caches (see ``prompt_cache``) in memory
+- ``FakeSipDialer`` stands in for supervisor phones and LiveKit rooms in
+  warm transfers (see ``transfer``)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import math
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    APIConnectionError,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    stt,
+    tts,
+)
+from livekit.agents.utils import AudioBuffer
+
+from call_recorder import RecordedTurn
+from prompt_cache import StaticPrefix
+
+
+class FakeSTT(stt.STT):
+    """Non-streaming STT returning ``transcripts`` in order, cycling."""
+
+    def __init__(self, transcripts: Iterable[str], *, latency: float = 0.1) -> None:
+        super().__init__(
+            capabilities=stt.STTCapabilities(streaming=False, interim_results=False)
+        )
+        self._transcripts = itertools.cycle(list(transcripts))
+        self.latency = latency
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> stt.SpeechEvent:
+        await asyncio.sleep(self.latency)
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language="en", text=next(self._transcripts))],
+        )
+
+
+@dataclass
+class ScriptedTurn:
+    """How ``FakeLLM`` answers a user message containing ``trigger``.
+
+    With a ``tool``, the first response is a call to it with ``arguments`` and
+    ``reply`` is sent once the tool output comes back; ``{output}`` in
+    ``reply`` is replaced with that output.
+    """
+
+    trigger: str
+    reply: str
+    tool: str | None = None
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+DEFAULT_REPLY = "Of course, I can help with that. Which location are you calling about?"
+
+
+class FakeLLM(llm.LLM):
+    """Scripted LLM with a fixed time-to-first-token and token rate.
+
+    With ``fail``, every request raises a connection error after ``ttft``.
+    ``requests`` keeps the tools and ``extra_kwargs`` of every request.
+    """
+
+    def __init__(
+        self,
+        script: Iterable[ScriptedTurn] = (),
+        *,
+        ttft: float = 0.3,
+        tokens_per_second: float = 80.0,
+        fail: bool = False,
+    ) -> None:
+        super().__init__()
+        self.script = list(script)
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.fail = fail
+        self.requests: list[dict[str, Any]] = []
+
+    @property
+    def model(self) -> str:
+        return "fake-llm"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[Any] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> FakeLLMStream:
+        self.requests.append({"tools": tools or [], "extra_kwargs": extra_kwargs or {}})
+        return FakeLLMStream(
+            self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options
+        )
+
+    def respond(
+        self, chat_ctx: llm.ChatContext
+    ) -> tuple[str, llm.FunctionToolCall | None]:
+        """Pick the reply text, or tool call, for the current context."""
+        last = chat_ctx.items[-1] if chat_ctx.items else None
+        if last is not None and last.type == "function_call_output":
+            turn = self._match(self._last_user_text(chat_ctx))
+            reply = turn.reply if turn else "Here is what I found: {output}"
+            return reply.replace("{output}", last.output), None
+
+        turn = self._match(self._last_user_text(chat_ctx))
+        if turn is None:
+            return DEFAULT_REPLY, None
+        if turn.tool is None:
+            return turn.reply, None
+        call = llm.FunctionToolCall(
+            name=turn.tool,
+            arguments=json.dumps(turn.arguments),
+            call_id=f"call_{uuid.uuid4().hex[:12]}",
+        )
+        return "", call
+
+    def _match(self, text: str) -> ScriptedTurn | None:
+        text = text.lower()
+        return next((t for t in self.script if t.trigger.lower() in text), None)
+
+    @staticmethod
+    def _last_user_text(chat_ctx: llm.ChatContext) -> str:
+        for item in reversed(chat_ctx.items):
+            if item.type == "message" and item.role == "user":
+                return item.text_content or ""
+        return ""
+
+
+class ReplayLLM(FakeLLM):
+    """Replays the tool calls and replies of a recorded call.
+
+    The Nth user message gets the Nth recorded turn: its tool calls, one per
+    request in the recorded order, then its reply.
+    """
+
+    def __init__(
+        self,
+        turns: Iterable[RecordedTurn],
+        *,
+        ttft: float = 0.3,
+        tokens_per_second: float = 80.0,
+    ) -> None:
+        super().__init__(ttft=ttft, tokens_per_second=tokens_per_second)
+        self.turns = list(turns)
+
+    def respond(
+        self, chat_ctx: llm.ChatContext
+    ) -> tuple[str, llm.FunctionToolCall | None]:
+        users = [
+            i
+            for i, item in enumerate(chat_ctx.items)
+            if item.type == "message" and item.role == "user"
+        ]
+        if not users or len(users) > len(self.turns):
+            return DEFAULT_REPLY, None
+        turn = self.turns[len(users) - 1]
+        made = sum(item.type == "function_call" for item in chat_ctx.items[users[-1] :])
+        if made < len(turn.tool_calls):
+            recorded = turn.tool_calls[made]
+            call = llm.FunctionToolCall(
+                name=recorded.name,
+                arguments=json.dumps(recorded.arguments),
+                call_id=f"call_{uuid.uuid4().hex[:12]}",
+            )
+            return "", call
+        return turn.reply, None
+
+
+class FakeLLMStream(llm.LLMStream):
+    def __init__(
+        self,
+        fake_llm: FakeLLM,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[Any],
+        conn_options: APIConnectOptions,
+    ) -> None:
+        super().__init__(
+            fake_llm, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options
+        )
+        self._fake_llm = fake_llm
+
+    async def _run(self) -> None:
+        request_id = f"fake_{uuid.uuid4().hex[:12]}"
+        text, call = self._fake_llm.respond(self._chat_ctx)
+        await asyncio.sleep(self._fake_llm.ttft)
+        if self._fake_llm.fail:
+            raise APIConnectionError("Fake LLM is down", retryable=False)
+
+        if call is not None:
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", tool_calls=[call]),
+                )
+            )
+            return
+
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                await asyncio.sleep(1 / self._fake_llm.tokens_per_second)
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(
+                        role="assistant", content=word if i == 0 else f" {word}"
+                    ),
+                )
+            )
+
+
+class FakeTTS(tts.TTS):
+    """Non-streaming TTS producing a 220 Hz tone, ``seconds_per_word`` long.
+
+    With ``fail``, every request raises a connection error after ``ttfb``.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttfb: float = 0.15,
+        seconds_per_word: float = 0.3,
+        sample_rate: int = 24000,
+        fail: bool = False,
+    ) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+        self.seconds_per_word = seconds_per_word
+        self.fail = fail
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> FakeChunkedStream:
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    def __init__(
+        self, *, tts: FakeTTS, input_text: str, conn_options: APIConnectOptions
+    ) -> None:
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._fake_tts = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake = self._fake_tts
+        await asyncio.sleep(fake.ttfb)
+        if fake.fail:
+            raise APIConnectionError("Fake TTS is down", retryable=False)
+        output_emitter.initialize(
+            request_id=f"fake_{uuid.uuid4().hex[:12]}",
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        words = max(1, len(self.input_text.split()))
+        samples = int(words * fake.seconds_per_word * fake.sample_rate)
+        t = np.arange(samples) / fake.sample_rate
+        tone = (0.2 * 32767 * np.sin(2 * math.pi * 220 * t)).astype(np.int16)
+        chunk = fake.sample_rate // 10
+        for start in range(0, samples, chunk):
+            output_emitter.push(tone[start : start + chunk].tobytes())
+        output_emitter.flush()
+
+
+class FakeCacheBackend:
+    """In-memory ``prompt_cache.CacheBackend``, recording what it was asked.
+
+    Args:
+        latency: Seconds each creation takes
+        fail: Raise on every creation, as for a prefix too small to cache
+    """
+
+    def __init__(self, *, latency: float = 0.0, fail: bool = False) -> None:
+        self.latency = latency
+        self.fail = fail
+        self.created: list[StaticPrefix] = []
+
+    async def create(self, prefix: StaticPrefix, *, ttl: float) -> str:
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("Cached content is too small")
+        self.created.append(prefix)
+        return f"cachedContents/fake-{len(self.created)}"
+
+
+class FakeSipDialer:
+    """``transfer.SipDialer`` with scripted supervisor phones.
+
+    Args:
+        answer_after: Seconds until each number answers; numbers missing from
+            it, or mapped to None, ring until hung up
+        brief_seconds: How long the spoken briefing takes
+        fail: ``"brief"`` or ``"connect"``, to make that step raise
+    """
+
+    def __init__(
+        self,
+        answer_after: dict[str, float | None],
+        *,
+        brief_seconds: float = 0.0,
+        fail: str | None = None,
+    ) -> None:
+        self.answer_after = answer_after
+        self.brief_seconds = brief_seconds
+        self.fail = fail
+        # (seconds since creation, event, identity or number)
+        self.events: list[tuple[float, str, str]] = []
+        self._start = asyncio.get_running_loop().time()
+
+    def _log(self, event: str, subject: str) -> None:
+        elapsed = asyncio.get_running_loop().time() - self._start
+        self.events.append((elapsed, event, subject))
+
+    def happened(self, event: str) -> list[str]:
+        return [subject for _, e, subject in self.events if e == event]
+
+    async def dial(self, number: str, identity: str) -> None:
+        self._log("dial", number)
+        delay = self.answer_after.get(number)
+        if delay is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(delay)
+        self._log("answer", number)
+
+    async def hang_up(self, identity: str) -> None:
+        self._log("hang_up", identity)
+
+    async def brief(self, identity: str, text: str) -> None:
+        await asyncio.sleep(self.brief_seconds)
+        if self.fail == "brief":
+            raise ConnectionError("Briefing failed")
+        self._log("brief", text)
+
+    async def connect(self, identity: str) -> None:
+        if self.fail == "connect":
+            raise ConnectionError("Move failed")
+        self._log("connect", identity)
@@ -0,0 +1,139 @@
+"""Templated answers to store hours and department questions.
+
+Hours and departments come from static store data, yet through the LLM each
+question takes one round trip to call ``get_store_hours`` and another to word
+the answer. ``FastPath`` answers them directly from the final transcript when
+it is clearly one of those questions about a known store, e.g. "What are your
+hours in Burnaby?", or "When do you close?" after the caller chose a store.
+
+A question is only answered when every word in it is a question word, a
+store name, or a word for hours or departments. Anything else ("do you have
+a garden center", "what time do you close and do you have drills", another
+language) goes to the LLM as before, as do questions before a store is known.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from stores import StoreRegistry, normalize_store_name
+
+if TYPE_CHECKING:
+    from livekit.agents import llm
+
+logger = logging.getLogger("agent.fast_path")
+
+HOURS_WORDS = frozenset(
+    {"hours", "open", "opens", "opening", "close", "closes", "closing"}
+)
+DEPARTMENT_WORDS = frozenset({"department", "departments", "sections"})
+
+# Words that can surround an hours or departments question without changing it
+QUESTION_WORDS = frozenset(
+    {"what", "what's", "whats", "when", "which", "are", "is", "do", "does"}
+    | {"you", "your", "you're", "it", "they", "there", "we", "i", "me", "my"}
+    | {"the", "a", "an", "at", "in", "on", "for", "of", "to", "from", "until"}
+    | {"store", "stores", "location", "branch", "have", "has", "time", "times"}
+    | {"can", "could", "tell", "know", "like", "i'd", "want", "need", "please"}
+    | {"hi", "hello", "hey", "so", "and", "um", "uh", "okay", "ok", "oh", "just"}
+    | {"today", "tomorrow", "tonight", "weekend", "weekends", "this", "now"}
+    | {"monday", "tuesday", "wednesday", "thursday", "friday", "saturday"}
+    | {"sunday", "mondays", "saturdays", "sundays"}
+    | {"usual", "regular", "normal", "get", "got", "all", "kind", "kinds"}
+)
+
+FOLLOW_UP = "Is there anything else I can help you with?"
+
+_WORDS = re.compile(r"[a-z']+")
+_ON_THE_HOUR = re.compile(r":00\b")
+
+
+def _spoken_time(text: str) -> str:
+    """ "8:00 AM" -> "8 AM", "Monday - Saturday" -> "Monday to Saturday"."""
+    return _ON_THE_HOUR.sub("", text).replace(" - ", " to ")
+
+
+def _spoken_list(items: list[str]) -> str:
+    if len(items) <= 2:
+        return " and ".join(items)
+    return f"{', '.join(items[:-1])}, and {items[-1]}"
+
+
+def hours_answer(store: dict[str, Any]) -> str:
+    schedule = _spoken_list(
+        [
+            f"{_spoken_time(days)} from {_spoken_time(hours)}"
+            for days, hours in store["hours"].items()
+        ]
+    )
+    return f"Our {store['name']} store is open {schedule}. {FOLLOW_UP}"
+
+
+def departments_answer(store: dict[str, Any]) -> str:
+    departments = _spoken_list(store["departments"])
+    return f"Our {store['name']} store has {departments}. {FOLLOW_UP}"
+
+
+class FastPath:
+    """Answers hours and department questions from ``stores`` without the LLM."""
+
+    def __init__(self, stores: StoreRegistry) -> None:
+        self._stores = stores
+        self._store_words = frozenset(
+            word
+            for store in stores
+            for name in [store["name"], *store.get("aliases", [])]
+            for word in normalize_store_name(name).split()
+        )
+
+    def intent(self, text: str) -> str | None:
+        """ "hours" or "departments" if that's all ``text`` asks about."""
+        words = _WORDS.findall(text.lower())
+        hours = any(w in HOURS_WORDS for w in words)
+        departments = any(w in DEPARTMENT_WORDS for w in words)
+        if hours == departments:
+            return None
+        known = HOURS_WORDS | DEPARTMENT_WORDS | QUESTION_WORDS | self._store_words
+        if any(w not in known for w in words):
+            return None
+        return "hours" if hours else "departments"
+
+    def _names_store(self, text: str) -> bool:
+        """Whether ``text`` names any store, even ambiguously ("Oakville or Burnaby")."""
+        return any(w in self._store_words for w in normalize_store_name(text).split())
+
+    def answer_text(self, text: str, earlier: Iterable[str] = ()) -> str | None:
+        """The answer to ``text``, or None to leave it to the LLM.
+
+        The store is the one named in ``text``, or else the last one named in
+        ``earlier`` caller messages (most recent first).
+        """
+        intent = self.intent(text)
+        if intent is None:
+            return None
+        store = self._stores.find_in(text)
+        if store is None and not self._names_store(text):
+            store = next(filter(None, map(self._stores.find_in, earlier)), None)
+        if store is None:
+            return None
+
+        logger.info(f"Answering {intent} for {store['name']} without the LLM")
+        if intent == "hours":
+            return hours_answer(store)
+        return departments_answer(store)
+
+    def answer(self, chat_ctx: llm.ChatContext) -> str | None:
+        """The answer to the caller message ending ``chat_ctx``, if it has one."""
+        items = chat_ctx.items
+        if not items or items[-1].type != "message" or items[-1].role != "user":
+            # After a tool call, or not a caller turn
+            return None
+        earlier = [
+            item.text_content or ""
+            for item in reversed(items[:-1])
+            if item.type == "message" and item.role == "user"
+        ]
+        return self.answer_text(items[-1].text_content or "", earlier)
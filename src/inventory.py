@@ -0,0 +1,271 @@
+"""Async client for the store inventory service.
+
+One ``InventoryClient`` is created per worker process in ``prewarm`` and kept in
+``proc.userdata``. It owns a pooled ``aiohttp`` session so that every inventory
+lookup after the first reuses an already-open TCP/TLS connection instead of
+paying the handshake while the caller is waiting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Protocol
+
+import aiohttp
+
+logger = logging.getLogger("agent.inventory")
+
+DEFAULT_INVENTORY_API_URL = "http://127.0.0.1:8700"
+
+
+class InventoryBackend(Protocol):
+    """Anything that can answer an inventory lookup for a store."""
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]: ...
+
+
+class InventoryError(Exception):
+    """Raised when the inventory service cannot answer a lookup."""
+
+
+class InventoryUnavailableError(InventoryError):
+    """Raised without contacting the service while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. The first call after that is
+    let through as a trial: success closes the breaker, failure re-opens it.
+    Other calls are rejected while the trial is in flight; a trial that never
+    reports back (its caller was cancelled) is replaced after another
+    ``reset_timeout``.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Any = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_started: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+        now = self._clock()
+        if (
+            self._trial_started is not None
+            and now - self._trial_started < self.reset_timeout
+        ):
+            return False
+        self._trial_started = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        trial_failed = self.state == "half-open"
+        if trial_failed or (
+            self._opened_at is None and self._failures >= self.failure_threshold
+        ):
+            logger.warning(
+                "Inventory circuit breaker opened",
+                extra={"failures": self._failures},
+            )
+            self._opened_at = self._clock()
+        self._trial_started = None
+
+
+class InventoryClient:
+    """Pooled HTTP client for the inventory service.
+
+    The ``aiohttp`` session is created lazily on first use because ``prewarm``
+    runs before the job's event loop exists. LiveKit runs each job process for
+    a single call, so the session and its connections last one call;
+    ``warmup`` opens a connection as the call starts, and every lookup of the
+    call reuses it.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_INVENTORY_API_URL,
+        *,
+        api_key: str | None = None,
+        timeout: float = 2.0,
+        connect_timeout: float = 1.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.1,
+        pool_size: int = 20,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self._api_key = api_key
+        self._timeout = aiohttp.ClientTimeout(
+            total=timeout, sock_connect=connect_timeout
+        )
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+
+    @classmethod
+    def from_env(cls) -> InventoryClient:
+        """Build a client from ``INVENTORY_API_*`` environment variables."""
+        return cls(
+            os.getenv("INVENTORY_API_URL", DEFAULT_INVENTORY_API_URL),
+            api_key=os.getenv("INVENTORY_API_KEY"),
+            timeout=float(os.getenv("INVENTORY_API_TIMEOUT", "2.0")),
+            max_retries=int(os.getenv("INVENTORY_API_MAX_RETRIES", "2")),
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._session
+        if session is None or session.closed or self._session_loop is not loop:
+            headers = {"Accept": "application/json"}
+            if self._api_key:
+                headers["Authorization"] = f"Bearer {self._api_key}"
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._pool_size,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300,
+                ),
+                timeout=self._timeout,
+                headers=headers,
+            )
+            self._session = session
+            self._session_loop = loop
+        return session
+
+    async def warmup(self) -> None:
+        """Open a pooled connection ahead of the first real lookup."""
+        try:
+            async with self._get_session().get(f"{self.base_url}/health") as resp:
+                await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Inventory warmup failed: {e}")
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        """Return the stock record for ``item_name`` at ``store_id``.
+
+        Raises:
+            InventoryUnavailableError: If the circuit breaker is open.
+            InventoryError: If the service did not answer after all retries.
+        """
+        if not self.breaker.allow():
+            raise InventoryUnavailableError(
+                "Inventory service is temporarily unavailable"
+            )
+
+        url = f"{self.base_url}/stores/{store_id}/inventory"
+        last_error: Exception | None = None
+        for attempt in range(self._max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._retry_backoff * 2 ** (attempt - 1))
+            try:
+                async with self._get_session().get(
+                    url, params={"item": item_name}
+                ) as resp:
+                    if resp.status >= 500:
+                        last_error = InventoryError(
+                            f"Inventory service returned HTTP {resp.status}"
+                        )
+                        continue
+                    if resp.status >= 400:
+                        # Retrying won't help. A 404 is the service answering;
+                        # any other refusal (auth, rate limit) means lookups
+                        # can't get through, so it counts against the breaker.
+                        if resp.status == 404:
+                            self.breaker.record_success()
+                        else:
+                            self.breaker.record_failure()
+                        raise InventoryError(
+                            f"Inventory service rejected lookup: HTTP {resp.status}"
+                        )
+                    # A body that isn't JSON is retried like a server error
+                    data = await resp.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                last_error = e
+                continue
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure()
+        raise InventoryError(f"Inventory lookup failed: {last_error}") from last_error
+
+    async def aclose(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+async def lookup_many(
+    backend: InventoryBackend,
+    store_ids: list[str],
+    item_name: str,
+    *,
+    deadline: float = 1.5,
+) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    """Look up ``item_name`` at several stores concurrently.
+
+    Every store gets the same ``deadline`` in seconds. Stores that answer in
+    time are returned with their records; stores that fail or miss the
+    deadline are returned separately so the caller can still use the partial
+    result.
+
+    Returns:
+        A ``(records, unavailable)`` tuple: records keyed by store id, and the
+        ids of stores that did not answer.
+    """
+    tasks = {
+        asyncio.ensure_future(backend.lookup(store_id, item_name)): store_id
+        for store_id in store_ids
+    }
+    if not tasks:
+        return {}, []
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    records: dict[str, dict[str, Any]] = {}
+    unavailable = [tasks[task] for task in pending]
+    for task in done:
+        store_id = tasks[task]
+        if task.exception() is not None:
+            logger.warning(f"Inventory lookup at {store_id} failed: {task.exception()}")
+            unavailable.append(store_id)
+        else:
+            records[store_id] = task.result()
+    records = {sid: records[sid] for sid in store_ids if sid in records}
+    unavailable.sort(key=store_ids.index)
+    if pending:
+        logger.warning(
+            f"Inventory lookup missed the {deadline}s deadline at {len(pending)} stores"
+        )
+    return records, unavailable
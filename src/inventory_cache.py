@@ -0,0 +1,361 @@
+"""Cache in front of the inventory service.
+
+Entries are keyed on ``(store_id, normalized item name)`` and kept in LRU order
+with a bounded entry count. Each entry has a fresh window, during which it is
+served as-is, followed by a stale window, during which it is still served
+immediately while a single background refresh fetches a new value
+(stale-while-revalidate). Concurrent misses for the same key share one backend
+request.
+
+LiveKit runs each job process (or thread executor) for a single call, so the
+in-memory entries only last one call. ``SharedInventoryCache`` keeps them
+across calls, in a SQLite file shared by every job process of the worker
+(``INVENTORY_CACHE_DB_PATH``): a record another call fetched is read from it
+before the inventory service is asked, and new records are written to it in
+a worker thread, off the response path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Coroutine
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from inventory import InventoryBackend
+
+logger = logging.getLogger("agent.inventory_cache")
+
+CacheKey = tuple[str, str]
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS inventory (
+    store_id TEXT NOT NULL,
+    item TEXT NOT NULL,
+    value TEXT NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    PRIMARY KEY (store_id, item)
+)"""
+
+
+def default_db_path() -> Path:
+    return Path(
+        os.getenv("INVENTORY_CACHE_DB_PATH")
+        or Path(tempfile.gettempdir()) / "agent-inventory-cache.sqlite3"
+    )
+
+
+def normalize_item_name(item_name: str) -> str:
+    """Normalize an item name for use as a cache key.
+
+    Case, punctuation, and whitespace differences between otherwise identical
+    requests ("2x4s", "2X4s ", "2x4's") collapse to the same key.
+    """
+    text = _NON_WORD.sub("", item_name.lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def default_ttl(record: dict[str, Any]) -> float:
+    """Fresh TTL in seconds for an inventory record.
+
+    Low-stock and out-of-stock counts change quickly, so they are cached for
+    less time than well-stocked items.
+    """
+    quantity = record.get("quantity", 0)
+    if quantity < 10:
+        return 5.0
+    return 30.0
+
+
+@dataclass
+class _Entry:
+    value: dict[str, Any]
+    fresh_until: float
+    stale_until: float
+
+
+class SharedInventoryCache:
+    """Inventory cache entries in SQLite, shared by the worker's job processes.
+
+    Args:
+        path: The SQLite file
+        max_entries: Upper bound on stored records; those expiring first go
+            first once it is reached
+    """
+
+    def __init__(self, path: Path | None = None, *, max_entries: int = 10_000) -> None:
+        self.path = path or default_db_path()
+        self.max_entries = max_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=5.0)
+        # Readers don't wait on another process's write
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(_SCHEMA)
+        return db
+
+    def get(self, key: CacheKey) -> _Entry | None:
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT value, fresh_until, stale_until FROM inventory "
+                "WHERE store_id = ? AND item = ?",
+                key,
+            ).fetchone()
+        if row is None:
+            return None
+        value, fresh_until, stale_until = row
+        return _Entry(json.loads(value), fresh_until, stale_until)
+
+    def put(self, key: CacheKey, entry: _Entry, now: float) -> None:
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO inventory VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(entry.value), entry.fresh_until, entry.stale_until),
+            )
+            db.execute("DELETE FROM inventory WHERE stale_until <= ?", (now,))
+            db.execute(
+                "DELETE FROM inventory WHERE rowid IN (SELECT rowid FROM inventory "
+                "ORDER BY stale_until DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: CacheKey) -> None:
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM inventory WHERE store_id = ? AND item = ?", key)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    refresh_errors: int = 0
+    evictions: int = 0
+    hit_seconds: float = 0.0
+    miss_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        served = self.hits + self.stale_hits + self.shared_hits
+        lookups = served + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+            "hit_ratio": served / lookups if lookups else 0.0,
+            # Lookups answered by records an earlier call fetched
+            "shared_hit_ratio": self.shared_hits / lookups if lookups else 0.0,
+            "avg_hit_ms": 1000 * self.hit_seconds / served if served else 0.0,
+            "avg_miss_ms": 1000 * self.miss_seconds / self.misses
+            if self.misses
+            else 0.0,
+        }
+
+
+class InventoryCache:
+    """TTL/LRU cache with stale-while-revalidate around an inventory backend.
+
+    Args:
+        backend: The backend answering cache misses and refreshes
+        max_entries: Upper bound on cached records; least recently used go first
+        ttl: Fresh TTL in seconds, or a callable computing it per record
+        stale_ttl: How long past its fresh TTL a record may still be served
+            while it is refreshed in the background
+        shared: Entries shared with the worker's other calls
+        clock: Wall-clock time, as entries are shared with other processes
+        stats: Counters to add to, when several caches report together
+    """
+
+    def __init__(
+        self,
+        backend: InventoryBackend,
+        *,
+        max_entries: int = 10_000,
+        ttl: float | Callable[[dict[str, Any]], float] = default_ttl,
+        stale_ttl: float = 300.0,
+        shared: SharedInventoryCache | None = None,
+        clock: Callable[[], float] = time.time,
+        stats: CacheStats | None = None,
+    ) -> None:
+        self.backend = backend
+        self.max_entries = max_entries
+        self.shared = shared
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._inflight: dict[CacheKey, asyncio.Future[dict[str, Any]]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.stats = stats or CacheStats()
+
+    @classmethod
+    def from_env(
+        cls, backend: InventoryBackend, stats: CacheStats | None = None
+    ) -> InventoryCache:
+        """Build a cache sized from ``INVENTORY_CACHE_*`` environment variables.
+
+        ``INVENTORY_CACHE_SHARED=0`` keeps entries to the call that fetched them.
+        """
+        max_entries = int(os.getenv("INVENTORY_CACHE_MAX_ENTRIES", "10000"))
+        shared = None
+        if os.getenv("INVENTORY_CACHE_SHARED", "1") != "0":
+            shared = SharedInventoryCache(max_entries=max_entries)
+        return cls(
+            backend,
+            max_entries=max_entries,
+            stale_ttl=float(os.getenv("INVENTORY_CACHE_STALE_TTL", "300")),
+            shared=shared,
+            stats=stats,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(store_id: str, item_name: str) -> CacheKey:
+        return store_id, normalize_item_name(item_name)
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        """Return the record for ``item_name``, from cache when possible."""
+        start = time.perf_counter()
+        key = self.key(store_id, item_name)
+        entry = self._entries.get(key)
+        shared = False
+        if entry is None and self.shared is not None:
+            entry = await self._read_shared(key)
+            shared = entry is not None
+        now = self._clock()
+
+        if entry is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            if shared:
+                self.stats.shared_hits += 1
+            elif now < entry.fresh_until:
+                self.stats.hits += 1
+            else:
+                self.stats.stale_hits += 1
+            if now >= entry.fresh_until:
+                self._refresh(key, store_id, item_name)
+            self.stats.hit_seconds += time.perf_counter() - start
+            return entry.value
+
+        self.stats.misses += 1
+        try:
+            # Shielded so a caller hanging up doesn't cancel a load other
+            # callers are waiting on
+            return await asyncio.shield(self._load(key, store_id, item_name))
+        finally:
+            self.stats.miss_seconds += time.perf_counter() - start
+
+    def _load(
+        self, key: CacheKey, store_id: str, item_name: str
+    ) -> asyncio.Future[dict[str, Any]]:
+        """Return the in-flight load for ``key``, starting one if needed."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return future
+
+        async def load() -> dict[str, Any]:
+            try:
+                value = await self.backend.lookup(store_id, item_name)
+                self._store(key, value)
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        future = asyncio.ensure_future(load())
+        self._inflight[key] = future
+        return future
+
+    def _refresh(self, key: CacheKey, store_id: str, item_name: str) -> None:
+        if key in self._inflight:
+            return
+        self.stats.refreshes += 1
+
+        async def refresh() -> None:
+            try:
+                await self._load(key, store_id, item_name)
+            except Exception as e:
+                # Keep serving the stale value; the next stale hit retries
+                self.stats.refresh_errors += 1
+                logger.warning(f"Background inventory refresh failed: {e}")
+
+        self._spawn(refresh())
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read_shared(self, key: CacheKey) -> _Entry | None:
+        """The entry another call stored for ``key``, kept in memory if live."""
+        assert self.shared is not None
+        try:
+            entry = await asyncio.to_thread(self.shared.get, key)
+        except Exception as e:
+            logger.warning(f"Could not read the shared inventory cache: {e}")
+            return None
+        if entry is None or self._clock() >= entry.stale_until:
+            return None
+        # A load that finished while the file was read is newer
+        return self._entries.get(key) or self._remember(key, entry)
+
+    def _remember(self, key: CacheKey, entry: _Entry) -> _Entry:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        return entry
+
+    def _store(self, key: CacheKey, value: dict[str, Any]) -> None:
+        ttl = self._ttl(value) if callable(self._ttl) else self._ttl
+        now = self._clock()
+        entry = self._remember(
+            key,
+            _Entry(
+                value=value,
+                fresh_until=now + ttl,
+                stale_until=now + ttl + self._stale_ttl,
+            ),
+        )
+        if self.shared is not None:
+            self._spawn(self._write_shared(self.shared.put, key, entry, now))
+
+    async def _write_shared(self, write: Callable[..., None], *args: Any) -> None:
+        try:
+            await asyncio.to_thread(write, *args)
+        except Exception as e:
+            logger.warning(f"Could not write the shared inventory cache: {e}")
+
+    def invalidate(self, store_id: str, item_name: str) -> None:
+        key = self.key(store_id, item_name)
+        self._entries.pop(key, None)
+        if self.shared is not None:
+            self._spawn(self._write_shared(self.shared.delete, key))
+
+    async def aclose(self) -> None:
+        """Wait for background refreshes and shared-cache writes to finish."""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
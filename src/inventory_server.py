@@ -0,0 +1,98 @@
+"""Local stand-in for the inventory service.
+
+Serves the same API that ``InventoryClient`` talks to, with deterministic
+stock data derived from the item name, so the agent can be run and tested
+without the real backend:
+
+    uv run python src/inventory_server.py --port 8700
+
+Latency and failure injection (``--latency``, ``--failure-rate``) make it
+possible to exercise the client's timeouts, retries and circuit breaker.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import random
+from typing import Any
+
+from aiohttp import web
+
+AISLES = [
+    "Building Materials, Aisle 12",
+    "Power Tools, Aisle 4",
+    "Hand Tools, Aisle 5",
+    "Fasteners, Aisle 8",
+    "Paint, Aisle 15",
+    "Plumbing, Aisle 21",
+    "Electrical, Aisle 18",
+    "Garden, Aisle 30",
+]
+
+
+def stock_record(store_id: str, item_name: str) -> dict[str, Any]:
+    """Return a deterministic stock record for ``item_name`` at ``store_id``."""
+    digest = hashlib.sha256(f"{store_id}:{item_name.lower()}".encode()).digest()
+    quantity = int.from_bytes(digest[:2], "big") % 400
+    # Roughly one item in eight is out of stock
+    if digest[2] % 8 == 0:
+        quantity = 0
+    cents = 97 + 100 * (int.from_bytes(digest[3:5], "big") % 300)
+    return {
+        "item_name": item_name,
+        "store_id": store_id,
+        "in_stock": quantity > 0,
+        "quantity": quantity,
+        "price": f"${cents // 100}.{cents % 100:02d}",
+        "aisle": AISLES[digest[5] % len(AISLES)],
+    }
+
+
+def create_app(latency: float = 0.0, failure_rate: float = 0.0) -> web.Application:
+    """Build the stand-in application.
+
+    Args:
+        latency: Seconds to wait before answering each inventory request
+        failure_rate: Fraction of inventory requests answered with HTTP 503
+    """
+
+    async def health(_: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def inventory(request: web.Request) -> web.Response:
+        item_name = request.query.get("item")
+        if not item_name:
+            return web.json_response({"error": "missing 'item'"}, status=400)
+        if latency:
+            await asyncio.sleep(latency)
+        if failure_rate and random.random() < failure_rate:
+            return web.json_response({"error": "unavailable"}, status=503)
+        return web.json_response(
+            stock_record(request.match_info["store_id"], item_name)
+        )
+
+    app = web.Application()
+    app.add_routes(
+        [
+            web.get("/health", health),
+            web.get("/stores/{store_id}/inventory", inventory),
+        ]
+    )
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(latency=args.latency, failure_rate=args.failure_rate),
+        host=args.host,
+        port=args.port,
+    )
@@ -0,0 +1,211 @@
+"""Noise suppression on the caller's audio only while the line is noisy.
+
+Krisp BVC (``NOISE_CANCELLATION=bvc``, the default) cleans every caller's
+audio for the whole call, a large share of a 2-vCPU replica's CPU per call,
+even on quiet lines where it changes little. ``AdaptiveNoiseFilter``
+(``NOISE_CANCELLATION=adaptive``) estimates the signal-to-noise ratio of the
+incoming audio and runs WebRTC noise suppression only while it is below
+``NOISE_SNR_DB``. BVC runs inside the LiveKit FFI and can't be switched on
+and off mid-stream, so the adaptive stage uses the suppressor it can gate.
+
+The filter measures the CPU time it spends, analysis included, so calls can
+be compared by their audio-processing cost (``NoiseFilterStats``);
+``benchmarks/noise_cost.py`` compares that cost with transcript accuracy
+on recorded calls.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, fields
+from typing import Any
+
+import numpy as np
+from livekit import rtc
+
+logger = logging.getLogger("agent.noise_filter")
+
+MODES = ("bvc", "adaptive", "off")
+
+# Suppression switches off again this far above the threshold, so a line
+# near it doesn't flip every window
+HYSTERESIS_DB = 5.0
+
+
+def mode() -> str:
+    """The caller audio stage selected by ``NOISE_CANCELLATION``."""
+    selected = os.getenv("NOISE_CANCELLATION", "bvc").lower()
+    if selected not in MODES:
+        raise ValueError(
+            f"NOISE_CANCELLATION must be one of {', '.join(MODES)}, got {selected!r}"
+        )
+    return selected
+
+
+@dataclass
+class NoiseFilterStats:
+    frames: int = 0
+    suppressed_frames: int = 0
+    switches: int = 0
+    audio_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+    def add(self, other: NoiseFilterStats) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **vars(self),
+            "suppressed_ratio": (
+                self.suppressed_frames / self.frames if self.frames else 0.0
+            ),
+            "cpu_per_audio_second": (
+                self.cpu_seconds / self.audio_seconds if self.audio_seconds else 0.0
+            ),
+        }
+
+
+class SnrEstimator:
+    """Running signal-to-noise ratio, in dB, from the energy of short chunks.
+
+    The noise floor follows the quietest chunks, creeping up by
+    ``floor_rise_db`` per chunk so it recovers when the background gets
+    louder. The signal level averages the chunks well above the floor.
+
+    Args:
+        floor_rise_db: How fast the floor rises towards louder chunks
+        speech_margin_db: How far above the floor a chunk counts as speech
+        smoothing: Weight of each speech chunk in the signal level
+    """
+
+    def __init__(
+        self,
+        floor_rise_db: float = 0.02,
+        speech_margin_db: float = 10.0,
+        smoothing: float = 0.05,
+    ) -> None:
+        self.floor_rise_db = floor_rise_db
+        self.speech_margin_db = speech_margin_db
+        self.smoothing = smoothing
+        self.floor_db: float | None = None
+        self.signal_db: float | None = None
+
+    def update(self, energy_db: float) -> None:
+        if self.floor_db is None:
+            self.floor_db = energy_db
+        self.floor_db = min(energy_db, self.floor_db + self.floor_rise_db)
+        if energy_db > self.floor_db + self.speech_margin_db:
+            if self.signal_db is None:
+                self.signal_db = energy_db
+            self.signal_db += self.smoothing * (energy_db - self.signal_db)
+
+    @property
+    def snr_db(self) -> float | None:
+        """None until speech has been heard."""
+        if self.floor_db is None or self.signal_db is None:
+            return None
+        return self.signal_db - self.floor_db
+
+
+class AdaptiveNoiseFilter(rtc.FrameProcessor[rtc.AudioFrame]):
+    """Caller audio stage running noise suppression only on noisy lines.
+
+    One per call. Suppression starts on, until the caller has been heard,
+    and the decision is revisited every ``window`` seconds of audio.
+
+    Args:
+        snr_db: Suppression runs while the SNR is below this
+        window: Seconds of audio between decisions
+    """
+
+    def __init__(self, snr_db: float = 15.0, window: float = 1.0) -> None:
+        self.snr_threshold_db = snr_db
+        self.window = window
+        self.stats = NoiseFilterStats()
+        self.suppressing = True
+        self._enabled = True
+        self._snr = SnrEstimator()
+        self._apm = rtc.AudioProcessingModule(
+            noise_suppression=True, high_pass_filter=True
+        )
+        self._since_decision = 0.0
+
+    @classmethod
+    def from_env(cls) -> AdaptiveNoiseFilter:
+        """A filter with the threshold set by ``NOISE_SNR_DB``."""
+        return cls(snr_db=float(os.getenv("NOISE_SNR_DB", "15")))
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._enabled = value
+
+    def _process(self, frame: rtc.AudioFrame) -> rtc.AudioFrame:
+        start = time.thread_time()
+        chunk = frame.sample_rate // 100 * frame.num_channels
+        samples = np.frombuffer(frame.data, dtype=np.int16)
+        chunks = samples[: len(samples) // chunk * chunk].reshape(-1, chunk)
+        energy = np.mean(chunks.astype(np.float32) ** 2, axis=1)
+        for value in energy:
+            self._snr.update(10 * math.log10(float(value) + 1.0))
+
+        duration = frame.samples_per_channel / frame.sample_rate
+        self._since_decision += duration
+        if self._since_decision >= self.window:
+            self._since_decision = 0.0
+            self._decide()
+
+        if self.suppressing:
+            frame = self._suppress(frame, chunks)
+            self.stats.suppressed_frames += 1
+        self.stats.frames += 1
+        self.stats.audio_seconds += duration
+        self.stats.cpu_seconds += time.thread_time() - start
+        return frame
+
+    def _decide(self) -> None:
+        snr = self._snr.snr_db
+        if snr is None:
+            return
+        if self.suppressing:
+            suppress = snr < self.snr_threshold_db + HYSTERESIS_DB
+        else:
+            suppress = snr < self.snr_threshold_db
+        if suppress != self.suppressing:
+            self.suppressing = suppress
+            self.stats.switches += 1
+            logger.debug(
+                f"Noise suppression {'on' if suppress else 'off'} at {snr:.1f} dB SNR"
+            )
+
+    def _suppress(self, frame: rtc.AudioFrame, chunks: np.ndarray) -> rtc.AudioFrame:
+        # The APM takes 10 ms frames and cleans them in place; a partial
+        # chunk at the end is passed through as it is
+        out = np.frombuffer(frame.data, dtype=np.int16).copy()
+        per_channel = frame.sample_rate // 100
+        for i in range(len(chunks)):
+            piece = out[i * chunks.shape[1] : (i + 1) * chunks.shape[1]]
+            ten_ms = rtc.AudioFrame(
+                data=piece.tobytes(),
+                sample_rate=frame.sample_rate,
+                num_channels=frame.num_channels,
+                samples_per_channel=per_channel,
+            )
+            self._apm.process_stream(ten_ms)
+            piece[:] = np.frombuffer(ten_ms.data, dtype=np.int16)
+        return rtc.AudioFrame(
+            data=out.tobytes(),
+            sample_rate=frame.sample_rate,
+            num_channels=frame.num_channels,
+            samples_per_channel=frame.samples_per_channel,
+        )
+
+    def _close(self) -> None:
+        pass
@@ -0,0 +1,172 @@
+"""Pre-synthesized audio for the agent's fixed utterances.
+
+The greeting and the transfer announcements are the same on every call, so
+they are synthesized once and stored as raw 16-bit PCM next to the other model
+files (``$HF_HOME/phrase-audio``, i.e. ``/opt/models`` in the Docker image).
+Playback memory-maps the file and streams it into the session as audio frames,
+which removes TTS time-to-first-byte from the first thing a caller hears. The
+mapped pages are shared by every job process on the replica.
+
+Phrases are rendered at build time by ``download-files`` when TTS credentials
+are available, and otherwise on first use in the background.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts
+from livekit.agents.voice import SpeechHandle
+
+logger = logging.getLogger("agent.phrase_audio")
+
+FRAME_MS = 20
+
+
+def default_cache_dir() -> Path:
+    if path := os.getenv("PHRASE_AUDIO_DIR"):
+        return Path(path)
+    hf_home = os.getenv("HF_HOME", "~/.cache/huggingface")
+    return Path(hf_home).expanduser() / "phrase-audio"
+
+
+@dataclass
+class PhraseAudio:
+    """A rendered phrase, backed by a read-only memory map of its PCM file."""
+
+    text: str
+    sample_rate: int
+    num_channels: int
+    pcm: mmap.mmap
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (2 * self.num_channels * self.sample_rate)
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        samples_per_frame = self.sample_rate * FRAME_MS // 1000
+        frame_bytes = 2 * self.num_channels * samples_per_frame
+        for start in range(0, len(self.pcm), frame_bytes):
+            chunk = self.pcm[start : start + frame_bytes]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            )
+
+
+class PhraseAudioCache:
+    """On-disk cache of rendered phrases for one TTS voice.
+
+    Args:
+        voice: Identifies the TTS model and voice; part of every cache key, so
+            changing voices never plays stale audio
+        cache_dir: Where rendered ``.pcm`` files and their metadata live
+    """
+
+    def __init__(self, voice: str, cache_dir: Path | None = None) -> None:
+        self.voice = voice
+        self.cache_dir = cache_dir or default_cache_dir()
+        self._loaded: dict[str, PhraseAudio] = {}
+        self._rendering: dict[str, asyncio.Task[None]] = {}
+
+    def _path(self, text: str) -> Path:
+        key = hashlib.sha256(f"{self.voice}\n{text}".encode()).hexdigest()[:24]
+        return self.cache_dir / f"{key}.pcm"
+
+    def get(self, text: str) -> PhraseAudio | None:
+        """Return the rendered phrase for ``text``, or None if not rendered yet."""
+        if phrase := self._loaded.get(text):
+            return phrase
+        path = self._path(text)
+        try:
+            meta = json.loads(path.with_suffix(".json").read_text())
+            with open(path, "rb") as f:
+                pcm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        phrase = PhraseAudio(
+            text=text,
+            sample_rate=meta["sample_rate"],
+            num_channels=meta["num_channels"],
+            pcm=pcm,
+        )
+        self._loaded[text] = phrase
+        return phrase
+
+    async def render(self, tts_engine: tts.TTS, text: str) -> None:
+        """Synthesize ``text`` and store it, replacing any previous rendering."""
+        chunks: list[bytes] = []
+        sample_rate = num_channels = 0
+        async with tts_engine.synthesize(text) as stream:
+            async for audio in stream:
+                chunks.append(bytes(audio.frame.data))
+                sample_rate = audio.frame.sample_rate
+                num_channels = audio.frame.num_channels
+        if not chunks:
+            raise RuntimeError(f"TTS returned no audio for {text!r}")
+
+        path = self._path(text)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to temporary names and rename, so readers in other processes
+        # never map a partially written file
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(b"".join(chunks))
+        meta_tmp = path.with_suffix(f".{os.getpid()}.json.tmp")
+        meta_tmp.write_text(
+            json.dumps(
+                {
+                    "text": text,
+                    "voice": self.voice,
+                    "sample_rate": sample_rate,
+                    "num_channels": num_channels,
+                }
+            )
+        )
+        os.replace(tmp, path)
+        os.replace(meta_tmp, path.with_suffix(".json"))
+        self._loaded.pop(text, None)
+        logger.info(f"Rendered phrase audio to {path}")
+
+    async def render_all(self, tts_engine: tts.TTS, texts: list[str]) -> None:
+        """Render every phrase in ``texts`` that isn't cached yet."""
+        for text in texts:
+            if self.get(text) is None:
+                await self.render(tts_engine, text)
+
+    def say(
+        self, session: AgentSession, text: str, *, allow_interruptions: bool
+    ) -> SpeechHandle:
+        """Speak ``text`` from cached audio, falling back to live TTS.
+
+        On a miss the phrase is spoken through the session's TTS as usual and
+        rendered in the background, so later calls play it from the cache.
+        """
+        phrase = self.get(text)
+        if phrase is not None:
+            return session.say(
+                text, audio=phrase.frames(), allow_interruptions=allow_interruptions
+            )
+
+        if session.tts is not None and text not in self._rendering:
+            task = asyncio.create_task(self._render_in_background(session.tts, text))
+            self._rendering[text] = task
+        return session.say(text, allow_interruptions=allow_interruptions)
+
+    async def _render_in_background(self, tts_engine: tts.TTS, text: str) -> None:
+        try:
+            await self.render(tts_engine, text)
+        except Exception:
+            logger.exception(f"Failed to render phrase audio for {text!r}")
+            # Allow a later call to try again
+            self._rendering.pop(text, None)
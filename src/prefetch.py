@@ -0,0 +1,191 @@
+"""Speculative inventory lookups from interim transcripts.
+
+An inventory question normally waits for the end of the caller's turn, the
+LLM's decision to call ``inventory_check``, and then the lookup itself.
+``SpeculativePrefetcher`` watches the transcripts as they come in (interim
+ones included) and, once a catalog product and a store are both
+recognizable, starts that lookup in the background. When the tool call
+comes, its lookup takes the prefetched result, usually already complete.
+
+Only confident catalog matches are prefetched, under the same name
+``inventory_check`` looks up, and at most ``max_inflight`` speculative
+lookups run at a time. Prefetches no tool call uses within ``max_age``
+seconds are counted as wasted; ``PrefetchStats`` keeps the hit and waste
+rates for tuning.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from catalog import CatalogIndex
+from fast_path import QUESTION_WORDS
+from inventory import InventoryBackend
+from inventory_cache import CacheKey, normalize_item_name
+from stores import StoreRegistry, normalize_store_name
+
+logger = logging.getLogger("agent.prefetch")
+
+# Words around a product name in an inventory question
+ITEM_FILLER = QUESTION_WORDS | frozenset(
+    {"any", "some", "stock", "carry", "sell", "selling", "check", "checking"}
+    | {"looking", "buy", "buying", "find", "how", "much", "many", "cost", "price"}
+    | {"if", "whether", "see", "still", "left", "available", "or", "not", "would"}
+)
+
+_WORDS = re.compile(r"[a-z0-9'./-]+")
+
+
+@dataclass
+class PrefetchStats:
+    started: int = 0
+    hits: int = 0
+    wasted: int = 0
+    skipped_at_cap: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "skipped_at_cap": self.skipped_at_cap,
+            "hit_ratio": self.hits / self.started if self.started else 0.0,
+            "wasted_ratio": self.wasted / self.started if self.started else 0.0,
+        }
+
+
+@dataclass
+class _Prefetch:
+    future: asyncio.Future[dict[str, Any]]
+    started: float
+
+
+class SpeculativePrefetcher:
+    """Inventory backend serving lookups from speculative prefetches.
+
+    One per call: the store the caller named stays the default for later
+    transcripts.
+
+    Args:
+        backend: The backend prefetches and other lookups go to
+        catalog: Recognizes product names in transcripts
+        stores: Recognizes store names in transcripts
+        stats: Where hits and waste are counted, usually shared per process
+        max_inflight: Most speculative lookups running at once
+        max_age: Seconds an unused prefetch is kept before it counts as wasted
+    """
+
+    def __init__(
+        self,
+        backend: InventoryBackend,
+        catalog: CatalogIndex,
+        stores: StoreRegistry,
+        *,
+        stats: PrefetchStats | None = None,
+        max_inflight: int = 2,
+        max_age: float = 20.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.backend = backend
+        self._catalog = catalog
+        self._stores = stores
+        self.stats = stats or PrefetchStats()
+        self.max_inflight = max_inflight
+        self.max_age = max_age
+        self._clock = clock
+        self._store_words = frozenset(
+            word
+            for store in stores
+            for name in [store["name"], *store.get("aliases", [])]
+            for word in normalize_store_name(name).split()
+        )
+        self._store_id: str | None = None
+        self._prefetched: dict[CacheKey, _Prefetch] = {}
+
+    @classmethod
+    def from_env(
+        cls,
+        backend: InventoryBackend,
+        catalog: CatalogIndex,
+        stores: StoreRegistry,
+        stats: PrefetchStats,
+    ) -> SpeculativePrefetcher:
+        """Build a prefetcher limited by ``PREFETCH_MAX_INFLIGHT``."""
+        return cls(
+            backend,
+            catalog,
+            stores,
+            stats=stats,
+            max_inflight=int(os.getenv("PREFETCH_MAX_INFLIGHT", "2")),
+        )
+
+    def item_in(self, text: str) -> str | None:
+        """The catalog product ``text`` confidently asks about, if any."""
+        words = [
+            w
+            for w in _WORDS.findall(text.lower())
+            if w not in ITEM_FILLER and w not in self._store_words
+        ]
+        if not words:
+            return None
+        match = self._catalog.resolve(" ".join(words)).match
+        return match.name if match else None
+
+    def on_transcript(self, text: str) -> None:
+        """Start a lookup for what ``text`` asks about, if it's clear enough."""
+        self._expire()
+        store = self._stores.find_in(text)
+        if store is not None:
+            self._store_id = store["id"]
+        if self._store_id is None:
+            return
+        item = self.item_in(text)
+        if item is None:
+            return
+
+        key = (self._store_id, normalize_item_name(item))
+        if key in self._prefetched:
+            return
+        inflight = sum(not p.future.done() for p in self._prefetched.values())
+        if inflight >= self.max_inflight:
+            self.stats.skipped_at_cap += 1
+            return
+
+        future = asyncio.ensure_future(self.backend.lookup(self._store_id, item))
+        # Failures surface when the tool takes the result, or not at all
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._prefetched[key] = _Prefetch(future, self._clock())
+        self.stats.started += 1
+        logger.debug(f"Prefetching {item!r} at {self._store_id}")
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        prefetch = self._prefetched.pop(
+            (store_id, normalize_item_name(item_name)), None
+        )
+        if prefetch is not None:
+            self.stats.hits += 1
+            try:
+                return await asyncio.shield(prefetch.future)
+            except Exception as e:
+                # The backend may have recovered since; ask it again
+                logger.info(f"Prefetched lookup failed, retrying: {e}")
+        return await self.backend.lookup(store_id, item_name)
+
+    def _expire(self) -> None:
+        cutoff = self._clock() - self.max_age
+        for key, prefetch in list(self._prefetched.items()):
+            if prefetch.started < cutoff:
+                del self._prefetched[key]
+                self.stats.wasted += 1
+
+    def close(self) -> None:
+        """Count prefetches still unused at the end of the call as wasted."""
+        self.stats.wasted += len(self._prefetched)
+        self._prefetched.clear()
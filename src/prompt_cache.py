@@ -0,0 +1,337 @@
+"""Provider-side caching of the static prompt prefix for Gemini.
+
+The agent's instructions and tool schemas are the same on every LLM request
+of every call, yet the Google plugin sends them in full each time. Gemini can
+store that prefix as a cached context: requests then name the cache
+(``cached_content``) instead of resending it, and cached input tokens are
+billed at a discount and don't have to be processed again before the first
+token.
+
+``PromptCache`` creates the cached context on first use, keyed by a hash of
+the model, instructions and tool schemas, so editing the prompt or a tool
+creates a new one. Cache names are kept in a small JSON file
+(``PROMPT_CACHE_FILE``), so every job process of a worker, and every call
+they handle, reuses the same cache until shortly before it expires. If the
+cache can't be created (a prefix below Gemini's minimum cacheable size, a
+missing key) or a request rejects it, calls fall back to sending the prompt
+as before.
+
+``CacheBackend`` is the one provider call involved; ``GeminiCacheBackend``
+implements it with ``google-genai`` and ``fake_providers.FakeCacheBackend``
+offline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    from livekit.agents import Agent, ModelSettings, llm
+
+logger = logging.getLogger("agent.prompt_cache")
+
+
+def default_state_path() -> Path:
+    return Path(
+        os.getenv("PROMPT_CACHE_FILE")
+        or Path(tempfile.gettempdir()) / "hardware-store-agent-prompt-cache.json"
+    )
+
+
+@dataclass(frozen=True)
+class StaticPrefix:
+    """The part of every request that doesn't change between turns.
+
+    Args:
+        model: The model the cache is created for; caches are per model
+        instructions: The system instructions
+        tools: Tool declarations, as JSON-serializable dicts
+    """
+
+    model: str
+    instructions: str
+    tools: tuple[dict[str, Any], ...] = ()
+
+    def digest(self) -> str:
+        payload = json.dumps(
+            [self.model, self.instructions, list(self.tools)], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class CacheBackend(Protocol):
+    async def create(self, prefix: StaticPrefix, *, ttl: float) -> str:
+        """Create a cached context for ``prefix``; returns its name."""
+        ...
+
+
+class GeminiCacheBackend:
+    """Creates cached contents with the Gemini API."""
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    @classmethod
+    def from_env(cls) -> GeminiCacheBackend:
+        from google import genai
+
+        return cls(genai.Client(api_key=os.getenv("GOOGLE_API_KEY")))
+
+    async def create(self, prefix: StaticPrefix, *, ttl: float) -> str:
+        from google.genai import types
+
+        tools = None
+        if prefix.tools:
+            tools = [
+                types.Tool(
+                    function_declarations=[
+                        types.FunctionDeclaration.model_validate(tool)
+                        for tool in prefix.tools
+                    ]
+                )
+            ]
+        cached = await self._client.aio.caches.create(
+            model=prefix.model,
+            config=types.CreateCachedContentConfig(
+                display_name=f"hardware-store-agent-{prefix.digest()}",
+                system_instruction=prefix.instructions,
+                tools=tools,
+                ttl=f"{int(ttl)}s",
+            ),
+        )
+        return cached.name
+
+
+@dataclass
+class PromptCacheStats:
+    hits: int = 0
+    creates: int = 0
+    failures: int = 0
+    fallbacks: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return dict(vars(self))
+
+
+class PromptCache:
+    """Cached contexts for static prefixes, shared through a state file.
+
+    Args:
+        backend: Creates the cached contexts
+        ttl: Lifetime requested for each cached context, in seconds
+        refresh_before: A cache this close to expiring is replaced, so no
+            request names one that expires in flight
+        retry_after: After a failed creation, requests go uncached for this
+            long before trying again
+        path: The state file shared by the worker's processes
+        stats: Counters to add to, when several caches report together
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        *,
+        ttl: float = 3600.0,
+        refresh_before: float = 300.0,
+        retry_after: float = 600.0,
+        path: Path | None = None,
+        clock: Callable[[], float] = time.time,
+        stats: PromptCacheStats | None = None,
+    ) -> None:
+        if ttl <= refresh_before:
+            raise ValueError("ttl must be longer than refresh_before")
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_before = refresh_before
+        self.retry_after = retry_after
+        self.path = path or default_state_path()
+        self._clock = clock
+        # digest -> (name, expires_at); wall-clock times, as they are shared
+        # with other processes
+        self._entries: dict[str, tuple[str, float]] = {}
+        self._failed_until: dict[str, float] = {}
+        self._inflight: dict[str, asyncio.Future[str | None]] = {}
+        self._prefixes: dict[tuple[str, tuple[str, ...]], StaticPrefix] = {}
+        self.stats = stats or PromptCacheStats()
+
+    @classmethod
+    def from_env(
+        cls, backend: CacheBackend, stats: PromptCacheStats | None = None
+    ) -> PromptCache:
+        """Build a cache configured by ``PROMPT_CACHE_*`` environment variables."""
+        return cls(
+            backend, ttl=float(os.getenv("PROMPT_CACHE_TTL", "3600")), stats=stats
+        )
+
+    async def get(self, prefix: StaticPrefix) -> str | None:
+        """Return the name of a live cache for ``prefix``; None to send it uncached."""
+        digest = prefix.digest()
+        now = self._clock()
+        if now < self._failed_until.get(digest, 0.0):
+            return None
+
+        entry = self._entries.get(digest)
+        if entry is None or not self._fresh(entry, now):
+            # Another process may have created or refreshed it
+            entry = self._read_state().get(digest)
+        if entry is not None and self._fresh(entry, now):
+            self._entries[digest] = entry
+            self.stats.hits += 1
+            return entry[0]
+
+        # Requests racing to create the same cache share one creation; with
+        # the thread executor, only requests on the same event loop
+        future = self._inflight.get(digest)
+        if future is None or future.get_loop() is not asyncio.get_running_loop():
+            future = asyncio.ensure_future(self._create(digest, prefix))
+            self._inflight[digest] = future
+        return await asyncio.shield(future)
+
+    def _fresh(self, entry: tuple[str, float], now: float) -> bool:
+        return now < entry[1] - self.refresh_before
+
+    async def _create(self, digest: str, prefix: StaticPrefix) -> str | None:
+        try:
+            name = await self.backend.create(prefix, ttl=self.ttl)
+        except Exception as e:
+            self.stats.failures += 1
+            self._failed_until[digest] = self._clock() + self.retry_after
+            logger.warning(f"Could not create a prompt cache, sending it uncached: {e}")
+            return None
+        finally:
+            self._inflight.pop(digest, None)
+
+        self.stats.creates += 1
+        entry = (name, self._clock() + self.ttl)
+        self._entries[digest] = entry
+        self._write_state(digest, entry)
+        logger.info(f"Created prompt cache {name} for prefix {digest}")
+        return name
+
+    def invalidate(self, prefix: StaticPrefix) -> None:
+        """Forget the cache for ``prefix``, e.g. after a request rejected it."""
+        digest = prefix.digest()
+        self._entries.pop(digest, None)
+        self._write_state(digest, None)
+
+    def _read_state(self) -> dict[str, tuple[str, float]]:
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return {
+            digest: (entry["name"], entry["expires_at"])
+            for digest, entry in state.items()
+        }
+
+    def _write_state(self, digest: str, entry: tuple[str, float] | None) -> None:
+        now = self._clock()
+        state = {d: e for d, e in self._read_state().items() if e[1] > now}
+        if entry is None:
+            state.pop(digest, None)
+        else:
+            state[digest] = entry
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps(
+                    {d: {"name": n, "expires_at": e} for d, (n, e) in state.items()}
+                )
+            )
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save the prompt cache state: {e}")
+
+    def prefix_for(
+        self, model: str, instructions: str, tools: list[Any]
+    ) -> StaticPrefix:
+        """The static prefix the Google plugin would send for these tools."""
+        from livekit.agents import llm
+
+        key = (instructions, tuple(sorted(llm.ToolContext(tools).function_tools)))
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            from livekit.plugins.google.utils import create_tools_config
+
+            # Built as the plugin builds its requests; provider tools can't
+            # be sent alongside function tools, so they aren't either
+            config = create_tools_config(llm.ToolContext(tools), _only_single_type=True)
+            declarations = tuple(
+                declaration.model_dump(mode="json", exclude_none=True)
+                for tool in config
+                for declaration in tool.function_declarations or ()
+            )
+            prefix = StaticPrefix(model, instructions, declarations)
+            self._prefixes[key] = prefix
+        return prefix
+
+    async def llm_node(
+        self,
+        agent: Agent,
+        chat_ctx: llm.ChatContext,
+        tools: list[Any],
+        model_settings: ModelSettings,
+    ) -> AsyncIterator[llm.ChatChunk]:
+        """``Agent.llm_node`` sending the static prefix as a cached context."""
+        from livekit.agents import Agent, APIError
+
+        session_llm = agent.session.llm
+        prefix = self.prefix_for(session_llm.model, agent.instructions, tools)
+        name = await self.get(prefix)
+        if name is not None:
+            started = False
+            try:
+                # The cache holds the instructions and tools, and Gemini
+                # rejects requests that also set them
+                async with session_llm.chat(
+                    chat_ctx=without_instructions(chat_ctx, agent.instructions),
+                    tools=[],
+                    extra_kwargs={"cached_content": name},
+                ) as stream:
+                    async for chunk in stream:
+                        started = True
+                        yield chunk
+                return
+            except APIError as e:
+                if started:
+                    raise
+                # Deleted or expired early: recreate it on the next turn
+                self.stats.fallbacks += 1
+                self.invalidate(prefix)
+                logger.warning(f"Prompt cache {name} rejected, sending uncached: {e}")
+
+        async for chunk in Agent.default.llm_node(
+            agent, chat_ctx, tools, model_settings
+        ):
+            yield chunk
+
+
+def without_instructions(
+    chat_ctx: llm.ChatContext, instructions: str
+) -> llm.ChatContext:
+    """``chat_ctx`` without the cached instructions.
+
+    Other system messages, such as the chat summary, can't be sent as system
+    instructions alongside a cached context, so they become user messages.
+    """
+    from livekit.agents import llm
+
+    items: list[llm.ChatItem] = []
+    for item in chat_ctx.items:
+        if item.type == "message" and item.role in ("system", "developer"):
+            if item.text_content == instructions:
+                continue
+            item = item.model_copy(update={"role": "user"})
+        items.append(item)
+    return llm.ChatContext(items)
@@ -0,0 +1,184 @@
+"""STT, LLM and TTS providers, imported only when configured.
+
+Importing a LiveKit plugin pulls in its vendor SDK (``google-genai``,
+``openai``, ``onnxruntime``, ...), and some take hundreds of milliseconds.
+The agent module therefore imports none of them. ``import_configured``
+imports the VAD and noise cancellation plugins, which every call uses, and
+the providers selected by ``STT_PROVIDER``, ``LLM_PROVIDER`` and
+``TTS_PROVIDER``:
+
+- in ``prewarm``, so job processes import them while idle, before a call
+- in the main worker process only when it needs them: for ``download-files``,
+  and with the thread executor, where calls run in the main process
+
+Plugins register themselves on import and LiveKit requires that to happen on
+the main thread, which both of those places are. Fallback providers
+(``STT_FALLBACK_PROVIDER``, ...; see ``failover``) are imported the same way.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger("agent.providers")
+
+KINDS = ("stt", "llm", "tts")
+
+# Plugins every call needs, whatever the configured providers
+REQUIRED_PLUGINS = ("livekit.plugins.silero", "livekit.plugins.noise_cancellation")
+
+
+@dataclass(frozen=True)
+class Provider:
+    """How to build one provider's STT, LLM or TTS.
+
+    Args:
+        module: The LiveKit plugin module to import
+        cls: The class to instantiate from that module
+        kwargs: Model and voice settings passed to ``cls``
+        api_key_env: Environment variable holding the vendor API key
+        http_session: Whether ``cls`` accepts an ``http_session`` argument
+    """
+
+    module: str
+    cls: str
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    api_key_env: str | None = None
+    http_session: bool = True
+
+
+PROVIDERS: dict[str, dict[str, Provider]] = {
+    "stt": {
+        "deepgram": Provider(
+            "livekit.plugins.deepgram",
+            "STT",
+            {"model": "nova-3", "language": "en"},
+            api_key_env="DEEPGRAM_API_KEY",
+        ),
+        "elevenlabs": Provider(
+            "livekit.plugins.elevenlabs", "STT", api_key_env="ELEVEN_API_KEY"
+        ),
+        "openai": Provider(
+            "livekit.plugins.openai",
+            "STT",
+            {"model": "gpt-4o-transcribe"},
+            api_key_env="OPENAI_API_KEY",
+            http_session=False,
+        ),
+    },
+    "llm": {
+        "google": Provider(
+            "livekit.plugins.google",
+            "LLM",
+            {"model": "gemini-2.5-flash"},
+            api_key_env="GOOGLE_API_KEY",
+            http_session=False,
+        ),
+        "openai": Provider(
+            "livekit.plugins.openai",
+            "LLM",
+            {"model": "gpt-4.1-mini"},
+            api_key_env="OPENAI_API_KEY",
+            http_session=False,
+        ),
+    },
+    "tts": {
+        "cartesia": Provider(
+            "livekit.plugins.cartesia",
+            "TTS",
+            {"model": "sonic-3", "voice": "9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"},
+            api_key_env="CARTESIA_API_KEY",
+        ),
+        "elevenlabs": Provider(
+            "livekit.plugins.elevenlabs", "TTS", api_key_env="ELEVEN_API_KEY"
+        ),
+        "openai": Provider(
+            "livekit.plugins.openai",
+            "TTS",
+            {"model": "gpt-4o-mini-tts", "voice": "ash"},
+            api_key_env="OPENAI_API_KEY",
+            http_session=False,
+        ),
+    },
+}
+
+DEFAULTS = {"stt": "deepgram", "llm": "google", "tts": "cartesia"}
+
+
+def _lookup(kind: str, name: str, variable: str) -> Provider:
+    try:
+        return PROVIDERS[kind][name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown {variable} {name!r}, "
+            f"expected one of: {', '.join(PROVIDERS[kind])}"
+        ) from None
+
+
+def configured(kind: str) -> tuple[str, Provider]:
+    """Return the name and settings of the provider configured for ``kind``."""
+    name = os.getenv(f"{kind.upper()}_PROVIDER", DEFAULTS[kind]).lower()
+    return name, _lookup(kind, name, f"{kind.upper()}_PROVIDER")
+
+
+def candidates(kind: str) -> list[str]:
+    """The configured provider for ``kind`` followed by its fallbacks.
+
+    Fallbacks are a comma-separated ``{KIND}_FALLBACK_PROVIDER`` list.
+    """
+    names = [configured(kind)[0]]
+    variable = f"{kind.upper()}_FALLBACK_PROVIDER"
+    for name in os.getenv(variable, "").lower().split(","):
+        name = name.strip()
+        if name:
+            _lookup(kind, name, variable)
+            names.append(name)
+    return list(dict.fromkeys(names))
+
+
+def import_configured() -> dict[str, float]:
+    """Import the configured providers' plugins; returns seconds per module.
+
+    Modules that are already imported cost nothing and are not listed.
+    """
+    modules = [
+        *REQUIRED_PLUGINS,
+        *(PROVIDERS[kind][name].module for kind in KINDS for name in candidates(kind)),
+    ]
+    timings: dict[str, float] = {}
+    for module in dict.fromkeys(modules):
+        start = time.perf_counter()
+        importlib.import_module(module)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.001:
+            timings[module] = elapsed
+            logger.info(f"Imported {module} in {elapsed:.3f}s")
+    return timings
+
+
+def build(kind: str, name: str | None = None, **kwargs: Any) -> Any:
+    """Instantiate the provider ``name`` for ``kind``, by default the configured one.
+
+    ``http_session`` is dropped for providers that manage their own client.
+    """
+    provider = configured(kind)[1] if name is None else PROVIDERS[kind][name]
+    if not provider.http_session:
+        kwargs.pop("http_session", None)
+    module = importlib.import_module(provider.module)
+    return getattr(module, provider.cls)(**{**provider.kwargs, **kwargs})
+
+
+def has_api_key(kind: str, name: str | None = None) -> bool:
+    provider = configured(kind)[1] if name is None else PROVIDERS[kind][name]
+    return provider.api_key_env is None or bool(os.getenv(provider.api_key_env))
+
+
+def voice_id() -> str:
+    """Identifies the configured TTS model and voice, e.g. for cached audio."""
+    name, provider = configured("tts")
+    return "/".join([name, *(str(v) for v in provider.kwargs.values())])
@@ -0,0 +1,62 @@
+"""Models loaded once per worker process and shared by all of its jobs.
+
+With the default process executor every call runs in its own job process, and
+``prewarm`` loads a private copy of each model there. With
+``JOB_EXECUTOR=thread`` calls run as threads of a single process, and
+``prewarm`` runs once per job executor; these getters make sure each model is
+loaded only once and the same read-only instance serves every call:
+
+- Silero VAD: one ONNX inference session. Each call opens its own stream with
+  its own recurrent state, and ``InferenceSession.run`` is thread-safe.
+- The catalog index: plain NumPy arrays that are only read after loading.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from catalog import CatalogIndex, load_catalog
+
+if TYPE_CHECKING:
+    from livekit.plugins import silero
+
+logger = logging.getLogger("agent.shared_models")
+
+JOB_EXECUTORS = ("process", "thread")
+
+_lock = threading.Lock()
+_vad: silero.VAD | None = None
+_catalog: CatalogIndex | None = None
+
+
+def job_executor() -> str:
+    """The job executor selected by ``JOB_EXECUTOR``: "process" or "thread"."""
+    executor = os.getenv("JOB_EXECUTOR", "process").lower()
+    if executor not in JOB_EXECUTORS:
+        raise ValueError(
+            f"JOB_EXECUTOR must be one of {', '.join(JOB_EXECUTORS)}, got {executor!r}"
+        )
+    return executor
+
+
+def shared_vad() -> silero.VAD:
+    global _vad
+    with _lock:
+        if _vad is None:
+            from livekit.plugins import silero
+
+            _vad = silero.VAD.load()
+            logger.info("Silero VAD loaded")
+        return _vad
+
+
+def shared_catalog() -> CatalogIndex:
+    global _catalog
+    with _lock:
+        if _catalog is None:
+            _catalog = load_catalog()
+            logger.info(f"Catalog index loaded ({len(_catalog)} products)")
+        return _catalog
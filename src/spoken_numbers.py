@@ -0,0 +1,214 @@
+"""Numbers in the agent's replies rewritten as words for TTS.
+
+The LLM copies prices, quantities, aisles and times from tool results as
+written ("$4.97", "1200", "Aisle 12", "8:00 AM"), and they are rewritten
+here on the way to TTS ("four dollars and ninety-seven cents", "twelve
+hundred", "Aisle twelve", "eight AM"). That keeps the wording out of the
+LLM's output tokens, and it is the same every time.
+
+Product names keep their meaning: inch fractions are read as fractions
+("7-1/4 in" is "seven and a quarter inch"), phone numbers and SKUs digit by
+digit, and what can't be read unambiguously ("#8", "14/2", "8-10") is left
+for TTS as written. The words are English, so replies in other languages
+are passed through unchanged; the prompt asks the LLM to write their
+numbers as words itself.
+
+The reply streams through ``SpokenNumbers`` as the LLM writes it. Only the
+last, possibly incomplete word is held back ("$4" may be followed by
+".97"), so speech starts as early as it did without the rewriting.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import AsyncIterable, AsyncIterator
+
+ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight",
+    "nine", "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen",
+    "sixteen", "seventeen", "eighteen", "nineteen",
+]  # fmt: skip
+TENS = [
+    "", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty",
+    "ninety",
+]  # fmt: skip
+SCALES = [(10**9, "billion"), (10**6, "million"), (1000, "thousand")]
+
+_NUMBER = r"\d{1,3}(?:,\d{3})+|\d+"
+_PHONE = r"(?:\+?1[-. ])?(?:\(\d{3}\) ?|\d{3}[-. ])?\d{3}[-. ]\d{4}"
+# Not inside a word, a model number ("DCD771C2"), a longer number, a number
+# sign ("#8") or a range ("8-10")
+_PATTERN = re.compile(
+    rf"(?<![\w.,$#/-])(?:"
+    rf"(?P<phone>{_PHONE})"
+    rf"|\$(?P<dollars>{_NUMBER})(?:\.(?P<cents>\d{{2}}))?"
+    rf"|(?P<hour>\d{{1,2}}):(?P<minute>\d{{2}})"
+    rf"|(?P<width>\d+)x(?P<length>\d+)(?P<plural>s)?"
+    rf"|(?:(?P<whole>\d+)-)?(?P<numerator>\d+)/(?P<denominator>\d+)(?P<inch> in\b)?"
+    rf"|(?P<digits>\d{{5,}})"
+    rf"|(?P<number>{_NUMBER})(?:\.(?P<fraction>\d+))?(?P<percent>%)?"
+    rf")(?![\w$%#/-]|[.,:]\d)"
+)
+# A fraction at the end of streamed text may still be followed by " in"
+_TRAILING_FRACTION = re.compile(r"\d/\d+\s+$")
+
+ORDINALS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}  # fmt: skip
+
+# Words that nearly every English sentence of a few words contains, and
+# that the callers' other languages don't use
+ENGLISH_WORDS = frozenset(
+    {"the", "i'm", "you", "your", "we", "it", "it's", "this", "that", "my"}
+    | {"does", "is", "are", "have", "has", "can", "could", "would", "will"}
+    | {"what", "where", "when", "how", "which", "and", "of", "for", "with"}
+    | {"yes", "yeah", "please", "thanks", "thank", "hello", "hi", "need", "want"}
+    | {"looking", "about", "any", "store", "calling", "just", "know", "get"}
+)
+_WORDS = re.compile(r"[a-z']+")
+
+
+def number_words(n: int) -> str:
+    """1200 -> "twelve hundred", 47 -> "forty-seven"."""
+    if n < 20:
+        return ONES[n]
+    if n < 100:
+        return TENS[n // 10] + (f"-{ONES[n % 10]}" if n % 10 else "")
+    if n < 1000 or (n < 10000 and n % 100 == 0 and n % 1000 != 0):
+        hundreds = f"{number_words(n // 100)} hundred"
+        return f"{hundreds} {number_words(n % 100)}" if n % 100 else hundreds
+    for scale, name in SCALES:
+        if n >= scale:
+            head = f"{number_words(n // scale)} {name}"
+            return f"{head} {number_words(n % scale)}" if n % scale else head
+    raise AssertionError("unreachable")
+
+
+def price_words(dollars: int, cents: int) -> str:
+    """(4, 97) -> "four dollars and ninety-seven cents"."""
+    parts = []
+    if dollars or not cents:
+        parts.append(f"{number_words(dollars)} dollar{'' if dollars == 1 else 's'}")
+    if cents:
+        parts.append(f"{number_words(cents)} cent{'' if cents == 1 else 's'}")
+    return " and ".join(parts)
+
+
+def time_words(hour: int, minute: int) -> str:
+    """(8, 0) -> "eight", (8, 5) -> "eight oh five", (8, 30) -> "eight thirty"."""
+    if minute == 0:
+        return number_words(hour)
+    if minute < 10:
+        return f"{number_words(hour)} oh {number_words(minute)}"
+    return f"{number_words(hour)} {number_words(minute)}"
+
+
+def ordinal_words(n: int) -> str:
+    """8 -> "eighth", 16 -> "sixteenth", 32 -> "thirty-second"."""
+    words = number_words(n)
+    head, last = re.match(r"(.*?)(\w+)$", words).groups()
+    if last in ORDINALS:
+        return head + ORDINALS[last]
+    if last.endswith("y"):
+        return f"{head}{last[:-1]}ieth"
+    return f"{words}th"
+
+
+def fraction_words(numerator: int, denominator: int) -> str | None:
+    """(1, 4) -> "a quarter", (5, 8) -> "five eighths"; None if not a fraction."""
+    if not 0 < numerator < denominator:
+        return None
+    if denominator == 2:
+        return "a half"
+    name = "quarter" if denominator == 4 else ordinal_words(denominator)
+    if numerator == 1:
+        return f"a {name}"
+    return f"{number_words(numerator)} {name}s"
+
+
+def digit_words(text: str) -> str:
+    """ "905-555-1234" -> "nine zero five, five five five, one two three four"."""
+    return ", ".join(
+        " ".join(ONES[int(d)] for d in group) for group in re.findall(r"\d+", text)
+    )
+
+
+def is_english(text: str) -> bool | None:
+    """Whether ``text`` is English; None when it is too short to tell."""
+    words = _WORDS.findall(text.lower())
+    if any(word in ENGLISH_WORDS for word in words):
+        return True
+    return None if len(words) < 3 else False
+
+
+def _integer(text: str) -> int:
+    return int(text.replace(",", ""))
+
+
+def _spoken(match: re.Match[str]) -> str:
+    if match["phone"] is not None or match["digits"] is not None:
+        return digit_words(match[0])
+    if match["numerator"] is not None:
+        words = fraction_words(int(match["numerator"]), int(match["denominator"]))
+        if words is None:
+            return match[0]
+        if match["whole"] is not None:
+            words = f"{number_words(int(match['whole']))} and {words}"
+        return f"{words} inch" if match["inch"] else words
+    if match["dollars"] is not None:
+        return price_words(_integer(match["dollars"]), int(match["cents"] or 0))
+    if match["hour"] is not None:
+        return time_words(int(match["hour"]), int(match["minute"]))
+    if match["width"] is not None:
+        length = number_words(int(match["length"]))
+        if match["plural"]:
+            length = f"{length}es" if length.endswith("x") else f"{length}s"
+        return f"{number_words(int(match['width']))} by {length}"
+    words = number_words(_integer(match["number"]))
+    if match["fraction"] is not None:
+        words += " point " + " ".join(ONES[int(d)] for d in match["fraction"])
+    if match["percent"]:
+        words += " percent"
+    return words
+
+
+def spoken(text: str) -> str:
+    """``text`` with its prices, times, dimensions and numbers in words."""
+    return _PATTERN.sub(_spoken, text)
+
+
+class SpokenNumbers:
+    """Rewrites numbers in text that arrives in arbitrary chunks."""
+
+    def __init__(self) -> None:
+        self._pending = ""
+
+    def push(self, chunk: str) -> str:
+        """The rewritten text that is complete so far (up to the last space).
+
+        A fraction is held back with the word after it, which may be "in".
+        """
+        self._pending += chunk
+        end = max(self._pending.rfind(" "), self._pending.rfind("\n")) + 1
+        if fraction := _TRAILING_FRACTION.search(self._pending, 0, end):
+            end = self._pending.rfind(" ", 0, fraction.start()) + 1
+        if end == 0:
+            return ""
+        ready, self._pending = self._pending[:end], self._pending[end:]
+        return spoken(ready)
+
+    def flush(self) -> str:
+        """The rest of the text, at the end of the reply."""
+        ready, self._pending = self._pending, ""
+        return spoken(ready)
+
+
+async def spoken_stream(text: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Rewrite a streamed reply chunk by chunk."""
+    normalizer = SpokenNumbers()
+    async for chunk in text:
+        if ready := normalizer.push(chunk):
+            yield ready
+    if rest := normalizer.flush():
+        yield rest
@@ -0,0 +1,97 @@
+"""Cold-start profile: where a new replica's time goes before it takes calls.
+
+Stages are timed with ``StartupProfile.stage(name)``: provider imports and
+each step of ``prewarm``. Each ``prewarm`` run times itself in a profile of
+its own, kept in ``proc.userdata["startup_profile"]``, and logs it when it
+finishes, so every process's cold start shows up in the logs.
+``python src/agent.py profile-startup`` runs the same startup once in a fresh
+process and prints it, together with the time spent starting the interpreter
+and importing the agent's own modules:
+
+    uv run python src/agent.py profile-startup [--json profile.json]
+
+For a per-module import breakdown, use ``python -X importtime``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import psutil
+
+logger = logging.getLogger("agent.startup")
+
+
+def seconds_since_process_start() -> float:
+    return time.time() - psutil.Process().create_time()
+
+
+class StartupProfile:
+    """Named startup stages and their durations, in the order they ran."""
+
+    def __init__(self) -> None:
+        self.stages: list[tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.stages.append((name, seconds))
+
+    def total(self, prefix: str = "") -> float:
+        return sum(s for name, s in self.stages if name.startswith(prefix))
+
+    def summary(self, prefix: str = "") -> str:
+        """One line, e.g. for a log message: ``vad 0.41s, catalog 0.02s``."""
+        return ", ".join(
+            f"{name.removeprefix(prefix)} {seconds:.2f}s"
+            for name, seconds in self.stages
+            if name.startswith(prefix)
+        )
+
+    def report(self) -> str:
+        width = max((len(name) for name, _ in self.stages), default=0)
+        lines = [f"{name:<{width}}  {seconds:7.3f}s" for name, seconds in self.stages]
+        lines.append(
+            f"{'time to ready':<{width}}  {seconds_since_process_start():7.3f}s"
+        )
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stages": [{"name": n, "seconds": s} for n, s in self.stages],
+            "time_to_ready": seconds_since_process_start(),
+        }
+
+
+profile = StartupProfile()
+
+
+def profile_startup(prewarm_fnc: Any, json_path: Path | None = None) -> None:
+    """Profile the worker's cold start once and print it.
+
+    Runs ``prewarm_fnc`` the way a job process would, after recording how long
+    the interpreter and module imports took to get here.
+    """
+    from types import SimpleNamespace
+
+    profile.record("interpreter and imports", seconds_since_process_start())
+    # prewarm only uses the process's userdata
+    proc = SimpleNamespace(userdata={})
+    prewarm_fnc(proc)
+    profile.stages.extend(proc.userdata["startup_profile"].stages)
+
+    print(profile.report())
+    if json_path:
+        json_path.write_text(json.dumps(profile.as_dict(), indent=2))
@@ -0,0 +1,150 @@
+"""Store locations, loaded from ``data/stores.json`` (or ``STORES_PATH``).
+
+``StoreRegistry`` indexes every store by its normalized name and aliases, so
+"the Burnaby store" or "Bayers Lake" resolve with a dictionary lookup. Names
+that miss the index (ASR misspellings like "Oakvile" or "Burnabee") fall back
+to a fuzzy match over the indexed keys, which must clearly beat the next
+closest store.
+
+The registry also writes the store section of the system prompt. The prompt
+lists store names only, or just the number of stores when there are many;
+hours and departments come from the tools when a caller asks, so the prompt
+(and time-to-first-token on every LLM request) doesn't grow with each store.
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+import logging
+import os
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("agent.stores")
+
+DEFAULT_STORES_PATH = Path(__file__).parent / "data" / "stores.json"
+
+# Words callers wrap around a store name: "the Burnaby store", "your Oakville
+# location"
+FILLER_WORDS = frozenset(
+    {"the", "a", "our", "your", "in", "at", "on", "one"}
+    | {"store", "stores", "location", "locations", "branch"}
+)
+
+# Fuzzy matches must score at least this, and beat the runner-up by the margin
+MIN_SIMILARITY = 0.75
+MIN_MARGIN = 0.08
+
+# Above this many stores, the prompt gives a count instead of every name
+MAX_PROMPT_NAMES = 20
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_store_name(text: str) -> str:
+    words = _NON_ALNUM.sub(" ", text.lower()).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+class StoreRegistry:
+    """Store records keyed by ID, with a name and alias index.
+
+    Each store is a dict with ``id``, ``name``, ``hours`` and ``departments``,
+    and optionally ``aliases``.
+    """
+
+    def __init__(self, stores: list[dict[str, Any]]) -> None:
+        self._stores = {store["id"]: store for store in stores}
+        self._index: dict[str, str] = {}
+        for store in stores:
+            for name in [store["name"], *store.get("aliases", [])]:
+                key = normalize_store_name(name)
+                other = self._index.setdefault(key, store["id"])
+                if other != store["id"]:
+                    raise ValueError(f"Store name {name!r} is used by two stores")
+        # Space-free keys, so "oak ville" and "bayerslake" match too
+        self._compact = {key.replace(" ", ""): sid for key, sid in self._index.items()}
+        self._max_words = max((len(key.split()) for key in self._index), default=0)
+
+    @classmethod
+    def from_json(cls, path: str | Path) -> StoreRegistry:
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._stores)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self._stores.values())
+
+    def by_id(self, store_id: str) -> dict[str, Any] | None:
+        return self._stores.get(store_id)
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        """Resolve a spoken store name or alias; None if unknown or ambiguous."""
+        key = normalize_store_name(name)
+        compact = key.replace(" ", "")
+        store_id = self._index.get(key) or self._compact.get(compact)
+        if store_id is None and compact:
+            store_id = self._fuzzy(compact)
+        return self._stores[store_id] if store_id else None
+
+    def find_in(self, text: str) -> dict[str, Any] | None:
+        """The one store named word for word in ``text``, e.g. a whole sentence.
+
+        Unlike ``get`` there is no fuzzy matching, and a sentence naming two
+        different stores gives None.
+        """
+        words = normalize_store_name(text).split()
+        found = {
+            self._index[key]
+            for size in range(1, self._max_words + 1)
+            for start in range(len(words) - size + 1)
+            if (key := " ".join(words[start : start + size])) in self._index
+        }
+        return self._stores[found.pop()] if len(found) == 1 else None
+
+    def _fuzzy(self, compact: str) -> str | None:
+        scores: dict[str, float] = {}
+        for key, store_id in self._compact.items():
+            score = difflib.SequenceMatcher(None, compact, key).ratio()
+            scores[store_id] = max(score, scores.get(store_id, 0.0))
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_id, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best < MIN_SIMILARITY or best - runner_up < MIN_MARGIN:
+            return None
+        logger.debug(f"Fuzzy store match {compact!r} -> {best_id} ({best:.2f})")
+        return best_id
+
+    def names(self) -> str:
+        """Every store name, for messages: "Oakville, Burnaby, or Halifax"."""
+        names = [store["name"] for store in self]
+        if len(names) <= 2:
+            return " or ".join(names)
+        return f"{', '.join(names[:-1])}, or {names[-1]}"
+
+    def location_question(self) -> str:
+        """How the agent asks which store the caller wants."""
+        if len(self) > MAX_PROMPT_NAMES:
+            return "Which of our locations can I help you with today?"
+        return f"Which of our locations can I help you with today: {self.names()}?"
+
+    def prompt_section(self) -> str:
+        """The store part of the system prompt."""
+        if len(self) > MAX_PROMPT_NAMES:
+            return (
+                f"We have {len(self)} store locations. Ask the caller which one "
+                "they mean; the tools recognize the location's name or area."
+            )
+        return f"Our store locations are {self.names()}."
+
+
+def load_stores(path: str | Path | None = None) -> StoreRegistry:
+    """Load the stores at ``path`` (default: ``STORES_PATH`` or the bundled file)."""
+    return StoreRegistry.from_json(
+        path or os.getenv("STORES_PATH") or DEFAULT_STORES_PATH
+    )
@@ -0,0 +1,419 @@
+"""Per-turn latency histograms, served as Prometheus text on the worker port.
+
+Calls run in job processes, but the HTTP server (``/health``, port 8600) lives
+in the main worker process. Each job process therefore keeps its histograms in
+memory (an observation is a ``bisect`` and two additions) and periodically
+writes a snapshot to ``METRICS_DIR/<pid>.json``. ``/metrics`` merges every
+snapshot in that directory with the worker's own live one, much like
+``prometheus_client``'s multiprocess mode. Snapshots of exited processes are
+folded into ``retired.json``, so the directory doesn't grow with every call.
+
+Histograms are labelled by pipeline stage or tool name only; the room is
+already attached to every log line, and per-room labels would give Prometheus
+one series per call.
+
+Gauges (memory per process, active jobs) are summed over processes, so
+``/metrics`` reports the replica's totals.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+import psutil
+from aiohttp import web
+from livekit.agents.metrics import EOUMetrics, LLMMetrics, TTSMetrics
+
+logger = logging.getLogger("agent.telemetry")
+
+# Bucket upper bounds in seconds, tuned for voice turn latency
+BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+FLUSH_INTERVAL = 5.0
+
+# Counters and histograms of job processes that have exited
+RETIRED_SNAPSHOT = "retired.json"
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+def metrics_dir() -> Path:
+    return Path(
+        os.getenv("METRICS_DIR")
+        or Path(tempfile.gettempdir()) / "hardware-store-agent-metrics"
+    )
+
+
+class Histogram:
+    """Cumulative histogram with fixed ``BUCKETS``."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Histograms and counters for this process, keyed by name and labels."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, LabelSet], Histogram] = {}
+        self._counters: dict[tuple[str, LabelSet], float] = {}
+        self._gauges: dict[tuple[str, LabelSet], float] = {}
+        self._collectors: list[Callable[[Registry], None]] = []
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def set_counter(self, name: str, value: float, **labels: str) -> None:
+        """Set a monotonically increasing counter to its current total."""
+        self._counters[(name, tuple(sorted(labels.items())))] = value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge; ``/metrics`` reports the sum over all job processes."""
+        self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def add_collector(self, collector: Callable[[Registry], None]) -> None:
+        """Register a callback that updates counters just before each snapshot."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict[str, Any]:
+        for collector in self._collectors:
+            collector(self)
+        return {
+            "histograms": [
+                {"name": name, "labels": dict(labels), "counts": h.counts, "sum": h.sum}
+                for (name, labels), h in self._histograms.items()
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._gauges.items()
+            ],
+        }
+
+    def flush(self) -> None:
+        """Write this process's snapshot for the worker's ``/metrics`` endpoint."""
+        directory = metrics_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+
+    def start_flushing(self) -> None:
+        """Flush every ``FLUSH_INTERVAL`` seconds; safe to call once per job."""
+        task = self._flush_task
+        # With the thread executor each job has its own event loop, and the
+        # task dies with the loop of the job that started it
+        if task is not None and not task.done() and not task.get_loop().is_closed():
+            return
+
+        async def flush_periodically() -> None:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning(f"Failed to write metrics snapshot: {e}")
+
+        self._flush_task = asyncio.create_task(flush_periodically())
+
+
+registry = Registry()
+
+T = TypeVar("T")
+
+
+def timed_tool(
+    fn: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """Record a tool's duration in ``agent_tool_latency_seconds``.
+
+    Apply below ``@function_tool()``; the wrapper keeps the tool's signature
+    and docstring, which the tool schema is generated from.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            registry.observe(
+                "agent_tool_latency_seconds",
+                time.perf_counter() - start,
+                tool=fn.__name__,
+            )
+
+    return wrapper
+
+
+class TurnTimer:
+    """Turns a session's pipeline metrics into per-stage and per-turn latency.
+
+    Feed it every ``metrics_collected`` event. Stages are recorded as they
+    arrive; once the end-of-utterance, LLM and TTS metrics of one response
+    (same ``speech_id``) are all in, the end-of-speech to first-audio turn
+    latency is recorded as their sum.
+    """
+
+    MAX_PENDING = 64
+
+    def __init__(self, target: Registry = registry) -> None:
+        self._registry = target
+        self._pending: dict[str, dict[str, float]] = {}
+
+    def on_metrics(self, metrics: Any) -> None:
+        if isinstance(metrics, EOUMetrics):
+            self._stage("stt_final", metrics.transcription_delay, None)
+            self._stage(
+                "end_of_utterance", metrics.end_of_utterance_delay, metrics.speech_id
+            )
+        elif isinstance(metrics, LLMMetrics):
+            self._stage("llm_ttft", metrics.ttft, metrics.speech_id)
+        elif isinstance(metrics, TTSMetrics):
+            self._stage("tts_ttfb", metrics.ttfb, metrics.speech_id)
+
+    def _stage(self, stage: str, value: float, speech_id: str | None) -> None:
+        # Pipeline metrics report -1 when a stage did not happen
+        if value < 0:
+            return
+        self._registry.observe("agent_stage_latency_seconds", value, stage=stage)
+
+        if not speech_id:
+            return
+        parts = self._pending.setdefault(speech_id, {})
+        # Only the first LLM/TTS of a response counts towards the turn
+        parts.setdefault(stage, value)
+        if len(parts) == 3:
+            turn = sum(self._pending.pop(speech_id).values())
+            self._registry.observe("agent_turn_latency_seconds", turn)
+            logger.debug(f"Turn latency {turn:.3f}s", extra={"speech_id": speech_id})
+        while len(self._pending) > self.MAX_PENDING:
+            self._pending.pop(next(iter(self._pending)))
+
+
+class JobMemory:
+    """Memory accounting for the jobs running in this process.
+
+    RSS counts pages shared with other processes (the interpreter, and model
+    weights mapped or inherited from the worker) in full. USS counts only the
+    pages this process holds alone, which is what one more job process costs.
+    With the thread executor several jobs share a process, so the per-job
+    figure divides USS by the number of active jobs.
+    """
+
+    def __init__(self) -> None:
+        self._process = psutil.Process()
+        self._lock = threading.Lock()
+        self.active_jobs = 0
+
+    def job_started(self) -> None:
+        with self._lock:
+            self.active_jobs += 1
+
+    def job_finished(self) -> None:
+        with self._lock:
+            self.active_jobs = max(0, self.active_jobs - 1)
+
+    def sample(self) -> dict[str, float]:
+        info = self._process.memory_full_info()
+        return {
+            "rss_mb": round(info.rss / 2**20, 1),
+            "uss_mb": round(info.uss / 2**20, 1),
+            "active_jobs": self.active_jobs,
+            "uss_per_job_mb": round(info.uss / 2**20 / max(1, self.active_jobs), 1),
+        }
+
+    def collect(self, metrics: Registry) -> None:
+        info = self._process.memory_full_info()
+        metrics.set_gauge("agent_process_resident_memory_bytes", info.rss)
+        metrics.set_gauge("agent_process_unique_memory_bytes", info.uss)
+        metrics.set_gauge("agent_active_jobs", self.active_jobs)
+
+
+job_memory = JobMemory()
+registry.add_collector(job_memory.collect)
+
+
+def _label_str(labels: dict[str, str], **extra: str) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(items.items()))
+    return "{" + inner + "}"
+
+
+Merged = tuple[
+    dict[tuple[str, LabelSet], tuple[list[int], float]],
+    dict[tuple[str, LabelSet], float],
+    dict[tuple[str, LabelSet], float],
+]
+
+
+def _merge(snapshots: list[dict[str, Any]]) -> Merged:
+    """Sum histograms, counters and gauges over process snapshots."""
+    histograms: dict[tuple[str, LabelSet], tuple[list[int], float]] = {}
+    counters: dict[tuple[str, LabelSet], float] = {}
+    gauges: dict[tuple[str, LabelSet], float] = {}
+    for snap in snapshots:
+        for h in snap.get("histograms", []):
+            key = (h["name"], tuple(sorted(h["labels"].items())))
+            counts, total = histograms.get(key, ([0] * (len(BUCKETS) + 1), 0.0))
+            histograms[key] = (
+                [a + b for a, b in zip(counts, h["counts"], strict=True)],
+                total + h["sum"],
+            )
+        for c in snap.get("counters", []):
+            key = (c["name"], tuple(sorted(c["labels"].items())))
+            counters[key] = counters.get(key, 0.0) + c["value"]
+        for g in snap.get("gauges", []):
+            key = (g["name"], tuple(sorted(g["labels"].items())))
+            gauges[key] = gauges.get(key, 0.0) + g["value"]
+    return histograms, counters, gauges
+
+
+def render_prometheus(snapshots: list[dict[str, Any]]) -> str:
+    """Merge process snapshots and render them in Prometheus text format."""
+    histograms, counters, gauges = _merge(snapshots)
+    lines: list[str] = []
+    typed: set[str] = set()
+    for (name, label_set), (counts, total) in sorted(histograms.items()):
+        labels = dict(label_set)
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), counts, strict=True):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{_label_str(labels, le=str(bound))} {cumulative}"
+            )
+        lines.append(f"{name}_sum{_label_str(labels)} {total}")
+        lines.append(f"{name}_count{_label_str(labels)} {cumulative}")
+    for kind, values in (("counter", counters), ("gauge", gauges)):
+        for (name, label_set), value in sorted(values.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            lines.append(f"{name}{_label_str(dict(label_set))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _load(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _retire(directory: Path, exited: list[Path]) -> None:
+    """Fold the snapshots of exited processes into ``RETIRED_SNAPSHOT``.
+
+    Their counters and histograms are kept so totals never go backwards;
+    their gauges (memory, active jobs) no longer describe anything and are
+    dropped. The processes' own files are then removed.
+    """
+    path = directory / RETIRED_SNAPSHOT
+    snapshots = [_load(p) for p in (path, *exited)]
+    histograms, counters, _ = _merge([snap for snap in snapshots if snap])
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps(
+            {
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "counts": c, "sum": s}
+                    for (name, labels), (c, s) in histograms.items()
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in counters.items()
+                ],
+            }
+        )
+    )
+    os.replace(tmp, path)
+    for exited_path in exited:
+        exited_path.unlink(missing_ok=True)
+
+
+def read_snapshots(
+    directory: Path | None = None, *, skip_pid: int | None = None
+) -> list[dict[str, Any]]:
+    """Read every process's snapshot, retiring those of exited processes.
+
+    Args:
+        directory: Snapshot directory; ``METRICS_DIR`` by default
+        skip_pid: Process whose file is left out, because the caller adds
+            its live snapshot instead
+    """
+    directory = directory or metrics_dir()
+    exited = [
+        path
+        for path in directory.glob("*.json")
+        if path.stem.isdigit() and not psutil.pid_exists(int(path.stem))
+    ]
+    if exited:
+        try:
+            _retire(directory, exited)
+        except OSError as e:
+            logger.warning(f"Failed to retire metrics snapshots: {e}")
+    snapshots = []
+    for path in directory.glob("*.json"):
+        if path.stem == str(skip_pid):
+            continue
+        snapshot = _load(path)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+async def handle_metrics(_: web.Request) -> web.Response:
+    snapshots = [*read_snapshots(skip_pid=os.getpid()), registry.snapshot()]
+    return web.Response(text=render_prometheus(snapshots), content_type="text/plain")
+
+
+def serve_on_worker_http_server() -> None:
+    """Add ``/metrics`` to the worker's built-in HTTP server.
+
+    ``cli.run_app`` builds the worker (and the server behind ``/health``)
+    itself, so the route is attached when that server is constructed. Call
+    from the main process before ``cli.run_app``; snapshots left by a previous
+    run are cleared at the same time.
+    """
+    from livekit.agents.utils import http_server
+
+    for stale in metrics_dir().glob("*.json"):
+        stale.unlink(missing_ok=True)
+
+    original_init = http_server.HttpServer.__init__
+
+    @functools.wraps(original_init)
+    def init(self: Any, *args: Any, **kwargs: Any) -> None:
+        original_init(self, *args, **kwargs)
+        self.app.add_routes([web.get("/metrics", handle_metrics)])
+
+    http_server.HttpServer.__init__ = init  # type: ignore[method-assign]
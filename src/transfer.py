@@ -0,0 +1,280 @@
+"""Warm transfer to the first supervisor who answers.
+
+Supervisors are dialed from a pool (``SUPERVISOR_PHONE_NUMBERS``) into a
+private consult room, all at once or one after the other
+(``TRANSFER_DIAL_MODE``), while the caller hears the hold message and then
+hold music. The first supervisor to answer wins and the other calls are hung
+up. The winner hears a short briefing (the transfer reason and a summary of
+the call) in the consult room and is then moved into the caller's room.
+
+Dialing starts as soon as the transfer does rather than after the hold
+message, so the ringing overlaps it. ``SipDialer`` is everything the transfer
+needs from LiveKit; ``LiveKitSipDialer`` implements it with the server API
+and ``fake_providers.FakeSipDialer`` offline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from livekit import api
+    from livekit.agents import tts
+
+logger = logging.getLogger("agent.transfer")
+
+DIAL_MODES = ("parallel", "sequential")
+
+
+class NoSupervisorAnsweredError(Exception):
+    """No supervisor in the pool answered."""
+
+
+@dataclass(frozen=True)
+class SupervisorPool:
+    """Supervisor phone numbers and how to dial them.
+
+    Args:
+        numbers: Phone numbers, in the order they are dialed
+        parallel: Ring every number at once instead of one after the other
+        ring_timeout: Seconds each number may ring before it counts as no answer
+    """
+
+    numbers: tuple[str, ...]
+    parallel: bool = True
+    ring_timeout: float = 25.0
+
+    @classmethod
+    def from_env(cls) -> SupervisorPool | None:
+        """The pool configured by ``SUPERVISOR_PHONE_NUMBERS``, None if empty.
+
+        ``SUPERVISOR_PHONE_NUMBER`` (a single number) is still read when the
+        pool isn't set.
+        """
+        raw = os.getenv("SUPERVISOR_PHONE_NUMBERS") or os.getenv(
+            "SUPERVISOR_PHONE_NUMBER", ""
+        )
+        numbers = tuple(n.strip() for n in raw.split(",") if n.strip())
+        if not numbers:
+            return None
+        mode = os.getenv("TRANSFER_DIAL_MODE", "parallel").lower()
+        if mode not in DIAL_MODES:
+            raise ValueError(
+                f"TRANSFER_DIAL_MODE must be one of {', '.join(DIAL_MODES)}, got {mode!r}"
+            )
+        return cls(
+            numbers,
+            parallel=mode == "parallel",
+            ring_timeout=float(os.getenv("TRANSFER_RING_TIMEOUT", "25")),
+        )
+
+
+class SipDialer(Protocol):
+    async def dial(self, number: str, identity: str) -> None:
+        """Call ``number`` into the consult room; returns once answered."""
+        ...
+
+    async def hang_up(self, identity: str) -> None: ...
+
+    async def brief(self, identity: str, text: str) -> None:
+        """Speak ``text`` to the supervisor in the consult room."""
+        ...
+
+    async def connect(self, identity: str) -> None:
+        """Move the supervisor from the consult room into the caller's room."""
+        ...
+
+
+async def dial_first(pool: SupervisorPool, dialer: SipDialer) -> tuple[str, str]:
+    """Dial the pool; returns the number and identity of the first to answer."""
+    calls = {
+        number: f"supervisor-{i}-{uuid.uuid4().hex[:6]}"
+        for i, number in enumerate(pool.numbers)
+    }
+
+    async def ring(number: str) -> str:
+        await asyncio.wait_for(dialer.dial(number, calls[number]), pool.ring_timeout)
+        return number
+
+    winner: str | None = None
+    dialed: list[str] = []
+    try:
+        if pool.parallel:
+            dialed = list(calls)
+            pending = {asyncio.ensure_future(ring(number)) for number in dialed}
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = winner or task.result()
+                    else:
+                        logger.info(f"Supervisor call failed: {task.exception()!r}")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        else:
+            for number in calls:
+                dialed.append(number)
+                try:
+                    winner = await ring(number)
+                    break
+                except Exception as e:
+                    logger.info(f"Supervisor {number} did not answer: {e!r}")
+                    dialed.remove(number)
+                    await dialer.hang_up(calls[number])
+    finally:
+        # Calls still ringing, or answered after the winner
+        await asyncio.gather(
+            *(dialer.hang_up(calls[n]) for n in dialed if n != winner),
+            return_exceptions=True,
+        )
+
+    if winner is None:
+        raise NoSupervisorAnsweredError(
+            f"None of {len(pool.numbers)} supervisors answered"
+        )
+    logger.info(f"Supervisor {winner} answered")
+    return winner, calls[winner]
+
+
+async def warm_transfer(
+    pool: SupervisorPool,
+    dialer: SipDialer,
+    *,
+    hold: Awaitable[object],
+    briefing: Awaitable[str],
+    hold_music: Callable[[], Awaitable[object]] | None = None,
+) -> tuple[str, str]:
+    """Dial the pool during the hold message, brief the winner, and connect them.
+
+    ``hold`` plays the hold message to the caller and ``briefing`` writes the
+    text for the supervisor; both run while the supervisors' phones ring.
+    After the hold message, ``hold_music`` plays until it is cancelled when
+    the supervisor joins, so the caller doesn't wait in silence. If briefing
+    or connecting the winner fails, they are hung up rather than left in the
+    consult room. Returns the winning supervisor's number and identity.
+    """
+    hold_done = asyncio.Event()
+
+    async def on_hold() -> None:
+        try:
+            await hold
+        finally:
+            hold_done.set()
+        if hold_music is not None:
+            await hold_music()
+
+    hold_task = asyncio.ensure_future(on_hold())
+    briefing_task = asyncio.ensure_future(briefing)
+    try:
+        number, identity = await dial_first(pool, dialer)
+        try:
+            await dialer.brief(identity, await briefing_task)
+            # The caller hears the whole hold message before the supervisor
+            await hold_done.wait()
+            if hold_task.done():
+                hold_task.result()
+            # Stop the music before the supervisor joins
+            hold_task.cancel()
+            await asyncio.gather(hold_task, return_exceptions=True)
+            await dialer.connect(identity)
+        except BaseException:
+            logger.warning(f"Transfer to supervisor {number} failed, hanging up")
+            with contextlib.suppress(Exception):
+                await dialer.hang_up(identity)
+            raise
+        return number, identity
+    finally:
+        hold_task.cancel()
+        briefing_task.cancel()
+        await asyncio.gather(hold_task, briefing_task, return_exceptions=True)
+
+
+class LiveKitSipDialer:
+    """``SipDialer`` over the LiveKit server API and an outbound SIP trunk.
+
+    Args:
+        lkapi: The job's LiveKit API client
+        caller_room: The room of the call being transferred
+        sip_trunk_id: The outbound trunk supervisors are called through
+        tts: Speaks the briefing
+    """
+
+    def __init__(
+        self,
+        lkapi: api.LiveKitAPI,
+        *,
+        caller_room: str,
+        sip_trunk_id: str,
+        tts: tts.TTS,
+    ) -> None:
+        self._lkapi = lkapi
+        self.caller_room = caller_room
+        self.consult_room = f"{caller_room}-transfer"
+        self._sip_trunk_id = sip_trunk_id
+        self._tts = tts
+
+    async def dial(self, number: str, identity: str) -> None:
+        from livekit import api
+
+        await self._lkapi.sip.create_sip_participant(
+            api.CreateSIPParticipantRequest(
+                sip_trunk_id=self._sip_trunk_id,
+                sip_call_to=number,
+                room_name=self.consult_room,
+                participant_identity=identity,
+                participant_name="Supervisor",
+                wait_until_answered=True,
+            )
+        )
+
+    async def hang_up(self, identity: str) -> None:
+        from livekit import api
+
+        # The call may not have reached the room yet, or has already ended
+        with contextlib.suppress(api.TwirpError):
+            await self._lkapi.room.remove_participant(
+                api.RoomParticipantIdentity(room=self.consult_room, identity=identity)
+            )
+
+    async def brief(self, identity: str, text: str) -> None:
+        from livekit import api, rtc
+
+        token = (
+            api.AccessToken()
+            .with_identity(f"briefing-{identity}")
+            .with_grants(api.VideoGrants(room_join=True, room=self.consult_room))
+            .to_jwt()
+        )
+        room = rtc.Room()
+        await room.connect(os.environ["LIVEKIT_URL"], token)
+        try:
+            source = rtc.AudioSource(self._tts.sample_rate, self._tts.num_channels)
+            track = rtc.LocalAudioTrack.create_audio_track("briefing", source)
+            await room.local_participant.publish_track(track)
+            async with self._tts.synthesize(text) as stream:
+                async for audio in stream:
+                    await source.capture_frame(audio.frame)
+            await source.wait_for_playout()
+        finally:
+            await room.disconnect()
+
+    async def connect(self, identity: str) -> None:
+        from livekit import api
+
+        await self._lkapi.room.move_participant(
+            api.MoveParticipantRequest(
+                room=self.consult_room,
+                identity=identity,
+                destination_room=self.caller_room,
+            )
+        )
@@ -0,0 +1,88 @@
+"""End-of-turn detection with the LiveKit turn detector, falling back to VAD.
+
+With VAD alone a turn ends after a fixed silence: callers who are done wait
+for it on every turn, and callers who pause mid-sentence ("I'm looking for,
+um...") are cut off. The multilingual turn detector reads the transcript to
+judge whether the caller is done, ending the turn after
+``min_endpointing_delay`` when they likely are and holding it open up to
+``max_endpointing_delay`` when they likely aren't.
+
+``download-files`` fetches the model into ``HF_HOME``, which the Dockerfile
+points at ``/opt/models`` because Cerebrium replaces ``/app`` at runtime. The
+worker loads the weights once, in its inference process, and every job
+process queries it over IPC instead of loading a copy. Without the files
+(or with ``TURN_DETECTOR=0``) the plugin is never imported, since the
+inference process would fail to start, and turns end on VAD silence.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+logger = logging.getLogger("agent.turn_detection")
+
+TURN_DETECTOR_MODULE = "livekit.plugins.turn_detector.multilingual"
+MODEL_TYPE = "multilingual"
+
+
+def model_files(cache_dir: str | None = None) -> dict[str, str | None]:
+    """The turn detector's files and their paths in the Hugging Face cache.
+
+    Files that aren't downloaded map to None.
+
+    Args:
+        cache_dir: The hub cache, by default the one under ``HF_HOME``
+    """
+    from huggingface_hub import try_to_load_from_cache
+    from livekit.plugins.turn_detector.models import (
+        HG_MODEL,
+        MODEL_REVISIONS,
+        ONNX_FILENAME,
+    )
+
+    names = [f"onnx/{ONNX_FILENAME}", "languages.json", "tokenizer_config.json"]
+    paths = {}
+    for name in names:
+        path = try_to_load_from_cache(
+            HG_MODEL, name, cache_dir=cache_dir, revision=MODEL_REVISIONS[MODEL_TYPE]
+        )
+        paths[name] = path if isinstance(path, str) else None
+    return paths
+
+
+def enabled() -> bool:
+    """Whether calls use the turn detector: unless ``TURN_DETECTOR=0``, if downloaded."""
+    if os.getenv("TURN_DETECTOR", "1") == "0":
+        return False
+    if os.getenv("LIVEKIT_REMOTE_EOT_URL"):
+        # Predictions come from LiveKit's service, no local model needed
+        return True
+    missing = [name for name, path in model_files().items() if path is None]
+    if missing:
+        logger.warning(
+            f"Turn detector files missing from HF_HOME ({', '.join(missing)}), "
+            "ending turns on VAD silence; run download-files to fetch them"
+        )
+        return False
+    return True
+
+
+def import_plugin() -> None:
+    """Register the turn detector's plugin and inference runner.
+
+    Must happen on the main thread of the worker process, before it starts.
+    """
+    importlib.import_module(TURN_DETECTOR_MODULE)
+
+
+def build() -> MultilingualModel:
+    """The session's turn detector; call from a job once ``enabled()``."""
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+    return MultilingualModel()
@@ -0,0 +1,125 @@
+"""Worker load reported to LiveKit, from CPU use and active calls.
+
+LiveKit's default load is the replica's CPU use alone, and a worker takes
+new calls until it passes 0.7. A call's CPU use ramps up after it is
+dispatched, so a replica can accept several calls in a burst before any of
+them shows up, and every call on it then gets slower turns. The load here
+is the larger of the CPU use and the share of ``MAX_CALLS_PER_WORKER`` in
+use, scaled so the worker is full when either reaches its limit. It is
+exported as ``agent_worker_load`` next to the CPU figure on ``/metrics``.
+
+Draining is LiveKit's: on SIGTERM the worker stops taking jobs and waits up
+to ``DRAIN_TIMEOUT`` seconds for active calls to end before it exits.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import deque
+
+from livekit.agents import AgentServer
+from livekit.agents.utils.hw import CPUMonitor, get_cpu_monitor
+
+from telemetry import Registry, registry
+
+logger = logging.getLogger("agent.worker_load")
+
+# Seconds per CPU sample; LiveKit asks for the load every 0.5 seconds
+SAMPLE_INTERVAL = 0.5
+
+
+def load_threshold() -> float:
+    """Load at which the worker stops taking calls (``WORKER_LOAD_THRESHOLD``)."""
+    return float(os.getenv("WORKER_LOAD_THRESHOLD", "0.75"))
+
+
+def drain_timeout() -> int:
+    """Seconds active calls get to end after SIGTERM (``DRAIN_TIMEOUT``)."""
+    return int(os.getenv("DRAIN_TIMEOUT", "900"))
+
+
+class WorkerLoad:
+    """Load of one worker, between 0 and 1.
+
+    Args:
+        max_calls: Calls at which the worker is full, whatever its CPU use
+        threshold: The worker's load threshold
+        window: CPU samples averaged
+        monitor: CPU monitor; LiveKit's, which reads the cgroup's quota
+    """
+
+    def __init__(
+        self,
+        max_calls: int = 4,
+        threshold: float = 0.75,
+        window: int = 5,
+        monitor: CPUMonitor | None = None,
+    ) -> None:
+        self.max_calls = max_calls
+        self.threshold = threshold
+        self._monitor = monitor
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.cpu = 0.0
+        self.load = 0.0
+
+    @classmethod
+    def from_env(cls) -> WorkerLoad:
+        return cls(
+            max_calls=int(os.getenv("MAX_CALLS_PER_WORKER", "4")),
+            threshold=load_threshold(),
+        )
+
+    def add_cpu_sample(self, cpu: float) -> None:
+        with self._lock:
+            self._samples.append(cpu)
+            self.cpu = sum(self._samples) / len(self._samples)
+
+    def compute(self, active_calls: int) -> float:
+        calls = self.threshold * active_calls / self.max_calls
+        self.load = min(1.0, max(self.cpu, calls))
+        return self.load
+
+    def collect(self, metrics: Registry) -> None:
+        metrics.set_gauge("agent_worker_load", self.load)
+        metrics.set_gauge("agent_worker_cpu_load", self.cpu)
+
+    def start(self) -> None:
+        """Sample the CPU in a thread; a failed sample is logged and skipped."""
+        monitor = self._monitor or get_cpu_monitor()
+
+        def sample() -> None:
+            while not self._stopped.is_set():
+                try:
+                    self.add_cpu_sample(monitor.cpu_percent(interval=SAMPLE_INTERVAL))
+                except Exception:
+                    logger.exception("Could not sample the CPU")
+                    self._stopped.wait(SAMPLE_INTERVAL)
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=sample, daemon=True, name="worker_load")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling, after the sample in progress."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_worker_load: WorkerLoad | None = None
+
+
+def load_fnc(worker: AgentServer) -> float:
+    """``WorkerOptions.load_fnc``, called in the main worker process."""
+    global _worker_load
+    if _worker_load is None:
+        _worker_load = WorkerLoad.from_env()
+        registry.add_collector(_worker_load.collect)
+        _worker_load.start()
+    return _worker_load.compute(len(worker.active_jobs))
@@ -1,13 +1,34 @@
+import ast
+import asyncio
+from typing import Any
+
 import pytest
 from livekit.agents import AgentSession, inference, llm
 
-from agent import HardwareStoreAgent
+import agent
+from agent import HardwareStoreAgent, get_store_by_name
+from inventory_server import stock_record
+
+DRILL = "DeWalt 20V MAX Cordless Drill Driver Kit"
 
 
 def _llm() -> llm.LLM:
     return inference.LLM(model="google/gemini-3-flash")
 
 
+class HalifaxTimesOut:
+    """Inventory where the Halifax store answers too late for a multi-store check."""
+
+    def __init__(self) -> None:
+        self.stores: list[str] = []
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        self.stores.append(store_id)
+        if store_id == get_store_by_name("Halifax")["id"]:
+            await asyncio.sleep(5)
+        return stock_record(store_id, item_name)
+
+
 @pytest.mark.asyncio
 async def test_greeting() -> None:
     """Evaluation of the agent's greeting as a hardware store receptionist."""
@@ -204,3 +225,50 @@ async def test_grounding() -> None:
         )
 
         result.expect.no_more_events()
+
+
+@pytest.mark.asyncio
+async def test_check_other_locations(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Evaluation of a multi-store check where one store doesn't answer in time."""
+    monkeypatch.setattr(agent, "STORE_DEADLINE", 0.2)
+    inventory = HalifaxTimesOut()
+    async with (
+        _llm() as llm,
+        AgentSession(llm=llm) as session,
+    ):
+        await session.start(HardwareStoreAgent(inventory=inventory))
+
+        await session.run(user_input="I'm calling about the Oakville store.")
+        result = await session.run(
+            user_input=f"Which of your stores have the {DRILL} in stock? "
+            "Please check all of them."
+        )
+
+        result.expect.contains_function_call(name="check_other_locations")
+        output = ast.literal_eval(
+            result.expect.contains_function_call_output().event().item.output
+        )
+        assert get_store_by_name("Halifax")["id"] in inventory.stores
+        assert output["unavailable_locations"] == ["Halifax"]
+        burnaby = next(
+            location
+            for location in output["locations"]
+            if location["store_name"] == "Burnaby"
+        )
+
+        await (
+            result.expect[-1]
+            .is_message(role="assistant")
+            .judge(
+                llm,
+                intent=f"""
+                Reports the result of checking the stores for the drill.
+
+                The response should:
+                - Say whether Burnaby has the drill in stock
+                  ({"in stock" if burnaby["in_stock"] else "out of stock"})
+                - Say that Halifax could not be checked right now
+                - Not claim to know Halifax's stock
+                """,
+            )
+        )
@@ -0,0 +1,84 @@
+from typing import Any
+
+import pytest
+from livekit.agents import AgentSession
+
+from agent import HardwareStoreAgent
+from call_recorder import CallRecorder, read_events, recorded_turns
+from catalog import load_catalog
+from fake_providers import FakeLLM, ReplayLLM, ScriptedTurn
+from inventory_server import stock_record
+
+SCRIPT = [
+    ScriptedTurn(trigger="oakville", reply="Great, what can I help you find?"),
+    ScriptedTurn(
+        trigger="drill",
+        tool="inventory_check",
+        arguments={"item_name": "dewalt drill", "store_location": "Oakville"},
+        reply="We have it in stock.",
+    ),
+]
+
+
+class StockBackend:
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        return stock_record(store_id, item_name)
+
+
+def test_events_are_written_in_order(tmp_path) -> None:
+    recorder = CallRecorder(tmp_path / "call.jsonl.gz", flush_interval=0.05)
+    for i in range(100):
+        recorder.record("transcript", text=f"line {i}")
+    recorder.close()
+
+    events = read_events(recorder.path)
+    assert [e["text"] for e in events] == [f"line {i}" for i in range(100)]
+    assert recorder.events == 100
+
+
+@pytest.mark.asyncio
+async def test_recorded_call_replays_the_same_tool_calls(tmp_path) -> None:
+    catalog = load_catalog()
+    recorder = CallRecorder(tmp_path / "call.jsonl.gz")
+    session = AgentSession(llm=FakeLLM(SCRIPT, ttft=0))
+    session.on(
+        "conversation_item_added", lambda ev: recorder.on_conversation_item(ev.item)
+    )
+    session.on(
+        "function_tools_executed",
+        lambda ev: recorder.on_tools_executed(
+            ev.function_calls, ev.function_call_outputs
+        ),
+    )
+    async with session:
+        await session.start(
+            HardwareStoreAgent(inventory=StockBackend(), catalog=catalog)
+        )
+        await session.run(user_input="I'm calling about the Oakville store")
+        await session.run(user_input="Do you have the DeWalt drill?")
+    recorder.close()
+
+    turns = list(recorded_turns(read_events(recorder.path)))
+    assert [t.user_text for t in turns] == [
+        "I'm calling about the Oakville store",
+        "Do you have the DeWalt drill?",
+    ]
+    assert turns[0].tool_calls == []
+    [call] = turns[1].tool_calls
+    assert call.name == "inventory_check"
+    assert call.arguments["store_location"] == "Oakville"
+    assert turns[1].reply == "We have it in stock."
+
+    replay = AgentSession(llm=ReplayLLM(turns, ttft=0))
+    async with replay:
+        await replay.start(
+            HardwareStoreAgent(inventory=StockBackend(), catalog=catalog)
+        )
+        await replay.run(user_input=turns[0].user_text)
+        result = await replay.run(user_input=turns[1].user_text)
+    result.expect.next_event().is_function_call(
+        name="inventory_check", arguments=call.arguments
+    )
+    output = result.expect.next_event().is_function_call_output()
+    assert output.event().item.output == call.output
+    result.expect.next_event().is_message(role="assistant")
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from caller_memory import MAX_RECENT_ITEMS, CallerMemory, CallerProfile, CallerSession
+
+
+@pytest.mark.asyncio
+async def test_profile_survives_a_new_process(tmp_path) -> None:
+    path = tmp_path / "callers.sqlite3"
+    session = CallerSession(CallerMemory(path))
+    await session.identify("sip_+15551234567")
+    session.note_store("oakville")
+    session.note_item("2x4 lumber")
+    session.note_item("wood screws")
+    await session.save()
+
+    profile = await CallerMemory(path).get("sip_+15551234567")
+    assert profile is not None
+    assert profile.store_id == "oakville"
+    assert profile.recent_items == ("wood screws", "2x4 lumber")
+    assert profile.calls == 1
+    assert await CallerMemory(path).get("sip_+15550000000") is None
+
+
+@pytest.mark.asyncio
+async def test_calls_add_to_the_profile(tmp_path) -> None:
+    memory = CallerMemory(tmp_path / "callers.sqlite3")
+    items = ["hammer", *(f"item {i}" for i in range(MAX_RECENT_ITEMS))]
+    for item in items:
+        session = CallerSession(memory)
+        await session.identify("caller")
+        session.note_item(item)
+        await session.save()
+
+    profile = await memory.get("caller")
+    assert profile.calls == len(items)
+    assert profile.store_id is None
+    assert profile.recent_items == tuple(reversed(items))[:MAX_RECENT_ITEMS]
+
+
+@pytest.mark.asyncio
+async def test_cached_profiles_skip_the_database(tmp_path) -> None:
+    memory = CallerMemory(tmp_path / "callers.sqlite3", cache_size=1)
+    await memory.save([CallerProfile("a", "oakville"), CallerProfile("b", "halifax")])
+    reads = 0
+    read = memory._read
+
+    def counting_read(caller_id: str) -> CallerProfile | None:
+        nonlocal reads
+        reads += 1
+        return read(caller_id)
+
+    memory._read = counting_read
+    assert (await memory.get("b")).store_id == "halifax"
+    assert reads == 0
+    assert (await memory.get("a")).store_id == "oakville"
+    assert (await memory.get("b")).store_id == "halifax"
+    assert reads == 2
+
+
+@pytest.mark.asyncio
+async def test_unrecognized_callers_are_not_saved(tmp_path) -> None:
+    memory = CallerMemory(tmp_path / "callers.sqlite3")
+    session = CallerSession(memory)
+    await session.identify(None)
+    session.note_store("oakville")
+    await session.save()
+
+    assert await session.wait_profile(timeout=0.1) is None
+    assert not memory.path.exists()
+
+
+@pytest.mark.asyncio
+async def test_greeting_does_not_wait_for_a_slow_lookup(tmp_path) -> None:
+    session = CallerSession(CallerMemory(tmp_path / "callers.sqlite3"))
+    assert await asyncio.wait_for(session.wait_profile(timeout=0.05), 1) is None
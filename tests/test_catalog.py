@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+from agent import HardwareStoreAgent
+from catalog import CatalogIndex, load_catalog, trigrams, word_coverage
+
+
+@pytest.fixture(scope="module")
+def catalog() -> CatalogIndex:
+    return load_catalog()
+
+
+def test_trigrams_pad_each_word() -> None:
+    assert trigrams("2x4") == [" 2x", "2x4", "x4 "]
+    assert trigrams("Drill-Bit") == [
+        " dr",
+        "dri",
+        "ril",
+        "ill",
+        "ll ",
+        " bi",
+        "bit",
+        "it ",
+    ]
+
+
+def test_resolves_paraphrase(catalog: CatalogIndex) -> None:
+    resolution = catalog.resolve("dewalt drill")
+    assert resolution.match is not None
+    assert resolution.match.name == "DeWalt 20V MAX Cordless Drill Driver Kit"
+
+
+def test_resolves_misspelling(catalog: CatalogIndex) -> None:
+    """ASR-style misspellings still resolve through shared trigrams."""
+    resolution = catalog.resolve("milwakee impact")
+    assert resolution.match is not None
+    assert resolution.match.name == "Milwaukee M18 Cordless Impact Driver"
+
+
+def test_ambiguous_item_returns_candidates(catalog: CatalogIndex) -> None:
+    """A vague request yields candidates to offer instead of a guess."""
+    resolution = catalog.resolve("pressure treated 2x4s")
+    assert resolution.match is None
+    names = [c.name for c in resolution.candidates]
+    assert "Pressure-Treated Lumber 2x4 8 ft" in names
+    assert "Pressure-Treated Lumber 2x4 10 ft" in names
+
+
+def test_candidate_name_resolves(catalog: CatalogIndex) -> None:
+    """Repeating an offered candidate back resolves it exactly."""
+    resolution = catalog.resolve("pressure-treated lumber 2x4 10 ft")
+    assert resolution.match is not None
+    assert resolution.match.name == "Pressure-Treated Lumber 2x4 10 ft"
+
+
+def test_unknown_item(catalog: CatalogIndex) -> None:
+    assert catalog.resolve("xyzzy").candidates == []
+
+
+@pytest.mark.parametrize(
+    "item", ["toilet paper", "snow shovel", "lawn mower", "pipe wrench"]
+)
+def test_item_not_in_catalog_has_no_candidates(
+    catalog: CatalogIndex, item: str
+) -> None:
+    """Products that only share some letters with the item are not offered."""
+    resolution = catalog.resolve(item)
+    assert resolution.match is None
+    assert resolution.candidates == []
+
+
+def test_word_coverage_allows_typos() -> None:
+    assert word_coverage("milwakee impact", "Milwaukee M18 Impact Driver") == 1.0
+    assert word_coverage("toilet paper", "Toilet Wax Ring with Flange") == 0.5
+
+
+def test_agent_passes_unknown_items_through(catalog: CatalogIndex) -> None:
+    agent = HardwareStoreAgent(inventory=object(), catalog=catalog)
+    assert agent._resolve_item("snow shovel") == ("snow shovel", None, None)
+
+
+def test_save_and_load_roundtrip(catalog: CatalogIndex, tmp_path: Path) -> None:
+    path = tmp_path / "catalog.npz"
+    catalog.save(path)
+    loaded = load_catalog(path)
+    assert len(loaded) == len(catalog)
+    assert loaded.search("deck screws") == catalog.search("deck screws")
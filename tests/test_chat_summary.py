@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+from livekit.agents import llm
+
+from chat_summary import SUMMARY_HEADER, ChatSummarizer, split_context
+from fake_providers import FakeLLM, ScriptedTurn
+
+
+def _call(turns: int) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="You are a receptionist.")
+    for turn in range(turns):
+        chat_ctx.add_message(role="user", content=f"Question {turn}")
+        chat_ctx.items.append(
+            llm.FunctionCall(
+                call_id=f"call_{turn}", name="inventory_check", arguments="{}"
+            )
+        )
+        chat_ctx.items.append(
+            llm.FunctionCallOutput(
+                call_id=f"call_{turn}",
+                name="inventory_check",
+                output='{"in_stock": true}',
+                is_error=False,
+            )
+        )
+        chat_ctx.add_message(role="assistant", content=f"Answer {turn}")
+    return chat_ctx
+
+
+def test_split_keeps_recent_turns_whole() -> None:
+    summary, old = split_context(_call(5), keep_turns=2)
+
+    assert summary is None
+    # Three older turns of four items each, tool call and output included
+    assert len(old) == 12
+    assert old[-1].text_content == "Answer 2"
+
+
+@pytest.mark.asyncio
+async def test_compacts_old_turns_into_a_summary() -> None:
+    summarizer_llm = FakeLLM(
+        [ScriptedTurn(trigger="", reply="Caller asked about drills.")], ttft=0
+    )
+    summarizer = ChatSummarizer(summarizer_llm, keep_turns=2, batch_turns=2)
+    updates: list[llm.ChatContext] = []
+
+    async def update_chat_ctx(chat_ctx: llm.ChatContext) -> None:
+        agent.chat_ctx = chat_ctx
+        updates.append(chat_ctx)
+
+    agent = SimpleNamespace(chat_ctx=_call(3), update_chat_ctx=update_chat_ctx)
+
+    summarizer.schedule(agent)  # type: ignore[arg-type]
+    assert summarizer._task is None  # only one old turn so far
+
+    agent.chat_ctx = _call(5)
+    summarizer.schedule(agent)  # type: ignore[arg-type]
+    await summarizer._task
+
+    items = updates[-1].items
+    assert items[0].text_content == "You are a receptionist."
+    assert items[1].text_content == f"{SUMMARY_HEADER} Caller asked about drills."
+    assert items[2].text_content == "Question 3"
+    assert len(items) == 2 + 2 * 4
@@ -0,0 +1,103 @@
+import pytest
+from livekit.agents import llm
+
+from failover import HedgedLLM, HedgedTTS, ProviderStats
+from fake_providers import FakeLLM, FakeTTS, ScriptedTurn
+
+
+def _reply(name: str) -> ScriptedTurn:
+    return ScriptedTurn(trigger="hours", reply=f"{name} answered")
+
+
+async def _ask(model: llm.LLM) -> str:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="user", content="What are your hours?")
+    async with model.chat(chat_ctx=chat_ctx) as stream:
+        return "".join(
+            [c.delta.content async for c in stream if c.delta and c.delta.content]
+        )
+
+
+@pytest.mark.asyncio
+async def test_llm_hedges_to_faster_provider_after_deadline(tmp_path) -> None:
+    stats = ProviderStats(tmp_path / "stats.json")
+    hedged = HedgedLLM(
+        [
+            ("google", FakeLLM([_reply("google")], ttft=1.0)),
+            ("openai", FakeLLM([_reply("openai")], ttft=0.05)),
+        ],
+        deadline=0.1,
+        stats=stats,
+    )
+
+    assert await _ask(hedged) == "openai answered"
+    assert stats.hedges["llm"] == 1
+    assert stats.rank("llm", ["google", "openai"]) == ["openai", "google"]
+
+
+@pytest.mark.asyncio
+async def test_llm_within_deadline_uses_primary_only(tmp_path) -> None:
+    stats = ProviderStats(tmp_path / "stats.json")
+    hedged = HedgedLLM(
+        [
+            ("google", FakeLLM([_reply("google")], ttft=0.01)),
+            ("openai", FakeLLM([_reply("openai")], ttft=0.01)),
+        ],
+        deadline=0.5,
+        stats=stats,
+    )
+
+    assert await _ask(hedged) == "google answered"
+    assert stats.hedges["llm"] == 0
+    assert stats.latency("llm/openai") is None
+
+
+@pytest.mark.asyncio
+async def test_tts_fails_over_and_routes_around_unhealthy_provider(tmp_path) -> None:
+    stats = ProviderStats(tmp_path / "stats.json")
+    hedged = HedgedTTS(
+        [
+            ("cartesia", FakeTTS(ttfb=0, fail=True)),
+            ("openai", FakeTTS(ttfb=0, seconds_per_word=0.1)),
+        ],
+        deadline=1.0,
+        stats=stats,
+    )
+
+    async with hedged.synthesize("one two three") as stream:
+        samples = sum([ev.frame.samples_per_channel async for ev in stream])
+    # The segment ends with 10 ms of silence, added once
+    assert samples / hedged.sample_rate == pytest.approx(0.31, abs=0.001)
+    assert not stats.healthy("tts/cartesia")
+
+    # The next call's process sees the same stats
+    stats.save()
+    other = ProviderStats(tmp_path / "stats.json")
+    other.load()
+    assert other.rank("tts", ["cartesia", "openai"]) == ["openai", "cartesia"]
+
+
+def test_llm_refuses_provider_specific_kwargs(tmp_path) -> None:
+    hedged = HedgedLLM(
+        [("google", FakeLLM()), ("openai", FakeLLM())],
+        deadline=0.5,
+        stats=ProviderStats(tmp_path / "stats.json"),
+    )
+    with pytest.raises(ValueError, match="cached_content"):
+        hedged.chat(
+            chat_ctx=llm.ChatContext.empty(),
+            extra_kwargs={"cached_content": "cachedContents/abc"},
+        )
+
+
+def test_stats_merge_samples_taken_at_the_same_time(tmp_path) -> None:
+    path = tmp_path / "stats.json"
+    saved = ProviderStats(path, clock=lambda: 1000.0)
+    saved.record("llm/google", None)
+    saved.save()
+
+    stats = ProviderStats(path, clock=lambda: 1000.0)
+    stats.record("llm/google", 0.4)
+    stats.load()
+    assert stats.latency("llm/google") == 0.4
+    assert not stats.healthy("llm/google")
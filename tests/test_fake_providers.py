@@ -0,0 +1,51 @@
+import pytest
+from livekit.agents import llm
+
+from fake_providers import FakeLLM, FakeSTT, FakeTTS, ScriptedTurn
+
+SCRIPT = [
+    ScriptedTurn(
+        trigger="drill",
+        tool="inventory_check",
+        arguments={"item_name": "drill", "store_location": "Oakville"},
+        reply="Yes, we have drills in stock.",
+    )
+]
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_tool_then_replies() -> None:
+    fake = FakeLLM(SCRIPT, ttft=0)
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="user", content="Do you have a drill?")
+
+    async with fake.chat(chat_ctx=chat_ctx) as stream:
+        chunks = [chunk async for chunk in stream]
+    call = chunks[0].delta.tool_calls[0]
+    assert call.name == "inventory_check"
+
+    chat_ctx.items.append(
+        llm.FunctionCall(call_id=call.call_id, name=call.name, arguments=call.arguments)
+    )
+    chat_ctx.items.append(
+        llm.FunctionCallOutput(
+            call_id=call.call_id, name=call.name, output="{}", is_error=False
+        )
+    )
+    async with fake.chat(chat_ctx=chat_ctx) as stream:
+        text = "".join(
+            [c.delta.content async for c in stream if c.delta and c.delta.content]
+        )
+    assert text == "Yes, we have drills in stock."
+
+
+@pytest.mark.asyncio
+async def test_stt_and_tts_are_deterministic() -> None:
+    stt = FakeSTT(["first", "second"], latency=0)
+    texts = [(await stt.recognize([])).alternatives[0].text for _ in range(3)]
+    assert texts == ["first", "second", "first"]
+
+    tts = FakeTTS(ttfb=0, seconds_per_word=0.1)
+    async with tts.synthesize("one two three") as stream:
+        samples = sum([ev.frame.samples_per_channel async for ev in stream])
+    assert samples / tts.sample_rate == pytest.approx(0.3, abs=0.02)
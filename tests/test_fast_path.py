@@ -0,0 +1,45 @@
+import pytest
+
+from fast_path import FastPath
+from stores import DEFAULT_STORES_PATH, load_stores
+
+
+@pytest.fixture
+def fast_path() -> FastPath:
+    return FastPath(load_stores(DEFAULT_STORES_PATH))
+
+
+def test_answers_hours_and_departments_from_store_data(fast_path: FastPath) -> None:
+    answer = fast_path.answer_text("What are your hours in Burnaby?")
+    assert answer is not None
+    assert answer.startswith(
+        "Our Burnaby store is open Monday to Friday from 7:30 AM to 9 PM, "
+        "Saturday from 8 AM to 8 PM, and Sunday from 10 AM to 5 PM."
+    )
+
+    answer = fast_path.answer_text("What departments do you have?", ["Halifax please"])
+    assert answer is not None
+    assert "Sales, Customer Service, Tool Rental, and Garden Center" in answer
+
+
+@pytest.mark.parametrize(
+    ("text", "earlier"),
+    [
+        # No store known yet: the LLM asks which one
+        ("When do you close?", []),
+        ("When do you close, Oakville or Burnaby?", ["Halifax"]),
+        # More than an hours or departments question
+        ("What time do you close and do you have drills?", ["Halifax"]),
+        ("Do you have a garden center?", ["Halifax"]),
+        ("What time is it?", ["Halifax"]),
+        ("What are your hours and departments?", ["Halifax"]),
+        ("Quelles sont vos heures d'ouverture?", ["Halifax"]),
+        # Store data has no holiday hours
+        ("Are you open on the holiday Monday?", ["Halifax"]),
+        ("What are your holiday hours?", ["Halifax"]),
+    ],
+)
+def test_everything_else_goes_to_the_llm(
+    fast_path: FastPath, text: str, earlier: list[str]
+) -> None:
+    assert fast_path.answer_text(text, earlier) is None
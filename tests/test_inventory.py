@@ -0,0 +1,265 @@
+import asyncio
+from typing import Any
+
+import pytest
+from aiohttp import web
+
+from inventory import (
+    CircuitBreaker,
+    InventoryClient,
+    InventoryError,
+    InventoryUnavailableError,
+    lookup_many,
+)
+from inventory_server import create_app, stock_record
+
+
+async def _serve(app: web.Application) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.asyncio
+async def test_lookup_against_stand_in_server() -> None:
+    """The client returns the stand-in server's record for the item."""
+    runner, url = await _serve(create_app())
+    client = InventoryClient(url)
+    try:
+        record = await client.lookup("store-1", "pressure-treated 2x4")
+        assert record == stock_record("store-1", "pressure-treated 2x4")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_lookup_retries_server_errors() -> None:
+    """Transient 5xx responses are retried until one succeeds."""
+    calls = 0
+
+    async def flaky(request: web.Request) -> web.Response:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            return web.json_response({}, status=503)
+        return web.json_response({"in_stock": True})
+
+    app = web.Application()
+    app.add_routes([web.get("/stores/{store_id}/inventory", flaky)])
+    runner, url = await _serve(app)
+    client = InventoryClient(url, max_retries=2, retry_backoff=0)
+    try:
+        assert await client.lookup("store-1", "drill") == {"in_stock": True}
+        assert calls == 3
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_after_repeated_failures() -> None:
+    """Once the breaker opens, lookups fail fast without hitting the service."""
+    runner, url = await _serve(create_app(failure_rate=1.0))
+    client = InventoryClient(
+        url,
+        max_retries=0,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    )
+    try:
+        for _ in range(2):
+            with pytest.raises(InventoryError):
+                await client.lookup("store-1", "drill")
+        assert client.breaker.state == "open"
+        with pytest.raises(InventoryUnavailableError):
+            await client.lookup("store-1", "drill")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("body", "content_type"),
+    [(b"<html>Bad gateway</html>", "text/html"), (b"{not json", "application/json")],
+)
+async def test_malformed_body_counts_as_a_failure(
+    body: bytes, content_type: str
+) -> None:
+    """A body that doesn't parse is retried, then reported to the breaker."""
+    calls = 0
+
+    async def garbled(request: web.Request) -> web.Response:
+        nonlocal calls
+        calls += 1
+        return web.Response(body=body, content_type=content_type)
+
+    app = web.Application()
+    app.add_routes([web.get("/stores/{store_id}/inventory", garbled)])
+    runner, url = await _serve(app)
+    client = InventoryClient(
+        url,
+        max_retries=1,
+        retry_backoff=0,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    try:
+        with pytest.raises(InventoryError):
+            await client.lookup("store-1", "drill")
+        assert calls == 2
+        assert client.breaker.state == "open"
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("status", "breaker_state"), [(404, "closed"), (401, "open")])
+async def test_only_not_found_refusals_keep_the_breaker_closed(
+    status: int, breaker_state: str
+) -> None:
+    calls = 0
+
+    async def refuse(request: web.Request) -> web.Response:
+        nonlocal calls
+        calls += 1
+        return web.json_response({"error": "refused"}, status=status)
+
+    app = web.Application()
+    app.add_routes([web.get("/stores/{store_id}/inventory", refuse)])
+    runner, url = await _serve(app)
+    client = InventoryClient(
+        url, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    )
+    try:
+        with pytest.raises(InventoryError, match=f"HTTP {status}"):
+            await client.lookup("store-1", "drill")
+        assert calls == 1
+        assert client.breaker.state == breaker_state
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_lookup_times_out() -> None:
+    """A slow backend surfaces as an InventoryError after the timeout."""
+    runner, url = await _serve(create_app(latency=0.5))
+    client = InventoryClient(url, timeout=0.05, max_retries=0)
+    try:
+        with pytest.raises(InventoryError):
+            await client.lookup("store-1", "drill")
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+def test_circuit_breaker_half_open_trial() -> None:
+    """After the reset timeout one trial call is allowed; success closes it."""
+    now = 0.0
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now = 10.0
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_circuit_breaker_half_open_admits_one_trial() -> None:
+    """Only one trial runs at a time; a trial that never reports is replaced."""
+    now = 0.0
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now)
+    breaker.record_failure()
+
+    now = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now = 20.0
+    assert breaker.allow()
+    now = 30.0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_half_open_breaker_sends_one_concurrent_lookup() -> None:
+    """Concurrent lookups after the reset timeout send a single trial request."""
+    calls = 0
+
+    async def slow(request: web.Request) -> web.Response:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"in_stock": True})
+
+    app = web.Application()
+    app.add_routes([web.get("/stores/{store_id}/inventory", slow)])
+    runner, url = await _serve(app)
+    now = 0.0
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now)
+    breaker.record_failure()
+    now = 10.0
+    client = InventoryClient(url, breaker=breaker)
+    try:
+        results = await asyncio.gather(
+            *(client.lookup("store-1", "drill") for _ in range(5)),
+            return_exceptions=True,
+        )
+        assert calls == 1
+        assert results.count({"in_stock": True}) == 1
+        assert sum(isinstance(r, InventoryUnavailableError) for r in results) == 4
+        assert breaker.state == "closed"
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+
+
+class SlowStoreBackend:
+    """Backend where each store answers after its own delay, or fails."""
+
+    def __init__(self, delays: dict[str, float], failing: tuple[str, ...] = ()):
+        self.delays = delays
+        self.failing = failing
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        await asyncio.sleep(self.delays[store_id])
+        if store_id in self.failing:
+            raise InventoryError("backend down")
+        return stock_record(store_id, item_name)
+
+
+@pytest.mark.asyncio
+async def test_lookup_many_returns_partial_results() -> None:
+    """Slow and failing stores are reported without holding up the others."""
+    backend = SlowStoreBackend(
+        {"oakville": 0.0, "burnaby": 1.0, "halifax": 0.0}, failing=("halifax",)
+    )
+
+    records, unavailable = await lookup_many(
+        backend, ["oakville", "burnaby", "halifax"], "drill", deadline=0.1
+    )
+
+    assert list(records) == ["oakville"]
+    assert unavailable == ["burnaby", "halifax"]
+
+
+@pytest.mark.asyncio
+async def test_lookup_many_runs_concurrently() -> None:
+    backend = SlowStoreBackend({"a": 0.05, "b": 0.05, "c": 0.05})
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    records, unavailable = await lookup_many(backend, ["a", "b", "c"], "drill")
+
+    assert loop.time() - start < 0.12
+    assert set(records) == {"a", "b", "c"}
+    assert unavailable == []
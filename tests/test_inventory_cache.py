@@ -0,0 +1,206 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+import agent
+from agent import HardwareStoreAgent
+from inventory_cache import (
+    InventoryCache,
+    SharedInventoryCache,
+    _Entry,
+    normalize_item_name,
+)
+from telemetry import Registry, render_prometheus
+
+
+class FakeBackend:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: list[tuple[str, str]] = []
+        self.version = 0
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        self.calls.append((store_id, item_name))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {"item_name": item_name, "quantity": 100, "version": self.version}
+
+
+def _entry(stale_until: float) -> _Entry:
+    return _Entry({"quantity": 1}, fresh_until=stale_until, stale_until=stale_until)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalize_item_name() -> None:
+    assert normalize_item_name("  2X4's ") == normalize_item_name("2x4s")
+    assert normalize_item_name("DeWalt  20V MAX drill") == "dewalt 20v max drill"
+
+
+@pytest.mark.asyncio
+async def test_fresh_hit_skips_backend() -> None:
+    """A repeat lookup within the TTL is answered from cache."""
+    backend = FakeBackend()
+    cache = InventoryCache(backend, ttl=30, clock=FakeClock())
+
+    await cache.lookup("oakville", "2x4s")
+    await cache.lookup("oakville", "2X4S")
+
+    assert len(backend.calls) == 1
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing() -> None:
+    """Past the TTL the old value is returned immediately and refreshed."""
+    backend = FakeBackend()
+    clock = FakeClock()
+    cache = InventoryCache(backend, ttl=30, stale_ttl=60, clock=clock)
+
+    await cache.lookup("oakville", "2x4s")
+    backend.version = 1
+    clock.now = 45
+
+    stale = await cache.lookup("oakville", "2x4s")
+    assert stale["version"] == 0
+    assert cache.stats.stale_hits == 1
+
+    # Let the background refresh complete
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    fresh = await cache.lookup("oakville", "2x4s")
+    assert fresh["version"] == 1
+    assert len(backend.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_a_miss() -> None:
+    backend = FakeBackend()
+    clock = FakeClock()
+    cache = InventoryCache(backend, ttl=30, stale_ttl=60, clock=clock)
+
+    await cache.lookup("oakville", "2x4s")
+    clock.now = 100
+    await cache.lookup("oakville", "2x4s")
+
+    assert cache.stats.misses == 2
+    assert len(backend.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_request() -> None:
+    backend = FakeBackend(delay=0.01)
+    cache = InventoryCache(backend, clock=FakeClock())
+
+    results = await asyncio.gather(
+        *(cache.lookup("burnaby", "drill") for _ in range(5))
+    )
+
+    assert len(backend.calls) == 1
+    assert all(r == results[0] for r in results)
+    assert cache.stats.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction() -> None:
+    """The least recently used entry is evicted once the cache is full."""
+    backend = FakeBackend()
+    cache = InventoryCache(backend, max_entries=2, clock=FakeClock())
+
+    await cache.lookup("halifax", "a")
+    await cache.lookup("halifax", "b")
+    await cache.lookup("halifax", "a")
+    await cache.lookup("halifax", "c")
+
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    await cache.lookup("halifax", "a")
+    assert backend.calls.count(("halifax", "a")) == 1
+    await cache.lookup("halifax", "b")
+    assert backend.calls.count(("halifax", "b")) == 2
+
+
+@pytest.mark.asyncio
+async def test_later_calls_read_the_shared_cache(tmp_path) -> None:
+    """A record one call fetched answers the next call without the backend."""
+    backend = FakeBackend()
+    clock = FakeClock()
+    shared = SharedInventoryCache(tmp_path / "inventory.sqlite3")
+    first = InventoryCache(backend, ttl=30, stale_ttl=60, shared=shared, clock=clock)
+    await first.lookup("oakville", "2x4s")
+    await first.aclose()
+
+    second = InventoryCache(backend, ttl=30, stale_ttl=60, shared=shared, clock=clock)
+    assert (await second.lookup("oakville", "2X4s"))["version"] == 0
+    await second.lookup("oakville", "2x4s")
+    assert len(backend.calls) == 1
+    assert second.stats.shared_hits == 1
+    assert second.stats.hits == 1
+    assert second.stats.as_dict()["shared_hit_ratio"] == 0.5
+
+    # Expired in the file too
+    clock.now = 100
+    third = InventoryCache(backend, ttl=30, stale_ttl=60, shared=shared, clock=clock)
+    await third.lookup("oakville", "2x4s")
+    assert third.stats.misses == 1
+    assert len(backend.calls) == 2
+
+
+def test_shared_cache_keeps_the_latest_expiring_entries(tmp_path) -> None:
+    shared = SharedInventoryCache(tmp_path / "inventory.sqlite3", max_entries=2)
+    for i, item in enumerate(["a", "b", "c"]):
+        shared.put(("halifax", item), _entry(stale_until=100 + i), now=0)
+
+    assert shared.get(("halifax", "a")) is None
+    assert shared.get(("halifax", "c")).stale_until == 102
+    shared.put(("halifax", "d"), _entry(stale_until=200), now=101)
+    assert shared.get(("halifax", "b")) is None
+
+
+@pytest.mark.asyncio
+async def test_unreadable_shared_cache_falls_back_to_the_backend(tmp_path) -> None:
+    backend = FakeBackend()
+    shared = SharedInventoryCache(tmp_path / "not-a-directory" / "inventory.sqlite3")
+    (tmp_path / "not-a-directory").write_text("")
+    cache = InventoryCache(backend, shared=shared)
+
+    await cache.lookup("oakville", "2x4s")
+    await cache.aclose()
+    assert len(backend.calls) == 1
+    assert cache.stats.misses == 1
+
+
+def test_agent_uses_an_empty_cache() -> None:
+    """An empty cache is falsy (it has a length) but is still the backend."""
+    cache = InventoryCache(FakeBackend())
+    assert len(cache) == 0
+    assert HardwareStoreAgent(inventory=cache)._inventory is cache
+
+
+@pytest.mark.asyncio
+async def test_caches_of_one_process_report_together(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """With the thread executor each executor's cache adds to the same counters."""
+    metrics = Registry()
+    monkeypatch.setattr(agent, "registry", metrics)
+    monkeypatch.setattr(agent, "_process_stats", None)
+    caches = [
+        InventoryCache(FakeBackend(), stats=agent.process_stats().inventory_cache)
+        for _ in range(2)
+    ]
+    for cache in caches:
+        await cache.lookup("oakville", "2x4s")
+
+    text = render_prometheus([metrics.snapshot()])
+
+    assert agent.process_stats() is agent.process_stats()
+    assert "agent_inventory_cache_misses_total 2.0\n" in text
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from livekit import rtc
+
+from noise_filter import AdaptiveNoiseFilter, mode
+
+SAMPLE_RATE = 24000
+FRAME = SAMPLE_RATE // 20  # 50 ms, as room input delivers it
+
+
+def _call(noise_level: float, seconds: float = 4.0) -> list[rtc.AudioFrame]:
+    """Half a second of tone every second, over background noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tone = 3000 * np.sin(2 * np.pi * 220 * t) * ((t % 1.0) < 0.5)
+    audio = (tone + noise_level * rng.standard_normal(len(t))).astype(np.int16)
+    return [
+        rtc.AudioFrame(
+            data=audio[i : i + FRAME].tobytes(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=FRAME,
+        )
+        for i in range(0, len(audio) - FRAME + 1, FRAME)
+    ]
+
+
+def test_quiet_line_turns_suppression_off() -> None:
+    noise_filter = AdaptiveNoiseFilter(snr_db=15)
+    frames = _call(noise_level=10)
+    out = [noise_filter._process(frame) for frame in frames]
+
+    assert not noise_filter.suppressing
+    stats = noise_filter.stats.as_dict()
+    assert stats["frames"] == len(frames)
+    assert 0 < stats["suppressed_frames"] <= len(frames) // 2
+    assert stats["audio_seconds"] == pytest.approx(4.0)
+    assert stats["cpu_seconds"] > 0
+    # Once off, frames pass through untouched
+    assert bytes(out[-1].data) == bytes(frames[-1].data)
+
+
+def test_noisy_line_keeps_suppressing() -> None:
+    noise_filter = AdaptiveNoiseFilter(snr_db=15)
+    frames = _call(noise_level=800)
+    out = [noise_filter._process(frame) for frame in frames]
+
+    assert noise_filter.suppressing
+    assert noise_filter.stats.suppressed_frames == len(frames)
+    noise = np.frombuffer(frames[-1].data, dtype=np.int16).std()
+    cleaned = np.frombuffer(out[-1].data, dtype=np.int16).std()
+    assert cleaned < noise
+
+
+def test_mode_from_env(monkeypatch) -> None:
+    monkeypatch.delenv("NOISE_CANCELLATION", raising=False)
+    assert mode() == "bvc"
+    monkeypatch.setenv("NOISE_CANCELLATION", "Adaptive")
+    assert mode() == "adaptive"
+    monkeypatch.setenv("NOISE_CANCELLATION", "krisp")
+    with pytest.raises(ValueError):
+        mode()
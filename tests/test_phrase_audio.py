@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+from livekit import rtc
+
+from phrase_audio import PhraseAudioCache
+
+SAMPLE_RATE = 24000
+
+
+@dataclass
+class _Synthesized:
+    frame: rtc.AudioFrame
+
+
+class _FakeStream:
+    def __init__(self, frames: list[rtc.AudioFrame]) -> None:
+        self._frames = frames
+
+    async def __aenter__(self) -> "_FakeStream":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        pass
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for frame in self._frames:
+            yield _Synthesized(frame)
+
+
+class FakeTTS:
+    """Synthesizes 0.5 s of a constant sample value per phrase."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def synthesize(self, text: str) -> _FakeStream:
+        self.calls.append(text)
+        samples = SAMPLE_RATE // 10
+        frame = rtc.AudioFrame(
+            data=b"\x01\x00" * samples,
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=samples,
+        )
+        return _FakeStream([frame] * 5)
+
+
+@pytest.mark.asyncio
+async def test_render_and_play_back(tmp_path: Path) -> None:
+    cache = PhraseAudioCache("fake/voice", cache_dir=tmp_path)
+    assert cache.get("Hello") is None
+
+    await cache.render(FakeTTS(), "Hello")  # type: ignore[arg-type]
+
+    phrase = cache.get("Hello")
+    assert phrase is not None
+    assert phrase.sample_rate == SAMPLE_RATE
+    assert phrase.duration == pytest.approx(0.5)
+
+    frames = [frame async for frame in phrase.frames()]
+    assert len(frames) == 25  # 20 ms frames
+    assert all(f.samples_per_channel == SAMPLE_RATE // 50 for f in frames)
+
+
+@pytest.mark.asyncio
+async def test_render_all_skips_cached_phrases(tmp_path: Path) -> None:
+    engine = FakeTTS()
+    cache = PhraseAudioCache("fake/voice", cache_dir=tmp_path)
+
+    await cache.render_all(engine, ["Hello", "Goodbye"])  # type: ignore[arg-type]
+    # A new cache (e.g. another job process) finds the rendered files on disk
+    await PhraseAudioCache("fake/voice", cache_dir=tmp_path).render_all(
+        engine,  # type: ignore[arg-type]
+        ["Hello", "Goodbye"],
+    )
+
+    assert engine.calls == ["Hello", "Goodbye"]
+
+
+@pytest.mark.asyncio
+async def test_voice_is_part_of_the_key(tmp_path: Path) -> None:
+    await PhraseAudioCache("voice-a", cache_dir=tmp_path).render(
+        FakeTTS(),  # type: ignore[arg-type]
+        "Hello",
+    )
+    assert PhraseAudioCache("voice-b", cache_dir=tmp_path).get("Hello") is None
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from catalog import load_catalog
+from prefetch import SpeculativePrefetcher
+from stores import load_stores
+
+DRILL = "DeWalt 20V MAX Cordless Drill Driver Kit"
+
+
+class FakeBackend:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: list[tuple[str, str]] = []
+
+    async def lookup(self, store_id: str, item_name: str) -> dict[str, Any]:
+        self.calls.append((store_id, item_name))
+        await asyncio.sleep(self.delay)
+        return {"item_name": item_name, "quantity": 12}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog()
+
+
+@pytest.mark.asyncio
+async def test_tool_lookup_takes_prefetched_result(catalog) -> None:
+    backend = FakeBackend(delay=0.01)
+    stores = load_stores()
+    prefetcher = SpeculativePrefetcher(backend, catalog, stores)
+
+    # The store comes from an earlier transcript, the item from interim ones
+    for text in ["Oakville please", "do you have", "do you have a dewalt drill"]:
+        prefetcher.on_transcript(text)
+    await asyncio.sleep(0.02)
+
+    oakville = stores.get("Oakville")["id"]
+    assert backend.calls == [(oakville, DRILL)]
+    record = await prefetcher.lookup(oakville, DRILL)
+    assert record["item_name"] == DRILL
+    assert len(backend.calls) == 1
+    assert prefetcher.stats.as_dict()["hit_ratio"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_unclear_requests_are_not_prefetched(catalog) -> None:
+    backend = FakeBackend()
+    prefetcher = SpeculativePrefetcher(backend, catalog, load_stores())
+
+    # No store yet, then an item the catalog can't pin down
+    prefetcher.on_transcript("do you have a dewalt drill")
+    prefetcher.on_transcript("Burnaby, do you have a drill")
+    await asyncio.sleep(0)
+
+    assert backend.calls == []
+    assert prefetcher.stats.started == 0
+
+
+@pytest.mark.asyncio
+async def test_cap_and_wasted_prefetches(catalog) -> None:
+    backend = FakeBackend(delay=0.01)
+    clock = FakeClock()
+    prefetcher = SpeculativePrefetcher(
+        backend, catalog, load_stores(), max_inflight=1, max_age=10, clock=clock
+    )
+
+    prefetcher.on_transcript("Halifax, do you have a dewalt drill")
+    prefetcher.on_transcript("and some drywall screws")
+    assert prefetcher.stats.started == 1
+    assert prefetcher.stats.skipped_at_cap == 1
+
+    clock.now = 11
+    prefetcher.on_transcript("hmm")
+    assert prefetcher.stats.wasted == 1
+
+    prefetcher.on_transcript("drywall screws then")
+    prefetcher.close()
+    assert prefetcher.stats.as_dict()["wasted_ratio"] == 1.0
+    await asyncio.sleep(0.02)
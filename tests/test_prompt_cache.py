@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from livekit.agents import AgentSession, llm
+
+from agent import HardwareStoreAgent
+from catalog import load_catalog
+from fake_providers import FakeCacheBackend, FakeLLM, ScriptedTurn
+from prompt_cache import PromptCache, StaticPrefix, without_instructions
+
+PREFIX = StaticPrefix(
+    "gemini-2.5-flash",
+    "You are a receptionist.",
+    ({"name": "get_store_hours", "description": "Get the hours."},),
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_cache_is_created_once_and_shared_across_processes(tmp_path) -> None:
+    backend = FakeCacheBackend(latency=0.01)
+    path = tmp_path / "prompt-cache.json"
+    cache = PromptCache(backend, path=path)
+
+    names = await asyncio.gather(*(cache.get(PREFIX) for _ in range(5)))
+    assert names == ["cachedContents/fake-1"] * 5
+    assert len(backend.created) == 1
+
+    # Another job process reads the name from the state file
+    other = PromptCache(backend, path=path)
+    assert await other.get(PREFIX) == "cachedContents/fake-1"
+    assert other.stats.hits == 1
+    assert len(backend.created) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_replaced_on_prompt_change_and_before_expiry(tmp_path) -> None:
+    backend = FakeCacheBackend()
+    clock = Clock()
+    cache = PromptCache(
+        backend, ttl=3600, refresh_before=300, path=tmp_path / "c.json", clock=clock
+    )
+
+    assert await cache.get(PREFIX) == "cachedContents/fake-1"
+    edited = StaticPrefix(PREFIX.model, "You are a cashier.", PREFIX.tools)
+    assert await cache.get(edited) == "cachedContents/fake-2"
+
+    clock.now += 3000
+    assert await cache.get(PREFIX) == "cachedContents/fake-1"
+    clock.now += 400
+    assert await cache.get(PREFIX) == "cachedContents/fake-3"
+
+
+@pytest.mark.asyncio
+async def test_failed_creation_falls_back_until_retry(tmp_path) -> None:
+    backend = FakeCacheBackend(fail=True)
+    clock = Clock()
+    cache = PromptCache(backend, retry_after=600, path=tmp_path / "c.json", clock=clock)
+
+    assert await cache.get(PREFIX) is None
+    backend.fail = False
+    assert await cache.get(PREFIX) is None
+    assert cache.stats.failures == 1
+
+    clock.now += 601
+    assert await cache.get(PREFIX) == "cachedContents/fake-1"
+
+
+def test_request_context_leaves_out_cached_instructions() -> None:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content=PREFIX.instructions)
+    chat_ctx.add_message(role="system", content="Summary of the earlier conversation.")
+    chat_ctx.add_message(role="user", content="Do you have drills?")
+
+    request = without_instructions(chat_ctx, PREFIX.instructions)
+    assert [(item.role, item.text_content) for item in request.items] == [
+        ("user", "Summary of the earlier conversation."),
+        ("user", "Do you have drills?"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_agent_requests_name_the_cache(tmp_path) -> None:
+    backend = FakeCacheBackend()
+    cache = PromptCache(backend, path=tmp_path / "c.json")
+    fake_llm = FakeLLM(
+        [ScriptedTurn(trigger="hours", reply="We open at 7:00 AM.")], ttft=0
+    )
+    agent = HardwareStoreAgent(
+        inventory=None, catalog=load_catalog(), prompt_cache=cache
+    )
+    async with AgentSession(llm=fake_llm) as session:
+        await session.start(agent)
+        await session.run(user_input="What are your hours?")
+        result = await session.run(user_input="And your hours tomorrow?")
+    result.expect.contains_message(role="assistant")
+
+    [prefix] = backend.created
+    assert prefix.model == "fake-llm"
+    assert prefix.instructions == agent.instructions
+    assert sorted(tool["name"] for tool in prefix.tools) == sorted(
+        tool.info.name for tool in agent.tools
+    )
+    assert all(
+        request
+        == {"tools": [], "extra_kwargs": {"cached_content": "cachedContents/fake-1"}}
+        for request in fake_llm.requests
+    )
+    assert cache.stats.as_dict() == {
+        "hits": 1,
+        "creates": 1,
+        "failures": 0,
+        "fallbacks": 0,
+    }
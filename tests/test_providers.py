@@ -0,0 +1,44 @@
+import pytest
+
+import providers
+from startup_profile import StartupProfile
+
+
+def test_defaults_and_overrides(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("TTS_PROVIDER", raising=False)
+    assert providers.configured("tts")[0] == "cartesia"
+    # Same key as before providers were configurable, so cached audio is kept
+    assert (
+        providers.voice_id() == "cartesia/sonic-3/9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"
+    )
+
+    monkeypatch.setenv("LLM_PROVIDER", "OpenAI")
+    assert providers.configured("llm")[1].module == "livekit.plugins.openai"
+
+
+def test_unknown_provider_is_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STT_PROVIDER", "whisper-local")
+
+    with pytest.raises(ValueError, match="STT_PROVIDER"):
+        providers.configured("stt")
+
+
+def test_fallback_candidates(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    monkeypatch.setenv("LLM_FALLBACK_PROVIDER", "openai, google")
+    assert providers.candidates("llm") == ["google", "openai"]
+
+    monkeypatch.setenv("TTS_FALLBACK_PROVIDER", "polly")
+    with pytest.raises(ValueError, match="TTS_FALLBACK_PROVIDER"):
+        providers.candidates("tts")
+
+
+def test_startup_profile_summarizes_stages() -> None:
+    profile = StartupProfile()
+    profile.record("prewarm.vad", 0.4)
+    profile.record("prewarm.catalog", 0.02)
+    profile.record("other", 1.0)
+
+    assert profile.total("prewarm.") == pytest.approx(0.42)
+    assert profile.summary("prewarm.") == "vad 0.40s, catalog 0.02s"
+    assert "time to ready" in profile.report()
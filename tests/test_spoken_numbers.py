@@ -0,0 +1,127 @@
+import pytest
+
+from spoken_numbers import (
+    SpokenNumbers,
+    is_english,
+    number_words,
+    spoken,
+    spoken_stream,
+)
+
+
+@pytest.mark.parametrize(
+    ("n", "words"),
+    [
+        (7, "seven"),
+        (47, "forty-seven"),
+        (101, "one hundred one"),
+        (1200, "twelve hundred"),
+        (2000, "two thousand"),
+        (2005, "two thousand five"),
+        (1_250_000, "one million two hundred fifty thousand"),
+    ],
+)
+def test_number_words(n: int, words: str) -> None:
+    assert number_words(n) == words
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("It's $4.97.", "It's four dollars and ninety-seven cents."),
+        ("$1.00 or $0.50", "one dollar or fifty cents"),
+        ("We have 1,200 left", "We have twelve hundred left"),
+        ("Aisle 12, from 8:00 AM", "Aisle twelve, from eight AM"),
+        ("until 9:30 PM", "until nine thirty PM"),
+        ("2x4s", "two by fours"),
+        ("the DCD771C2 kit", "the DCD771C2 kit"),
+    ],
+)
+def test_spoken(text: str, expected: str) -> None:
+    assert spoken(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        (
+            "DeWalt 20V MAX Circular Saw 7-1/4 in",
+            "DeWalt 20V MAX Circular Saw seven and a quarter inch",
+        ),
+        (
+            "Wood Screws #8 2-1/2 in 1 lb Box",
+            "Wood Screws #8 two and a half inch one lb Box",
+        ),
+        (
+            "OSB Sheathing 7/16 in 4x8",
+            "OSB Sheathing seven sixteenths inch four by eight",
+        ),
+        (
+            "Concrete Anchors 3/8 in 25 Pack",
+            "Concrete Anchors three eighths inch twenty-five Pack",
+        ),
+        (
+            "Romex 14/2 Electrical Wire 75 ft",
+            "Romex 14/2 Electrical Wire seventy-five ft",
+        ),
+        ("DeWalt 20V MAX 5.0Ah Battery", "DeWalt 20V MAX 5.0Ah Battery"),
+    ],
+)
+def test_catalog_names(name: str, expected: str) -> None:
+    assert spoken(name) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        (
+            "Call 905-555-1234.",
+            "Call nine zero five, five five five, one two three four.",
+        ),
+        ("(416) 555-0199", "four one six, five five five, zero one nine nine"),
+        ("SKU 400002", "SKU four zero zero zero zero two"),
+        ("8-10 ft boards", "8-10 ft boards"),
+        ("about 5/3 of it", "about 5/3 of it"),
+    ],
+)
+def test_digits_and_ranges(text: str, expected: str) -> None:
+    assert spoken(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "english"),
+    [
+        ("Do you have drills at the Oakville store?", True),
+        ("Quelles sont vos heures d'ouverture?", False),
+        ("¿Tienen taladros en la tienda?", False),
+        ("Oakville", None),
+    ],
+)
+def test_is_english(text: str, english: bool | None) -> None:
+    assert is_english(text) is english
+
+
+def test_chunks_rewrite_like_whole_text() -> None:
+    text = (
+        "Yes, 1200 in Aisle 12 at $4.97 each.\nWe open at 8:00 AM. "
+        "The 7-1/4 in blade is 1/2 price; call 905-555-1234."
+    )
+    for size in (1, 2, 3, 7):
+        normalizer = SpokenNumbers()
+        parts = [normalizer.push(text[i : i + size]) for i in range(0, len(text), size)]
+        assert "".join(parts) + normalizer.flush() == spoken(text)
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_back_only_the_last_word() -> None:
+    async def reply():
+        for chunk in ["It costs $4", ".97 in Aisle", " 12."]:
+            yield chunk
+
+    chunks = [chunk async for chunk in spoken_stream(reply())]
+    assert chunks == [
+        "It costs ",
+        "four dollars and ninety-seven cents in ",
+        "Aisle ",
+        "twelve.",
+    ]
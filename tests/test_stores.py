@@ -0,0 +1,61 @@
+import pytest
+
+from stores import DEFAULT_STORES_PATH, MAX_PROMPT_NAMES, StoreRegistry, load_stores
+
+
+@pytest.fixture
+def stores() -> StoreRegistry:
+    return load_stores(DEFAULT_STORES_PATH)
+
+
+@pytest.mark.parametrize(
+    "spoken",
+    ["Burnaby", "the burnaby store", "Burnaby location", "metrotown", "Burnabee"],
+)
+def test_resolves_names_aliases_and_misspellings(
+    stores: StoreRegistry, spoken: str
+) -> None:
+    store = stores.get(spoken)
+    assert store is not None
+    assert store["name"] == "Burnaby"
+
+
+def test_unknown_and_ambiguous_names(stores: StoreRegistry) -> None:
+    assert stores.get("Toronto") is None
+    assert stores.get("the store") is None
+
+    similar = StoreRegistry(
+        [
+            {"id": "1", "name": "Burnaby North", "hours": {}, "departments": []},
+            {"id": "2", "name": "Burnaby South", "hours": {}, "departments": []},
+        ]
+    )
+    assert similar.get("burnaby") is None
+    assert similar.get("burnaby sooth")["id"] == "2"
+
+
+def test_prompt_lists_names_only(stores: StoreRegistry) -> None:
+    assert stores.names() == "Oakville, Burnaby, or Halifax"
+    assert stores.prompt_section() == (
+        "Our store locations are Oakville, Burnaby, or Halifax."
+    )
+
+    many = StoreRegistry(
+        [
+            {"id": str(i), "name": f"Store {i}", "hours": {}, "departments": []}
+            for i in range(MAX_PROMPT_NAMES + 1)
+        ]
+    )
+    assert "Store 1" not in many.prompt_section()
+    assert many.location_question() == (
+        "Which of our locations can I help you with today?"
+    )
+
+
+def test_finds_store_named_in_a_sentence(stores: StoreRegistry) -> None:
+    assert stores.find_in("Hi, I'm calling about the Bayers Lake store")["name"] == (
+        "Halifax"
+    )
+    assert stores.find_in("Is Burnaby or Oakville closer?") is None
+    # No fuzzy matching inside sentences
+    assert stores.find_in("What are your hours?") is None
@@ -0,0 +1,194 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from livekit.agents.metrics import EOUMetrics, LLMMetrics, TTSMetrics
+
+import telemetry
+from telemetry import (
+    RETIRED_SNAPSHOT,
+    JobMemory,
+    Registry,
+    TurnTimer,
+    read_snapshots,
+    render_prometheus,
+    timed_tool,
+)
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    registry = Registry()
+    for value in (0.04, 0.15, 0.15, 20.0):
+        registry.observe("agent_turn_latency_seconds", value)
+
+    text = render_prometheus([registry.snapshot()])
+
+    assert 'agent_turn_latency_seconds_bucket{le="0.05"} 1' in text
+    assert 'agent_turn_latency_seconds_bucket{le="0.2"} 3' in text
+    assert 'agent_turn_latency_seconds_bucket{le="10.0"} 3' in text
+    assert 'agent_turn_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "agent_turn_latency_seconds_count 4" in text
+
+
+def test_snapshots_from_several_processes_are_merged() -> None:
+    first, second = Registry(), Registry()
+    first.observe("agent_stage_latency_seconds", 0.3, stage="llm_ttft")
+    second.observe("agent_stage_latency_seconds", 0.4, stage="llm_ttft")
+    first.set_counter("agent_inventory_cache_hits_total", 3)
+    second.set_counter("agent_inventory_cache_hits_total", 4)
+
+    text = render_prometheus([first.snapshot(), second.snapshot()])
+
+    assert 'agent_stage_latency_seconds_count{stage="llm_ttft"} 2' in text
+    assert "agent_inventory_cache_hits_total 7" in text
+
+
+def test_gauges_are_summed_over_processes() -> None:
+    first, second = Registry(), Registry()
+    first.set_gauge("agent_active_jobs", 1)
+    second.set_gauge("agent_active_jobs", 2)
+
+    text = render_prometheus([first.snapshot(), second.snapshot()])
+
+    assert "# TYPE agent_active_jobs gauge" in text
+    assert "agent_active_jobs 3" in text
+
+
+def test_job_memory_reports_per_job_usage() -> None:
+    memory = JobMemory()
+    memory.job_started()
+    memory.job_started()
+
+    sample = memory.sample()
+    registry = Registry()
+    memory.collect(registry)
+
+    assert sample["active_jobs"] == 2
+    assert sample["uss_per_job_mb"] == pytest.approx(sample["uss_mb"] / 2, abs=0.1)
+    assert "agent_active_jobs 2" in render_prometheus([registry.snapshot()])
+
+
+def test_collectors_run_before_snapshot() -> None:
+    registry = Registry()
+    hits = 0
+    registry.add_collector(lambda r: r.set_counter("hits_total", hits))
+
+    hits = 5
+    text = render_prometheus([registry.snapshot()])
+
+    assert "hits_total 5" in text
+
+
+def test_flush_writes_snapshot(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+    registry = Registry()
+    registry.observe("agent_turn_latency_seconds", 0.5)
+
+    registry.flush()
+
+    assert read_snapshots() == [registry.snapshot()]
+
+
+def test_snapshots_of_exited_processes_are_retired(tmp_path: Path) -> None:
+    """Exited jobs keep their counters and histograms but not their gauges."""
+    registry = Registry()
+    registry.observe("agent_turn_latency_seconds", 0.5)
+    registry.set_counter("agent_inventory_cache_hits_total", 3)
+    registry.set_gauge("agent_active_jobs", 1)
+    for _ in range(2):
+        pid = _exited_pid()
+        (tmp_path / f"{pid}.json").write_text(json.dumps(registry.snapshot()))
+        text = render_prometheus(read_snapshots(tmp_path))
+
+    assert [p.name for p in tmp_path.iterdir()] == [RETIRED_SNAPSHOT]
+    assert "agent_turn_latency_seconds_count 2" in text
+    assert "agent_inventory_cache_hits_total 6" in text
+    assert "agent_active_jobs" not in text
+
+
+def test_live_snapshot_replaces_own_file(tmp_path: Path) -> None:
+    """The worker adds its live snapshot, so its own file is not read again."""
+    registry = Registry()
+    registry.set_gauge("agent_worker_load", 0.3)
+    (tmp_path / f"{os.getpid()}.json").write_text(json.dumps(registry.snapshot()))
+
+    snapshots = [*read_snapshots(tmp_path, skip_pid=os.getpid()), registry.snapshot()]
+
+    assert "agent_worker_load 0.3\n" in render_prometheus(snapshots)
+
+
+def test_turn_timer_records_turn_latency() -> None:
+    registry = Registry()
+    timer = TurnTimer(target=registry)
+    common = {"timestamp": 0.0, "speech_id": "speech_1"}
+    timer.on_metrics(
+        EOUMetrics(
+            end_of_utterance_delay=0.25,
+            transcription_delay=0.1,
+            on_user_turn_completed_delay=0.0,
+            **common,
+        )
+    )
+    timer.on_metrics(
+        LLMMetrics(
+            label="llm",
+            request_id="r1",
+            duration=1.0,
+            ttft=0.4,
+            cancelled=False,
+            completion_tokens=10,
+            prompt_tokens=100,
+            prompt_cached_tokens=0,
+            total_tokens=110,
+            tokens_per_second=10.0,
+            **common,
+        )
+    )
+    timer.on_metrics(
+        TTSMetrics(
+            label="tts",
+            request_id="r2",
+            ttfb=0.2,
+            duration=0.5,
+            audio_duration=2.0,
+            cancelled=False,
+            characters_count=40,
+            streamed=True,
+            **common,
+        )
+    )
+
+    text = render_prometheus([registry.snapshot()])
+
+    assert 'agent_turn_latency_seconds_bucket{le="0.75"} 0' in text
+    assert 'agent_turn_latency_seconds_bucket{le="1.0"} 1' in text
+    assert 'agent_turn_latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "agent_turn_latency_seconds_sum 0.85" in text
+    assert "agent_turn_latency_seconds_count 1" in text
+    assert 'agent_stage_latency_seconds_count{stage="stt_final"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_timed_tool_records_duration(monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = Registry()
+    monkeypatch.setattr(telemetry, "registry", registry)
+
+    @timed_tool
+    async def get_store_hours(store_location: str) -> str:
+        """Get the hours."""
+        return store_location
+
+    assert await get_store_hours("Oakville") == "Oakville"
+    assert get_store_hours.__doc__ == "Get the hours."
+    assert 'agent_tool_latency_seconds_count{tool="get_store_hours"} 1' in (
+        render_prometheus([registry.snapshot()])
+    )
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from fake_providers import FakeSipDialer
+from transfer import NoSupervisorAnsweredError, SupervisorPool, warm_transfer
+
+NUMBERS = ("+15550001", "+15550002", "+15550003")
+
+
+async def _hold(seconds: float, dialer: FakeSipDialer) -> None:
+    await asyncio.sleep(seconds)
+    dialer._log("hold_done", "caller")
+
+
+async def _briefing() -> str:
+    return "Transfer reason: wants a human."
+
+
+@pytest.mark.asyncio
+async def test_parallel_dial_overlaps_hold_and_first_answer_wins() -> None:
+    dialer = FakeSipDialer({"+15550001": None, "+15550002": 0.05, "+15550003": 0.1})
+    pool = SupervisorPool(NUMBERS, parallel=True, ring_timeout=1.0)
+
+    number, identity = await warm_transfer(
+        pool, dialer, hold=_hold(0.1, dialer), briefing=_briefing()
+    )
+
+    assert number == "+15550002"
+    # Every phone rang before the hold message ended
+    assert dialer.happened("dial") == list(NUMBERS)
+    assert [e for _, e, _ in dialer.events].index("hold_done") > 3
+    # The others were hung up, the winner briefed and connected after the hold
+    assert len(dialer.happened("hang_up")) == 2
+    assert identity not in dialer.happened("hang_up")
+    assert dialer.happened("brief") == ["Transfer reason: wants a human."]
+    assert [e for _, e, _ in dialer.events][-1] == "connect"
+    assert dialer.happened("connect") == [identity]
+
+
+@pytest.mark.asyncio
+async def test_sequential_dial_moves_on_after_ring_timeout() -> None:
+    dialer = FakeSipDialer({"+15550002": 0.01, "+15550003": 0.01})
+    pool = SupervisorPool(NUMBERS, parallel=False, ring_timeout=0.05)
+
+    number, _ = await warm_transfer(
+        pool, dialer, hold=_hold(0, dialer), briefing=_briefing()
+    )
+
+    assert number == "+15550002"
+    assert dialer.happened("dial") == ["+15550001", "+15550002"]
+    assert len(dialer.happened("hang_up")) == 1
+
+
+@pytest.mark.asyncio
+async def test_no_answer_raises_and_hangs_up() -> None:
+    dialer = FakeSipDialer({})
+    pool = SupervisorPool(NUMBERS[:2], ring_timeout=0.05)
+
+    with pytest.raises(NoSupervisorAnsweredError):
+        await warm_transfer(pool, dialer, hold=_hold(0, dialer), briefing=_briefing())
+
+    assert len(dialer.happened("hang_up")) == 2
+    assert dialer.happened("connect") == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("step", ["brief", "connect"])
+async def test_failed_handover_hangs_up_the_supervisor(step: str) -> None:
+    dialer = FakeSipDialer({"+15550001": 0.01}, fail=step)
+    pool = SupervisorPool(NUMBERS[:1], ring_timeout=1.0)
+
+    with pytest.raises(ConnectionError):
+        await warm_transfer(pool, dialer, hold=_hold(0, dialer), briefing=_briefing())
+
+    assert len(dialer.happened("hang_up")) == 1
+    assert dialer.happened("connect") == []
+
+
+@pytest.mark.asyncio
+async def test_hold_music_plays_until_the_supervisor_joins() -> None:
+    dialer = FakeSipDialer({"+15550001": 0.1})
+    pool = SupervisorPool(NUMBERS[:1], ring_timeout=1.0)
+
+    async def hold_music() -> None:
+        dialer._log("music", "caller")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            dialer._log("music_stopped", "caller")
+
+    await warm_transfer(
+        pool,
+        dialer,
+        hold=_hold(0.01, dialer),
+        briefing=_briefing(),
+        hold_music=hold_music,
+    )
+
+    events = [e for _, e, _ in dialer.events]
+    assert events.index("hold_done") < events.index("music") < events.index("answer")
+    assert events[-2:] == ["music_stopped", "connect"]
+
+
+def test_pool_from_env(monkeypatch) -> None:
+    monkeypatch.delenv("SUPERVISOR_PHONE_NUMBERS", raising=False)
+    monkeypatch.delenv("SUPERVISOR_PHONE_NUMBER", raising=False)
+    assert SupervisorPool.from_env() is None
+
+    monkeypatch.setenv("SUPERVISOR_PHONE_NUMBER", "+15550009")
+    assert SupervisorPool.from_env().numbers == ("+15550009",)
+
+    monkeypatch.setenv("SUPERVISOR_PHONE_NUMBERS", "+15550001, +15550002")
+    monkeypatch.setenv("TRANSFER_DIAL_MODE", "sequential")
+    pool = SupervisorPool.from_env()
+    assert pool.numbers == ("+15550001", "+15550002")
+    assert not pool.parallel
+
+    monkeypatch.setenv("TRANSFER_DIAL_MODE", "round-robin")
+    with pytest.raises(ValueError):
+        SupervisorPool.from_env()
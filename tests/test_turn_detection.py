@@ -0,0 +1,36 @@
+from livekit.plugins.turn_detector.models import HG_MODEL, MODEL_REVISIONS
+
+import turn_detection
+
+
+def _download(cache_dir, names: list[str]) -> None:
+    """Lay files out the way huggingface_hub caches them."""
+    repo = cache_dir / f"models--{HG_MODEL.replace('/', '--')}"
+    (repo / "refs").mkdir(parents=True)
+    (repo / "refs" / MODEL_REVISIONS["multilingual"]).write_text("abc123")
+    for name in names:
+        path = repo / "snapshots" / "abc123" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+
+def test_model_files_found_in_cache(tmp_path) -> None:
+    files = turn_detection.model_files(str(tmp_path))
+    assert list(files.values()) == [None, None, None]
+
+    _download(tmp_path, list(files))
+    files = turn_detection.model_files(str(tmp_path))
+    assert all(path and path.startswith(str(tmp_path)) for path in files.values())
+
+
+def test_falls_back_to_vad_without_model(monkeypatch) -> None:
+    monkeypatch.delenv("LIVEKIT_REMOTE_EOT_URL", raising=False)
+    monkeypatch.setattr(turn_detection, "model_files", lambda: {"languages.json": None})
+    assert not turn_detection.enabled()
+
+    monkeypatch.setattr(
+        turn_detection, "model_files", lambda: {"languages.json": "/opt/models/x"}
+    )
+    assert turn_detection.enabled()
+    monkeypatch.setenv("TURN_DETECTOR", "0")
+    assert not turn_detection.enabled()
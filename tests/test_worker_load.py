@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+import worker_load
+from telemetry import Registry
+from worker_load import WorkerLoad
+
+
+def test_load_follows_cpu() -> None:
+    load = WorkerLoad(max_calls=4, threshold=0.75, window=2)
+    load.add_cpu_sample(0.2)
+    load.add_cpu_sample(0.6)
+    assert load.compute(active_calls=0) == pytest.approx(0.4)
+
+
+def test_full_at_max_calls_before_cpu_catches_up() -> None:
+    load = WorkerLoad(max_calls=4, threshold=0.75)
+    load.add_cpu_sample(0.1)
+    assert load.compute(active_calls=3) < load.threshold
+    assert load.compute(active_calls=4) == pytest.approx(load.threshold)
+    assert load.compute(active_calls=8) == 1.0
+
+
+def test_exported_as_gauges() -> None:
+    load = WorkerLoad(max_calls=2, threshold=0.8)
+    load.add_cpu_sample(0.3)
+    load.compute(active_calls=1)
+    metrics = Registry()
+    metrics.add_collector(load.collect)
+    gauges = {g["name"]: g["value"] for g in metrics.snapshot()["gauges"]}
+    assert gauges == {"agent_worker_load": 0.4, "agent_worker_cpu_load": 0.3}
+
+
+def test_sampler_survives_a_failed_sample(monkeypatch) -> None:
+    monkeypatch.setattr(worker_load, "SAMPLE_INTERVAL", 0.01)
+    sampled = threading.Event()
+
+    class FlakyMonitor:
+        calls = 0
+
+        def cpu_percent(self, interval: float) -> float:
+            time.sleep(interval)
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("cgroup file went away")
+            if self.calls == 3:
+                sampled.set()
+            return 0.5
+
+    load = WorkerLoad(monitor=FlakyMonitor())
+    load.start()
+    try:
+        assert sampled.wait(timeout=2)
+        assert load.cpu == 0.5
+    finally:
+        load.stop()
+    assert "worker_load" not in {thread.name for thread in threading.enumerate()}